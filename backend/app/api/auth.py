@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.models.user import UserLogin, Token, UserPasswordChange, UserResponse
 from app.services.auth_service import auth_service
@@ -11,9 +12,10 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     return await auth_service.get_current_user(credentials.credentials)
 
 @router.post("/login", response_model=Token)
-async def login(login_data: UserLogin):
+async def login(login_data: UserLogin, request: Request):
     """Authenticate user and return access token"""
-    return await auth_service.login(login_data)
+    client_ip = request.client.host if request.client else None
+    return await auth_service.login(login_data, client_ip)
 
 @router.post("/logout")
 async def logout(current_user: UserResponse = Depends(get_current_user)):
@@ -37,14 +39,17 @@ async def change_password(
         )
     
     # Update password
-    password_hash = auth_service.get_password_hash(password_data.new_password)
+    password_hash = await auth_service.password_hasher.hash(password_data.new_password)
     
-    auth_service.db.supabase.table('users').update({
+    await auth_service.db.supabase.table('users').update({
         'password_hash': password_hash,
         'is_first_login': False,
         'updated_at': datetime.utcnow().isoformat()
     }).eq('id', current_user.id).execute()
     
+    # Drops cached principals and revokes claims-mode tokens issued before the change
+    await auth_service.revoke_tokens(current_user.id, current_user.matricule)
+    
     return {"message": "Password changed successfully"}
 
 @router.get("/me", response_model=UserResponse)
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from datetime import timezone
+from email.utils import format_datetime
+from app.models.user import UserResponse
+from app.config import settings
+from app.services.calendar_feed_service import calendar_feed_service
+from app.api.auth import get_current_user
+
+router = APIRouter(prefix="/calendar", tags=["calendar"])
+
+def _feed_urls(request: Request, user_id: str, token: str) -> dict:
+    url = request.url_for("get_calendar_feed", user_id=user_id).include_query_params(token=token)
+    return {
+        "url": str(url),
+        "webcal_url": str(url.replace(scheme="webcal"))
+    }
+
+@router.get("/feed")
+async def get_feed_url(
+    request: Request,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Subscription URL of the current user's calendar feed"""
+    token = await calendar_feed_service.feed_token(current_user.id)
+    return _feed_urls(request, current_user.id, token)
+
+@router.post("/feed/rotate")
+async def rotate_feed_url(
+    request: Request,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Replace the current user's feed URL; subscriptions to the old one stop updating"""
+    token = await calendar_feed_service.rotate_token(current_user.id)
+    return _feed_urls(request, current_user.id, token)
+
+@router.get("/{user_id}.ics")
+async def get_calendar_feed(
+    user_id: str,
+    request: Request,
+    token: str = Query(...)
+):
+    """ICS feed of a user's timetable and virtual classes, authenticated by its token"""
+    feed = await calendar_feed_service.get_feed(user_id, token, request.headers.get("if-none-match"))
+    headers = {
+        "ETag": feed.etag,
+        "Cache-Control": f"private, max-age={settings.calendar_feed_max_age_seconds}"
+    }
+    if feed.last_modified:
+        headers["Last-Modified"] = format_datetime(feed.last_modified.astimezone(timezone.utc), usegmt=True)
+
+    # Only the ETag decides 304s: removing an event does not move Last-Modified
+    if feed.body is None:
+        return Response(status_code=304, headers=headers)
+    return Response(content=feed.body, media_type="text/calendar; charset=utf-8", headers=headers)
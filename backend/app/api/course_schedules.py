@@ -1,16 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
 from typing import List, Optional, Dict, Any
-from datetime import datetime, time
+from datetime import date, datetime, time
+from fastapi.responses import StreamingResponse
 from app.models.course_schedule import (
     CourseScheduleCreate, CourseScheduleUpdate, CourseScheduleResponse,
-    ScheduleConflictCheck, ScheduleOptimizationRequest, BulkScheduleCreate
+    ScheduleConflictCheck, ScheduleOptimizationRequest, BulkScheduleCreate, BulkScheduleResult,
+    ScheduleImportJob
 )
+from app.models.room import RoomType
 from app.models.user import UserResponse
+from app.config import settings
+from app.etag import conditional
+from app.pagination import SCHEDULE_SORT, check_page_size, set_next_cursor
 from app.services.course_schedule_service import course_schedule_service
+from app.services.schedule_import_service import schedule_import_service
 from app.api.auth import get_current_user
 
 router = APIRouter(prefix="/course-schedules", tags=["course schedules"])
 
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "ics": ("text/calendar; charset=utf-8", "ics")
+}
+
 @router.post("", response_model=CourseScheduleResponse)
 async def create_schedule(
     schedule_data: CourseScheduleCreate,
@@ -28,6 +41,8 @@ async def create_schedule(
 
 @router.get("", response_model=List[CourseScheduleResponse])
 async def get_schedules(
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user),
     course_id: Optional[str] = Query(None),
     lecturer_id: Optional[str] = Query(None),
@@ -38,10 +53,12 @@ async def get_schedules(
     status: Optional[str] = Query(None),
     date_from: Optional[str] = Query(None),
     date_to: Optional[str] = Query(None),
-    limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    limit: int = Query(50, ge=1, le=settings.page_size_max),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page")
 ):
     """Get course schedules with filters"""
+    check_page_size(limit, offset, cursor)
     filters = {
         "course_id": course_id,
         "lecturer_id": lecturer_id,
@@ -53,55 +70,19 @@ async def get_schedules(
         "date_from": date_from,
         "date_to": date_to,
         "limit": limit,
-        "offset": offset
+        "offset": offset,
+        "cursor": cursor
     }
     
-    return await course_schedule_service.get_schedules(current_user, filters)
-
-@router.get("/{schedule_id}", response_model=CourseScheduleResponse)
-async def get_schedule(
-    schedule_id: str,
-    current_user: UserResponse = Depends(get_current_user)
-):
-    """Get a specific schedule"""
-    return await course_schedule_service.get_schedule(schedule_id)
-
-@router.patch("/{schedule_id}", response_model=CourseScheduleResponse)
-async def update_schedule(
-    schedule_id: str,
-    schedule_data: CourseScheduleUpdate,
-    current_user: UserResponse = Depends(get_current_user)
-):
-    """Update a course schedule"""
-    # Check permissions
-    schedule = await course_schedule_service.get_schedule(schedule_id)
-    
-    if (current_user.role != "admin" and 
-        current_user.id != schedule.lecturer_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only administrators and course lecturers can update schedules"
-        )
-    
-    return await course_schedule_service.update_schedule(schedule_id, schedule_data)
-
-@router.delete("/{schedule_id}")
-async def delete_schedule(
-    schedule_id: str,
-    current_user: UserResponse = Depends(get_current_user)
-):
-    """Delete a course schedule"""
-    # Check permissions
-    schedule = await course_schedule_service.get_schedule(schedule_id)
-    
-    if (current_user.role != "admin" and 
-        current_user.id != schedule.lecturer_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only administrators and course lecturers can delete schedules"
-        )
-    
-    return await course_schedule_service.delete_schedule(schedule_id)
+    schedules = await conditional(
+        request, response,
+        lambda: course_schedule_service.schedule_versions(current_user, filters),
+        lambda: course_schedule_service.schedule_page(current_user, filters)
+    )
+    if isinstance(schedules, Response):
+        return schedules
+    set_next_cursor(response, schedules, limit, SCHEDULE_SORT)
+    return schedules
 
 @router.post("/check-conflicts")
 async def check_conflicts(
@@ -131,13 +112,28 @@ async def get_available_rooms(
     start_time: str = Query(...),
     end_time: str = Query(...),
     building: Optional[str] = Query(None),
+    type: Optional[RoomType] = Query(None),
+    min_capacity: Optional[int] = Query(None, ge=1),
+    equipment: Optional[List[str]] = Query(None),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get available rooms for a time slot"""
     return await course_schedule_service.get_available_rooms(
-        day, start_time, end_time, building
+        day, start_time, end_time, building, type, min_capacity, equipment
     )
 
+@router.get("/free-slot")
+async def find_free_slot(
+    room: str = Query(...),
+    building: Optional[str] = Query(None),
+    day: str = Query(...),
+    duration_minutes: int = Query(..., ge=5, le=720),
+    near: Optional[str] = Query(None, description="HH:MM the slot should start closest to"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Nearest free slot of a given length in a room"""
+    return await course_schedule_service.find_free_slot(room, building, day, duration_minutes, near)
+
 @router.get("/lecturer/{lecturer_id}")
 async def get_lecturer_schedule(
     lecturer_id: str,
@@ -158,7 +154,7 @@ async def get_course_schedules(
     """Get all schedules for a course"""
     return await course_schedule_service.get_course_schedules(course_id)
 
-@router.post("/bulk")
+@router.post("/bulk", response_model=BulkScheduleResult)
 async def bulk_create_schedules(
     bulk_data: BulkScheduleCreate,
     current_user: UserResponse = Depends(get_current_user)
@@ -170,7 +166,7 @@ async def bulk_create_schedules(
             detail="Only administrators and lecturers can create schedules"
         )
     
-    return await course_schedule_service.bulk_create_schedules(bulk_data.schedules, current_user.id)
+    return await course_schedule_service.bulk_create_schedules(bulk_data.schedules, current_user.id, bulk_data.mode)
 
 @router.post("/{schedule_id}/generate-recurring")
 async def generate_recurring_schedules(
@@ -206,11 +202,14 @@ async def export_schedules(
     format: str = Query("csv", regex="^(csv|excel|ics)$"),
     course_id: Optional[str] = Query(None),
     lecturer_id: Optional[str] = Query(None),
-    date_from: Optional[str] = Query(None),
-    date_to: Optional[str] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Export schedules in various formats"""
+    """Export schedules as CSV, XLSX or ICS, streamed a page at a time"""
+    if date_from and date_to and date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    
     filters = {
         "course_id": course_id,
         "lecturer_id": lecturer_id,
@@ -218,21 +217,46 @@ async def export_schedules(
         "date_to": date_to
     }
     
-    return await course_schedule_service.export_schedules(filters, format)
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        course_schedule_service.export_schedules(current_user, filters, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="schedules.{extension}"'}
+    )
 
-@router.post("/import")
+@router.post("/import", response_model=ScheduleImportJob)
 async def import_schedules(
+    request: Request,
+    response: Response,
     file: UploadFile = File(...),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Import schedules from file"""
+    """Import schedules from a CSV or XLSX file; large files run as a background job"""
+    if current_user.role not in ["admin"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can import schedules"
+        )
+    
+    job = await schedule_import_service.import_schedules(file, current_user.id)
+    if job.background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.headers["Location"] = str(request.url_for("get_import_job", job_id=job.job_id))
+    return job
+
+@router.get("/import/{job_id}", response_model=ScheduleImportJob)
+async def get_import_job(
+    job_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Progress of a schedule import"""
     if current_user.role not in ["admin"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only administrators can import schedules"
         )
     
-    return await course_schedule_service.import_schedules(file, current_user.id)
+    return schedule_import_service.get_job(job_id)
 
 @router.post("/conflicts/{conflict_id}/resolve")
 async def resolve_conflict(
@@ -296,4 +320,50 @@ async def create_from_template(
         template_data["course_id"],
         template_data.get("customizations"),
         current_user.id
-    )
\ No newline at end of file
+    )
+
+# Registered last so the fixed paths above (/stats, /export, ...) are not taken as ids
+@router.get("/{schedule_id}", response_model=CourseScheduleResponse)
+async def get_schedule(
+    schedule_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Get a specific schedule"""
+    return await course_schedule_service.get_schedule(schedule_id)
+
+@router.patch("/{schedule_id}", response_model=CourseScheduleResponse)
+async def update_schedule(
+    schedule_id: str,
+    schedule_data: CourseScheduleUpdate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Update a course schedule"""
+    # Check permissions
+    schedule = await course_schedule_service.get_schedule(schedule_id)
+    
+    if (current_user.role != "admin" and 
+        current_user.id != schedule.lecturer_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators and course lecturers can update schedules"
+        )
+    
+    return await course_schedule_service.update_schedule(schedule_id, schedule_data)
+
+@router.delete("/{schedule_id}")
+async def delete_schedule(
+    schedule_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Delete a course schedule"""
+    # Check permissions
+    schedule = await course_schedule_service.get_schedule(schedule_id)
+    
+    if (current_user.role != "admin" and 
+        current_user.id != schedule.lecturer_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators and course lecturers can delete schedules"
+        )
+    
+    return await course_schedule_service.delete_schedule(schedule_id)
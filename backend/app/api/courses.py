@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from typing import List, Optional
 from app.models.course import (
     CourseCreate, CourseUpdate, CourseResponse,
     CourseScheduleCreate, CourseScheduleUpdate, CourseScheduleResponse
 )
 from app.models.user import UserResponse
+from app.services.course_cache import course_cache
 from app.services.course_service import course_service
+from app.config import settings
+from app.dataloader import load_row
+from app.etag import conditional
+from app.fieldsets import COURSE_FIELDS, sparse_response
+from app.pagination import COURSE_SORT, check_page_size, set_next_cursor
 from app.api.auth import get_current_user
 
 router = APIRouter(prefix="/courses", tags=["courses"])
@@ -27,40 +33,66 @@ async def create_course(
 
 @router.get("", response_model=List[CourseResponse])
 async def get_courses(
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user),
     specialty: Optional[str] = Query(None, description="Filter by specialty"),
     department: Optional[str] = Query(None, description="Filter by department"),
     lecturer_id: Optional[str] = Query(None, description="Filter by lecturer"),
-    limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    limit: int = Query(50, ge=1, le=settings.page_size_max),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated course columns"),
+    expand: Optional[str] = Query(None, description="Comma-separated embeds: lecturer, schedule, materials")
 ):
     """Get courses based on user role and filters"""
-    return await course_service.get_courses(
-        user=current_user,
-        specialty=specialty,
-        department=department,
-        lecturer_id=lecturer_id,
-        limit=limit,
-        offset=offset
+    check_page_size(limit, offset, cursor)
+    selection = COURSE_FIELDS.parse(fields, expand)
+    # Any catalog write bumps the cache version, so it fingerprints every page
+    courses = await conditional(
+        request, response,
+        course_cache.fingerprint,
+        lambda: course_service.course_page(
+            user=current_user,
+            specialty=specialty,
+            department=department,
+            lecturer_id=lecturer_id,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            selection=selection
+        ),
+        current_user.id, current_user.role, current_user.specialty
     )
+    if isinstance(courses, Response):
+        return courses
+    set_next_cursor(response, courses, limit, COURSE_SORT)
+    return sparse_response(courses, response) if selection.sparse else courses
 
 @router.get("/{course_id}", response_model=CourseResponse)
 async def get_course(
     course_id: str,
-    current_user: UserResponse = Depends(get_current_user)
+    response: Response,
+    current_user: UserResponse = Depends(get_current_user),
+    fields: Optional[str] = Query(None, description="Comma-separated course columns"),
+    expand: Optional[str] = Query(None, description="Comma-separated embeds: lecturer, schedule, materials")
 ):
     """Get a specific course"""
-    course = await course_service.get_course(course_id)
+    selection = COURSE_FIELDS.parse(fields, expand)
+    if current_user.role == "student":
+        selection = selection.including('specialties')
+    course = await course_service.get_course(course_id, selection)
     
     # Check if student can access this course
     if current_user.role == "student":
-        if current_user.specialty not in course.specialties:
+        specialties = course['specialties'] if selection.sparse else course.specialties
+        if current_user.specialty not in specialties:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this course"
             )
     
-    return course
+    return sparse_response(course, response) if selection.sparse else course
 
 @router.post("/{course_id}/schedules", response_model=CourseScheduleResponse)
 async def add_course_schedule(
@@ -89,12 +121,12 @@ async def update_course_schedule(
 ):
     """Update a course schedule"""
     # Get schedule to check permissions
-    schedule_result = course_service.db.supabase.table('course_schedules').select('course_id').eq('id', schedule_id).execute()
+    schedule = await load_row(course_service.db.supabase, 'course_schedules', schedule_id)
     
-    if not schedule_result.data:
+    if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
     
-    course = await course_service.get_course(schedule_result.data[0]['course_id'])
+    course = await course_service.get_course(schedule['course_id'])
     
     if (current_user.role != "admin" and 
         current_user.id != course.lecturer_id):
@@ -112,12 +144,12 @@ async def delete_course_schedule(
 ):
     """Delete a course schedule"""
     # Get schedule to check permissions
-    schedule_result = course_service.db.supabase.table('course_schedules').select('course_id').eq('id', schedule_id).execute()
+    schedule = await load_row(course_service.db.supabase, 'course_schedules', schedule_id)
     
-    if not schedule_result.data:
+    if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
     
-    course = await course_service.get_course(schedule_result.data[0]['course_id'])
+    course = await course_service.get_course(schedule['course_id'])
     
     if (current_user.role != "admin" and 
         current_user.id != course.lecturer_id):
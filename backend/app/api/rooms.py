@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Optional
+from app.models.room import RoomCreate, RoomUpdate, RoomResponse, RoomType
+from app.models.user import UserResponse
+from app.services.room_service import room_service
+from app.api.auth import get_current_user
+
+router = APIRouter(prefix="/rooms", tags=["rooms"])
+
+@router.get("", response_model=List[RoomResponse])
+async def get_rooms(
+    building: Optional[str] = Query(None),
+    type: Optional[RoomType] = Query(None),
+    min_capacity: Optional[int] = Query(None, ge=1),
+    equipment: Optional[List[str]] = Query(None, description="Equipment every room must have"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Active rooms, smallest capacity first"""
+    return await room_service.get_rooms(building, type, min_capacity, equipment)
+
+@router.post("", response_model=RoomResponse)
+async def create_room(
+    room_data: RoomCreate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Create a room"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can create rooms"
+        )
+    
+    return await room_service.create_room(room_data)
+
+@router.get("/{room_id}", response_model=RoomResponse)
+async def get_room(
+    room_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Get a specific room"""
+    return await room_service.get_room(room_id)
+
+@router.patch("/{room_id}", response_model=RoomResponse)
+async def update_room(
+    room_id: str,
+    room_data: RoomUpdate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Update a room"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can update rooms"
+        )
+    
+    return await room_service.update_room(room_id, room_data)
+
+@router.delete("/{room_id}")
+async def delete_room(
+    room_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Delete a room"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can delete rooms"
+        )
+    
+    return await room_service.delete_room(room_id)
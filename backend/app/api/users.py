@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from app.models.user import UserResponse, UserStatus, UserStatusUpdate, BulkImportResult
+from app.services.user_service import user_service
+from app.services.user_import_service import user_import_service
+from app.api.auth import get_current_user
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+@router.post("/bulk-import", response_model=BulkImportResult)
+async def bulk_import_users(
+    file: UploadFile = File(...),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Import users from a CSV or XLSX file"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can import users"
+        )
+    
+    return await user_import_service.import_users(file, current_user.id)
+
+@router.patch("/{user_id}/status", response_model=UserResponse)
+async def change_user_status(
+    user_id: str,
+    status_data: UserStatusUpdate,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Change a user's account status"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can change user status"
+        )
+
+    if status_data.status == UserStatus.INACTIVE:
+        return await user_service.deactivate_user(user_id)
+
+    return await user_service.update_user_status(user_id, status_data.status)
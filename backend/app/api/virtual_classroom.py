@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from typing import List, Optional, Dict, Any
 from app.models.virtual_classroom import (
     VirtualClassroomCreate, VirtualClassroomUpdate, VirtualClassroomResponse,
     SessionJoinRequest, SessionRecordingRequest
 )
 from app.models.user import UserResponse
+from app.config import settings
+from app.etag import conditional
+from app.fieldsets import SESSION_FIELDS, sparse_response
+from app.pagination import SESSION_SORT, check_page_size, set_next_cursor
 from app.services.virtual_classroom_service import virtual_classroom_service
 from app.api.auth import get_current_user
 
@@ -27,39 +31,59 @@ async def create_session(
 
 @router.get("/sessions", response_model=List[VirtualClassroomResponse])
 async def get_sessions(
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user),
     status: Optional[str] = Query(None, description="Filter by session status"),
     course_id: Optional[str] = Query(None, description="Filter by course ID"),
-    limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    limit: int = Query(50, ge=1, le=settings.page_size_max),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated session columns"),
+    expand: Optional[str] = Query(None, description="Comma-separated embeds: course, instructor")
 ):
     """Get virtual classroom sessions based on user role"""
-    return await virtual_classroom_service.get_sessions(
-        user=current_user,
-        status=status,
-        course_id=course_id,
-        limit=limit,
-        offset=offset
+    check_page_size(limit, offset, cursor)
+    selection = SESSION_FIELDS.parse(fields, expand)
+    page = dict(user=current_user, status=status, course_id=course_id, limit=limit, offset=offset, cursor=cursor)
+    sessions = await conditional(
+        request, response,
+        lambda: virtual_classroom_service.session_versions(**page),
+        lambda: virtual_classroom_service.session_page(**page, selection=selection)
     )
+    if isinstance(sessions, Response):
+        return sessions
+    set_next_cursor(response, sessions, limit, SESSION_SORT)
+    return sparse_response(sessions, response) if selection.sparse else sessions
 
 @router.get("/sessions/{session_id}", response_model=VirtualClassroomResponse)
 async def get_session(
     session_id: str,
-    current_user: UserResponse = Depends(get_current_user)
+    response: Response,
+    current_user: UserResponse = Depends(get_current_user),
+    fields: Optional[str] = Query(None, description="Comma-separated session columns"),
+    expand: Optional[str] = Query(None, description="Comma-separated embeds: course, instructor")
 ):
     """Get a specific virtual classroom session"""
-    session = await virtual_classroom_service.get_session(session_id)
+    selection = SESSION_FIELDS.parse(fields, expand)
+    if current_user.role == "student":
+        selection = selection.including('target_specialties', 'target_level')
+    session = await virtual_classroom_service.get_session(session_id, selection)
     
     # Check if user can access this session
     if current_user.role == "student":
-        if (current_user.specialty not in session.target_specialties or 
-            (session.target_level and session.target_level != current_user.level)):
+        if selection.sparse:
+            specialties, level = session['target_specialties'], session['target_level']
+        else:
+            specialties, level = session.target_specialties, session.target_level
+        if (current_user.specialty not in specialties or 
+            (level and level != current_user.level)):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this session"
             )
     
-    return session
+    return sparse_response(session, response) if selection.sparse else session
 
 @router.post("/sessions/{session_id}/join")
 async def join_session(
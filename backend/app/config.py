@@ -9,10 +9,78 @@ class Settings(BaseSettings):
     supabase_key: str
     supabase_service_key: str
     
+    # Database Backend Configuration
+    database_backend: str = "postgrest"  # postgrest, postgres
+    database_url: str = ""
+    database_pool_min_size: int = 2
+    database_pool_max_size: int = 20
+    database_statement_cache_size: int = 256
+    database_command_timeout_seconds: float = 15.0
+    
+    # Course Loading Configuration
+    course_children_strategy: str = "embedded"  # embedded, batched
+    
+    # Course Cache Configuration
+    course_cache_backend: str = "local"  # local, redis
+    course_cache_size: int = 2000
+    course_cache_ttl_seconds: int = 300
+    
+    # Schedule Index Configuration
+    schedule_index_ttl_seconds: int = 300
+    schedule_day_start: str = "07:00"
+    schedule_day_end: str = "22:00"
+    schedule_suggestion_count: int = 3
+    
+    # Room Directory Configuration
+    room_directory_ttl_seconds: int = 300
+    
+    # Cohort Timetable Configuration
+    cohort_timetable_ttl_seconds: int = 300
+    
+    # Pagination Configuration
+    page_size_max: int = 1000
+    offset_page_size_max: int = 100
+    
+    # Request Tracing Configuration
+    server_timing_enabled: bool = True
+    
+    # Database HTTP Pool Configuration
+    db_http_max_connections: int = 50
+    db_http_max_keepalive_connections: int = 20
+    db_http_keepalive_expiry_seconds: float = 60.0
+    db_http_http2: bool = True
+    db_http_connect_retries: int = 1
+    db_http_connect_timeout_seconds: float = 5.0
+    db_http_read_timeout_seconds: float = 15.0
+    db_http_write_timeout_seconds: float = 15.0
+    db_http_pool_timeout_seconds: float = 5.0
+    
     # JWT Configuration
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 480
+    auth_token_mode: str = "reference"  # reference, claims
+    revocation_refresh_seconds: int = 60
+    
+    # Principal Cache Configuration
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: int = 60
+    
+    # Login Pipeline Configuration
+    password_hash_workers: int = 4
+    password_hash_executor: str = "thread"  # thread, process
+    last_login_flush_interval_ms: int = 1000
+    last_login_max_batch: int = 500
+    
+    # Login Throttling Configuration
+    login_throttle_backend: str = "local"  # local, redis
+    login_user_bucket_capacity: int = 5
+    login_user_refill_per_minute: float = 5.0
+    login_ip_bucket_capacity: int = 60
+    login_ip_refill_per_minute: float = 120.0
+    login_backoff_free_failures: int = 3
+    login_backoff_base_seconds: float = 1.0
+    login_backoff_max_seconds: float = 300.0
     
     # Email Configuration
     smtp_host: str = "smtp.gmail.com"
@@ -32,6 +100,27 @@ class Settings(BaseSettings):
     upload_dir: str = "uploads"
     allowed_file_types: List[str] = ["pdf", "doc", "docx", "ppt", "pptx", "mp4", "mp3", "jpg", "jpeg", "png"]
     
+    # Bulk User Import Configuration
+    user_import_batch_size: int = 500
+    user_import_hash_workers: int = 4
+    matricule_block_size: int = 100
+    
+    # Schedule Import Configuration
+    schedule_import_batch_size: int = 500
+    schedule_import_background_bytes: int = 1048576  # 1MB
+    schedule_import_max_errors: int = 1000
+    schedule_import_job_ttl_seconds: int = 3600
+    
+    # Schedule Export Configuration
+    schedule_export_page_size: int = 1000
+    
+    # Calendar Configuration
+    calendar_timezone: str = "Africa/Douala"
+    calendar_feed_cache_size: int = 5000
+    calendar_feed_cache_ttl_seconds: int = 86400
+    calendar_feed_past_days: int = 30
+    calendar_feed_max_age_seconds: int = 300
+    
     # Redis Configuration
     redis_url: str = "redis://localhost:6379/0"
     
@@ -1,35 +1,119 @@
-from supabase import create_client, Client
+from typing import Any, Dict, Optional
+from httpx import AsyncClient, Timeout
+from postgrest import AsyncPostgrestClient
 from app.config import settings
+from app.http_pool import PooledTransport
 import logging
 
 logger = logging.getLogger(__name__)
 
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """AsyncPostgrestClient whose HTTP session runs on a shared transport"""
+
+    def __init__(self, base_url: str, headers: Dict[str, str], timeout: Timeout, transport: PooledTransport):
+        self._transport = transport
+        super().__init__(base_url, headers=headers, timeout=timeout)
+
+    def create_session(self, base_url: str, headers: Dict[str, str], timeout: Any) -> AsyncClient:
+        return AsyncClient(base_url=base_url, headers=headers, timeout=timeout, transport=self._transport)
+
+def create_transport() -> PooledTransport:
+    """Create the keep-alive connection pool used by both REST clients"""
+    return PooledTransport(
+        max_connections=settings.db_http_max_connections,
+        max_keepalive_connections=settings.db_http_max_keepalive_connections,
+        keepalive_expiry=settings.db_http_keepalive_expiry_seconds,
+        http2=settings.db_http_http2,
+        retries=settings.db_http_connect_retries
+    )
+
+def create_timeout() -> Timeout:
+    return Timeout(
+        connect=settings.db_http_connect_timeout_seconds,
+        read=settings.db_http_read_timeout_seconds,
+        write=settings.db_http_write_timeout_seconds,
+        pool=settings.db_http_pool_timeout_seconds
+    )
+
+def create_rest_client(api_key: str, transport: Optional[PooledTransport] = None) -> AsyncPostgrestClient:
+    """Create a non-blocking PostgREST client for the Supabase project"""
+    return PooledPostgrestClient(
+        f"{settings.supabase_url}/rest/v1",
+        headers={
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "apiKey": api_key,
+            "Authorization": f"Bearer {api_key}"
+        },
+        timeout=create_timeout(),
+        transport=transport or create_transport()
+    )
+
 class Database:
+    """Async data access for the Supabase REST API.
+
+    ``supabase`` and ``admin_client`` expose the same ``table()/select()/eq()/
+    range()/order()/rpc()`` builder surface as the synchronous supabase-py
+    client, but ``execute()`` is a coroutine backed by httpx, so queries must
+    be awaited and no longer block the event loop. Both clients share one
+    keep-alive connection pool, so TLS handshakes are paid once per
+    connection rather than once per client.
+    """
+
     def __init__(self):
-        self.supabase: Client = create_client(
-            settings.supabase_url,
-            settings.supabase_key
-        )
-        self.admin_client: Client = create_client(
-            settings.supabase_url,
-            settings.supabase_service_key
-        )
-    
-    def get_client(self, admin: bool = False) -> Client:
+        self.transport = create_transport()
+        self.supabase: AsyncPostgrestClient = create_rest_client(settings.supabase_key, self.transport)
+        self.admin_client: AsyncPostgrestClient = create_rest_client(settings.supabase_service_key, self.transport)
+
+    def get_client(self, admin: bool = False) -> AsyncPostgrestClient:
         """Get Supabase client (admin or regular)"""
         return self.admin_client if admin else self.supabase
-    
+
     async def health_check(self) -> bool:
         """Check database connection health"""
         try:
-            result = self.supabase.table('users').select('id').limit(1).execute()
+            result = await self.supabase.table('users').select('id').limit(1).execute()
             return True
         except Exception as e:
             logger.error(f"Database health check failed: {e}")
             return False
 
+    def pool_stats(self) -> Dict[str, Any]:
+        """Live connection pool metrics"""
+        return self.transport.stats()
+
+    async def close(self):
+        """Close the underlying HTTP connections"""
+        await self.supabase.aclose()
+        await self.admin_client.aclose()
+
+def returning(builder, select: str):
+    """Have an insert/update return ``select`` (embeds included) instead of bare rows.
+
+    PostgREST honours ``?select=`` on writes with ``return=representation``,
+    so the response can be built without reading the row back.
+    """
+    if hasattr(builder, "returning"):
+        return builder.returning(select)
+    builder.params = builder.params.set("select", select)
+    return builder
+
+def create_database():
+    """Build the data-access backend selected by ``DATABASE_BACKEND``"""
+    if settings.database_backend == "postgres":
+        from app.postgres_backend import PostgresDatabase
+
+        return PostgresDatabase(
+            dsn=settings.database_url,
+            min_size=settings.database_pool_min_size,
+            max_size=settings.database_pool_max_size,
+            statement_cache_size=settings.database_statement_cache_size,
+            command_timeout=settings.database_command_timeout_seconds
+        )
+    return Database()
+
 # Global database instance
-db = Database()
+db = create_database()
 
 def get_database() -> Database:
-    return db
\ No newline at end of file
+    return db
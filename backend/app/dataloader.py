@@ -0,0 +1,105 @@
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+# (table, select, key_column)
+GroupKey = Tuple[str, str, str]
+
+class RequestLoader:
+    """Per-request identity map that batches row loads.
+
+    Rows are cached by ``(table, select, key_column, id)`` for the lifetime of
+    one HTTP request, so a permission check in a route and the service call
+    that follows share one fetch. Loads requested in the same event-loop tick
+    are coalesced into a single ``in_`` query per table and select.
+    """
+
+    def __init__(self):
+        self._rows: Dict[Tuple[str, str, str, Any], Optional[Dict[str, Any]]] = {}
+        self._pending: Dict[GroupKey, Dict[Any, asyncio.Future]] = {}
+        self._in_flight: Dict[Tuple[str, str, str, Any], asyncio.Future] = {}
+        self._clients: Dict[GroupKey, Any] = {}
+        self.loads = 0
+        self.hits = 0
+        self.queries = 0
+
+    async def load(self, client, table: str, key: Any, select: str = '*', key_column: str = 'id') -> Optional[Dict[str, Any]]:
+        self.loads += 1
+        cache_key = (table, select, key_column, key)
+        if cache_key in self._rows:
+            self.hits += 1
+            return self._rows[cache_key]
+
+        future = self._in_flight.get(cache_key)
+        if future is not None:
+            self.hits += 1
+            return await asyncio.shield(future)
+
+        group: GroupKey = (table, select, key_column)
+        pending = self._pending.get(group)
+        if pending is None:
+            pending = self._pending[group] = {}
+            self._clients[group] = client
+            asyncio.get_running_loop().call_soon(self._schedule, group)
+
+        future = asyncio.get_running_loop().create_future()
+        pending[key] = self._in_flight[cache_key] = future
+        return await asyncio.shield(future)
+
+    def _schedule(self, group: GroupKey):
+        asyncio.ensure_future(self._dispatch(group))
+
+    async def _dispatch(self, group: GroupKey):
+        pending = self._pending.pop(group)
+        client = self._clients.pop(group)
+        table, select, key_column = group
+        keys: List[Any] = list(pending)
+
+        try:
+            self.queries += 1
+            query = client.table(table).select(select)
+            if len(keys) == 1:
+                query = query.eq(key_column, keys[0])
+            else:
+                query = query.in_(key_column, keys)
+            result = await query.execute()
+        except Exception as e:
+            for key, future in pending.items():
+                self._in_flight.pop((table, select, key_column, key), None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        rows = {row[key_column]: row for row in result.data}
+        for key, future in pending.items():
+            row = rows.get(key)
+            cache_key = (table, select, key_column, key)
+            self._rows[cache_key] = row
+            self._in_flight.pop(cache_key, None)
+            if not future.done():
+                future.set_result(row)
+
+    def prime(self, table: str, row: Dict[str, Any], select: str = '*', key_column: str = 'id'):
+        """Seed the map with a row the caller already has"""
+        self._rows[(table, select, key_column, row[key_column])] = row
+
+    def invalidate(self, table: str, key: Any):
+        """Forget every cached shape of a row after it is written"""
+        for cache_key in [k for k in self._rows if k[0] == table and k[3] == key]:
+            del self._rows[cache_key]
+
+request_loader: ContextVar[Optional[RequestLoader]] = ContextVar("request_loader", default=None)
+
+async def load_row(client, table: str, key: Any, select: str = '*', key_column: str = 'id') -> Optional[Dict[str, Any]]:
+    """Load one row through the request's loader, or directly outside a request"""
+    loader = request_loader.get()
+    if loader is not None:
+        return await loader.load(client, table, key, select, key_column)
+
+    result = await client.table(table).select(select).eq(key_column, key).execute()
+    return result.data[0] if result.data else None
+
+def invalidate_row(table: str, key: Any):
+    loader = request_loader.get()
+    if loader is not None:
+        loader.invalidate(table, key)
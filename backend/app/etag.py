@@ -0,0 +1,58 @@
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Iterable, Tuple
+
+from fastapi import Request, Response
+
+from app.tracing import traced
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over the given parts"""
+    raw = json.dumps(parts, default=str, sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+def row_versions(rows: list, embeds: Iterable[str] = ()) -> list:
+    """Row count, newest ``updated_at`` and the (id, updated_at) of every row.
+
+    ``embeds`` names to-one embeds whose ``updated_at`` also counts. Only
+    those keys are read, so a narrow probe and the full rows of the same
+    page give the same fingerprint.
+    """
+    stamps = [row.get('updated_at') or '' for row in rows]
+    versions = [
+        [row['id'], row.get('updated_at')] + [(row.get(embed) or {}).get('updated_at') for embed in embeds]
+        for row in rows
+    ]
+    return [len(rows), max(stamps, default=''), versions]
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison, so a W/ prefix is ignored"""
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+async def conditional(request: Request, response: Response,
+                      probe: Callable[[], Awaitable[Any]], fetch: Callable[[], Awaitable[Tuple[Any, Any]]],
+                      *key: Any) -> Any:
+    """Fetch a read with an ETag, or return a 304 if the client already has it.
+
+    ``fetch`` returns ``(version, body)``, the version taken from the same
+    read as the body, so the ETag always describes the body it is sent with.
+    ``probe`` returns that version without reading full rows (a cache
+    version, or ``row_versions`` of a narrow query) and only runs when the
+    request has If-None-Match, so a match is answered before the body is read.
+    """
+    # Same URL and caller can still mean a different body across users
+    key = (request.url.path, request.url.query) + key
+    header = request.headers.get("if-none-match")
+    if header:
+        etag = make_etag(await traced('etag', probe()), *key)
+        if etag_matches(header, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+    version, body = await fetch()
+    response.headers["ETag"] = make_etag(version, *key)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return body
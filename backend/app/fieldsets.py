@@ -0,0 +1,111 @@
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Related users are shipped as id and name unless a route asks for more
+USER_SUMMARY = 'id, first_name, last_name'
+
+class Embed(NamedTuple):
+    select: str
+    row_key: str
+
+class Selection(NamedTuple):
+    """Columns and embeds picked by ``fields=``/``expand=`` for one request"""
+    fieldset: "FieldSet"
+    columns: Optional[Tuple[str, ...]]
+    expand: Tuple[str, ...]
+
+    @property
+    def sparse(self) -> bool:
+        return self.columns is not None
+
+    @property
+    def key(self) -> Tuple[Any, ...]:
+        return (self.columns, self.expand)
+
+    def including(self, *columns: str) -> "Selection":
+        """Same selection with extra columns a route needs for its own checks"""
+        if not self.sparse:
+            return self
+        return self._replace(columns=tuple(dict.fromkeys(self.columns + columns)))
+
+    def select(self, skip: Iterable[str] = ()) -> str:
+        """PostgREST select string; embeds named in ``skip`` are loaded separately"""
+        parts = [', '.join(self.columns) if self.sparse else '*']
+        parts.extend(self.fieldset.embeds[name].select for name in self.expand if name not in skip)
+        return ', '.join(parts)
+
+    def shape(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Sparse response body for a row: the selected columns plus expanded embeds"""
+        data = {column: row.get(column) for column in self.columns}
+        for name in self.expand:
+            data[name] = row.get(self.fieldset.embeds[name].row_key)
+        return data
+
+class FieldSet:
+    """Whitelist of the columns and embeds a resource can be selected with"""
+
+    def __init__(self, columns: Iterable[str], required: Iterable[str],
+                 embeds: Dict[str, Embed], default_expand: Iterable[str]):
+        self.columns = frozenset(columns)
+        self.required = tuple(required)
+        self.embeds = embeds
+        self.default_expand = tuple(default_expand)
+
+    def default(self) -> Selection:
+        return Selection(self, None, self.default_expand)
+
+    def parse(self, fields: Optional[str] = None, expand: Optional[str] = None) -> Selection:
+        """Validate the query parameters; unknown names are a 400, not a silent drop"""
+        columns = None
+        if fields:
+            requested = [name.strip() for name in fields.split(',') if name.strip()]
+            unknown = sorted(set(requested) - self.columns)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+            # Required columns (id and sort keys) are always selected so cursors work
+            columns = tuple(dict.fromkeys(self.required + tuple(requested)))
+
+        names = self.default_expand
+        if expand is not None:
+            names = tuple(dict.fromkeys(name.strip() for name in expand.split(',') if name.strip()))
+            unknown = sorted(set(names) - set(self.embeds))
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown expand: {', '.join(unknown)}")
+        return Selection(self, columns, names)
+
+def sparse_response(content: Any, response: Response) -> JSONResponse:
+    """Sparse rows bypass the response model, which would reject the missing fields"""
+    return JSONResponse(content=jsonable_encoder(content), headers=dict(response.headers))
+
+COURSE_FIELDS = FieldSet(
+    columns=(
+        'id', 'name', 'code', 'credits', 'description', 'lecturer_id', 'specialties',
+        'is_shared', 'target_level', 'created_at', 'updated_at'
+    ),
+    required=('id', 'name'),
+    embeds={
+        'lecturer': Embed(f'lecturers:lecturer_id({USER_SUMMARY})', 'lecturers'),
+        'schedule': Embed('course_schedules(*)', 'course_schedules'),
+        'materials': Embed('course_materials(*)', 'course_materials')
+    },
+    default_expand=('lecturer', 'schedule', 'materials')
+)
+
+SESSION_FIELDS = FieldSet(
+    columns=(
+        'id', 'title', 'course_id', 'instructor_id', 'description', 'jitsi_room_id',
+        'scheduled_start', 'scheduled_end', 'actual_start', 'actual_end', 'max_participants',
+        'participants', 'target_specialties', 'target_level', 'status', 'is_recording',
+        'recording_id', 'auto_attendance_enabled', 'notifications_enabled',
+        'transcription_enabled', 'subtitles_enabled', 'created_by', 'created_at', 'updated_at'
+    ),
+    required=('id', 'scheduled_start'),
+    embeds={
+        'course': Embed('courses:course_id(id, name, code)', 'courses'),
+        'instructor': Embed(f'instructors:instructor_id({USER_SUMMARY})', 'instructors')
+    },
+    default_expand=('course', 'instructor')
+)
@@ -0,0 +1,109 @@
+import time
+from typing import Any, Dict
+
+import httpx
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """Keep-alive connection pool shared by the Supabase REST clients.
+
+    Wraps httpx's pooled transport and records, via the httpcore ``trace``
+    request extension, how long each request waited for a connection, how
+    many connections (and TLS handshakes) were opened and how many requests
+    are in flight relative to ``max_connections``.
+    """
+
+    def __init__(self, max_connections: int, max_keepalive_connections: int,
+                 keepalive_expiry: float, http2: bool = False, retries: int = 0):
+        super().__init__(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            http2=http2,
+            retries=retries
+        )
+        self.max_connections = max_connections
+        self.http2 = http2
+        self.requests = 0
+        self.errors = 0
+        self.pool_timeouts = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.connections_opened = 0
+        self.connect_failures = 0
+        self.tls_handshakes = 0
+        self.handshake_seconds = 0.0
+        self.started_at = time.monotonic()
+
+    def _record_wait(self, seconds: float):
+        self.waits += 1
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        state = {"acquired": False, "connect_started": 0.0}
+
+        async def trace(event: str, info: Dict[str, Any]):
+            # The first network event marks the point the pool handed us a
+            # connection, either a fresh one (connect_tcp) or a reused one
+            if event == "connection.connect_tcp.started":
+                state["connect_started"] = time.perf_counter()
+                if not state["acquired"]:
+                    state["acquired"] = True
+                    self._record_wait(state["connect_started"] - started)
+            elif event == "connection.connect_tcp.complete":
+                self.connections_opened += 1
+            elif event == "connection.connect_tcp.failed":
+                self.connect_failures += 1
+            elif event == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+                self.handshake_seconds += time.perf_counter() - state["connect_started"]
+            elif event.endswith("send_request_headers.started") and not state["acquired"]:
+                state["acquired"] = True
+                self._record_wait(time.perf_counter() - started)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await super().handle_async_request(request)
+        except httpx.PoolTimeout:
+            self.pool_timeouts += 1
+            self.errors += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        connections = list(getattr(self._pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        uptime_minutes = max((time.monotonic() - self.started_at) / 60, 1 / 60)
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "saturation": round(self.in_flight / self.max_connections, 3) if self.max_connections else 0.0,
+            "requests": self.requests,
+            "errors": self.errors,
+            "pool_timeouts": self.pool_timeouts,
+            "avg_wait_ms": round(self.wait_seconds / self.waits * 1000, 3) if self.waits else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            "connections_opened": self.connections_opened,
+            "connections_opened_per_minute": round(self.connections_opened / uptime_minutes, 2),
+            "connect_failures": self.connect_failures,
+            "tls_handshakes": self.tls_handshakes,
+            "avg_handshake_ms": round(self.handshake_seconds / self.tls_handshakes * 1000, 3) if self.tls_handshakes else 0.0,
+            "reuse_ratio": round(1 - self.connections_opened / self.requests, 3) if self.requests else 0.0
+        }
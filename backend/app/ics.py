@@ -0,0 +1,151 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Iterable, Optional
+from zoneinfo import ZoneInfo
+
+from app.config import settings
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+def escape(text: Any) -> str:
+    """TEXT value escaping (RFC 5545 3.3.11)"""
+    return (
+        str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+def fold(line: str) -> str:
+    """Split a content line into 75-octet pieces, continuation lines start with a space"""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+    pieces, start, limit = [], 0, 75
+    while start < len(raw):
+        end = min(start + limit, len(raw))
+        # Never cut a UTF-8 sequence in half
+        while end < len(raw) and (raw[end] & 0xC0) == 0x80:
+            end -= 1
+        pieces.append(raw[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(pieces) + "\r\n"
+
+def local_stamp(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%S")
+
+def utc_stamp(value: Any) -> str:
+    """DTSTAMP/LAST-MODIFIED form of a datetime or ISO string; naive values are UTC"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+def first_weekday(day: str, on_or_after: date) -> date:
+    """First date that falls on ``day`` (a DayOfWeek value) from ``on_or_after``"""
+    return on_or_after + timedelta(days=(WEEKDAYS.index(day) - on_or_after.weekday()) % 7)
+
+def calendar_header(name: str) -> str:
+    """VCALENDAR preamble and the VTIMEZONE its events' TZID refers to.
+
+    Clients resolve the IANA TZID themselves; the VTIMEZONE carries the
+    zone's current offset for those that do not.
+    """
+    tz = settings.calendar_timezone
+    offset = datetime.now(ZoneInfo(tz)).strftime("%z")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//COUMANO//Timetable//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape(name)}",
+        f"X-WR-TIMEZONE:{tz}",
+        "BEGIN:VTIMEZONE",
+        f"TZID:{tz}",
+        "BEGIN:STANDARD",
+        "DTSTART:19700101T000000",
+        f"TZOFFSETFROM:{offset}",
+        f"TZOFFSETTO:{offset}",
+        "END:STANDARD",
+        "END:VTIMEZONE",
+    ]
+    return "".join(fold(line) for line in lines)
+
+CALENDAR_FOOTER = "END:VCALENDAR\r\n"
+
+def vevent(uid: str, start: datetime, end: datetime, summary: str, stamp: Any,
+           location: Optional[str] = None, description: Optional[str] = None,
+           rrule: Optional[str] = None, cancelled: bool = False) -> str:
+    """One VEVENT; ``start``/``end`` are wall-clock times in the calendar timezone"""
+    tz = settings.calendar_timezone
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{utc_stamp(stamp)}",
+        f"DTSTART;TZID={tz}:{local_stamp(start)}",
+        f"DTEND;TZID={tz}:{local_stamp(end)}",
+        f"SUMMARY:{escape(summary)}",
+    ]
+    if rrule:
+        lines.append(f"RRULE:{rrule}")
+    if location:
+        lines.append(f"LOCATION:{escape(location)}")
+    if description:
+        lines.append(f"DESCRIPTION:{escape(description)}")
+    if cancelled:
+        lines.append("STATUS:CANCELLED")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+def weekly_rule(until: Optional[date] = None) -> str:
+    if until is None:
+        return "FREQ=WEEKLY"
+    return f"FREQ=WEEKLY;UNTIL={utc_stamp(datetime.combine(until, time(23, 59, 59)))}"
+
+def join_location(*parts: Optional[str]) -> str:
+    return ", ".join(part for part in parts if part)
+
+def schedule_event(row: dict, from_date: date, until: Optional[date] = None) -> str:
+    """Weekly VEVENT for a ``course_schedules`` row (with its ``courses`` embed)"""
+    course = row.get('courses') or {}
+    day = row['day'].value if hasattr(row['day'], 'value') else row['day']
+    first = first_weekday(day, from_date)
+    start = datetime.combine(first, time.fromisoformat(str(row['start_time'])))
+    end = datetime.combine(first, time.fromisoformat(str(row['end_time'])))
+    kind = row.get('type') or ''
+    summary = " ".join(part for part in (course.get('code'), course.get('name')) if part) or "Course"
+    return vevent(
+        uid=f"schedule-{row['id']}@coumano",
+        start=start,
+        end=end,
+        summary=f"{summary} ({kind})" if kind else summary,
+        stamp=row.get('updated_at') or row.get('created_at') or datetime.utcnow(),
+        location=join_location(row.get('room'), row.get('building')),
+        description=row.get('notes'),
+        rrule=weekly_rule(until),
+        cancelled=row.get('status') == 'cancelled'
+    )
+
+def _wall_clock(value: Any) -> datetime:
+    """A stored timestamp as naive local time in the calendar timezone"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(ZoneInfo(settings.calendar_timezone)).replace(tzinfo=None)
+
+def session_event(row: dict) -> str:
+    """VEVENT for a ``virtual_classrooms`` row, located at its Jitsi room"""
+    room = row.get('jitsi_room_id')
+    return vevent(
+        uid=f"session-{row['id']}@coumano",
+        start=_wall_clock(row['scheduled_start']),
+        end=_wall_clock(row['scheduled_end']),
+        summary=row.get('title') or "Virtual class",
+        stamp=row.get('updated_at') or row.get('created_at') or datetime.utcnow(),
+        location=f"https://{settings.jitsi_domain}/{room}" if room else None,
+        description=row.get('description'),
+        cancelled=row.get('status') == 'cancelled'
+    )
+
+def calendar(name: str, events: Iterable[str]) -> str:
+    return calendar_header(name) + "".join(events) + CALENDAR_FOOTER
@@ -2,10 +2,23 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
+from datetime import datetime
 import logging
 from app.config import settings
 from app.database import get_database
-from app.api import auth, virtual_classroom, courses, course_schedules
+from app.dataloader import RequestLoader, request_loader
+from app.tracing import RequestTrace, request_trace
+from app.api import auth, users, virtual_classroom, courses, course_schedules, calendar, rooms
+from app.services.auth_service import auth_service
+from app.services.email_service import email_service
+from app.services.user_import_service import user_import_service
+from app.services.matricule_allocator import matricule_allocator
+from app.services.course_cache import course_cache
+from app.services.schedule_index import schedule_index
+from app.services.room_directory import room_directory
+from app.services.cohort_timetables import cohort_timetables
+from app.services.schedule_import_service import schedule_import_service
+from app.services.calendar_feed_service import calendar_feed_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Server-Timing", "Location"],
 )
 
 # Add trusted host middleware for production
@@ -36,11 +50,59 @@ if settings.environment == "production":
         allowed_hosts=["*.university.cm", "localhost"]
     )
 
+@app.middleware("http")
+async def request_scope(request, call_next):
+    """Give each request its own identity map for row loads and query trace"""
+    loader_token = request_loader.set(RequestLoader())
+    trace = RequestTrace() if settings.server_timing_enabled else None
+    trace_token = request_trace.set(trace)
+    try:
+        response = await call_next(request)
+        if trace is not None and trace.spans:
+            response.headers["Server-Timing"] = trace.server_timing()
+        return response
+    finally:
+        request_trace.reset(trace_token)
+        request_loader.reset(loader_token)
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
+app.include_router(users.router, prefix="/api")
 app.include_router(virtual_classroom.router, prefix="/api")
 app.include_router(courses.router, prefix="/api")
 app.include_router(course_schedules.router, prefix="/api")
+app.include_router(calendar.router, prefix="/api")
+app.include_router(rooms.router, prefix="/api")
+
+@app.on_event("startup")
+async def startup():
+    """Start background maintenance tasks"""
+    await auth_service.startup()
+    try:
+        await schedule_index.ensure_loaded(get_database().supabase)
+    except Exception as e:
+        # Loaded lazily by the first conflict check instead
+        logger.warning(f"Schedule index not loaded at startup: {e}")
+    try:
+        await room_directory.ensure_loaded(get_database().supabase)
+    except Exception as e:
+        # Loaded lazily by the first room search instead
+        logger.warning(f"Room directory not loaded at startup: {e}")
+    try:
+        await cohort_timetables.ensure_loaded(get_database().supabase)
+    except Exception as e:
+        # Loaded lazily by the first student timetable request instead
+        logger.warning(f"Cohort timetables not loaded at startup: {e}")
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Flush write-behind queues and release worker pools"""
+    await auth_service.shutdown()
+    await email_service.stop()
+    user_import_service.shutdown()
+    await schedule_import_service.stop()
+    await course_cache.close()
+    await get_database().close()
 
 @app.get("/")
 async def root():
@@ -74,6 +136,26 @@ async def health_check():
             }
         )
 
+@app.get("/metrics")
+async def metrics():
+    """In-process cache and performance counters"""
+    return {
+        "principal_cache": auth_service.principal_cache.stats(),
+        "password_hasher": auth_service.password_hasher.stats(),
+        "last_login_writer": auth_service.last_login_writer.stats(),
+        "revocation_list": auth_service.revocation_list.stats(),
+        "login_throttle": auth_service.login_throttle.stats(),
+        "email_outbox": email_service.stats(),
+        "matricule_allocator": matricule_allocator.stats(),
+        "course_cache": course_cache.stats(),
+        "schedule_index": schedule_index.stats(),
+        "room_directory": room_directory.stats(),
+        "cohort_timetables": cohort_timetables.stats(),
+        "calendar_feeds": calendar_feed_service.stats(),
+        "db_http_pool": get_database().pool_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Global HTTP exception handler"""
@@ -83,7 +165,9 @@ async def http_exception_handler(request, exc):
             "error": exc.detail,
             "status_code": exc.status_code,
             "timestamp": datetime.utcnow().isoformat()
-        }
+        },
+        # Retry-After on 429s, WWW-Authenticate on 401s
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
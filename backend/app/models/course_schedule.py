@@ -87,12 +87,14 @@ class ScheduleConflictCheck(BaseModel):
     end_time: time
     room: str
     building: Optional[str] = None
+    capacity: Optional[int] = None
     exclude_id: Optional[str] = None
 
 class ConflictType(str, Enum):
     ROOM = "room"
     LECTURER = "lecturer"
     TIME = "time"
+    CAPACITY = "capacity"
 
 class ConflictSeverity(str, Enum):
     HIGH = "high"
@@ -119,6 +121,8 @@ class RoomAvailability(BaseModel):
     building: str
     is_available: bool
     conflicting_schedules: List[Dict[str, Any]]
+    type: Optional[str] = None
+    capacity: Optional[int] = None
 
 class ScheduleOptimizationRequest(BaseModel):
     preferred_days: Optional[List[DayOfWeek]] = []
@@ -127,8 +131,52 @@ class ScheduleOptimizationRequest(BaseModel):
     avoid_conflicts: bool = True
     optimize_for: str = "efficiency"  # efficiency, convenience, balance
 
+class BulkScheduleMode(str, Enum):
+    PARTIAL = "partial"  # insert the rows without conflicts
+    ALL_OR_NOTHING = "all_or_nothing"  # insert nothing if any row conflicts
+
 class BulkScheduleCreate(BaseModel):
     schedules: List[CourseScheduleCreate]
+    mode: BulkScheduleMode = BulkScheduleMode.PARTIAL
+
+class BulkRowStatus(str, Enum):
+    CREATED = "created"
+    CONFLICT = "conflict"
+    SKIPPED = "skipped"  # clean, but not inserted because another row conflicted
+
+class BulkScheduleRowResult(BaseModel):
+    index: int
+    status: BulkRowStatus
+    schedule: Optional[CourseScheduleResponse] = None
+    # Existing schedule rows, or {"batch_index": i} for other rows of the batch
+    conflicts: List[Dict[str, Any]] = []
+
+class BulkScheduleResult(BaseModel):
+    mode: BulkScheduleMode
+    created_count: int
+    conflict_count: int
+    results: List[BulkScheduleRowResult]
+
+class ImportJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class ScheduleImportJob(BaseModel):
+    job_id: str
+    status: ImportJobStatus
+    filename: Optional[str] = None
+    background: bool = False
+    rows_read: int = 0
+    created_count: int = 0
+    conflict_count: int = 0
+    error_count: int = 0
+    # First schedule_import_max_errors rejected rows; the counts cover all of them
+    errors: List[Dict[str, Any]] = []
+    created_by: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
 
 class ScheduleTemplate(BaseModel):
     id: str
@@ -0,0 +1,46 @@
+from pydantic import BaseModel, validator
+from typing import Optional, List
+from datetime import datetime
+from enum import Enum
+
+class RoomType(str, Enum):
+    CLASSROOM = "classroom"
+    LAB = "lab"
+    AMPHITHEATER = "amphitheater"
+    SEMINAR = "seminar"
+
+class RoomBase(BaseModel):
+    name: str
+    building: Optional[str] = None
+    type: RoomType = RoomType.CLASSROOM
+    capacity: Optional[int] = None
+    equipment: List[str] = []
+
+    @validator('capacity')
+    def capacity_positive(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('Capacity must be positive')
+        return v
+
+class RoomCreate(RoomBase):
+    pass
+
+class RoomUpdate(BaseModel):
+    name: Optional[str] = None
+    building: Optional[str] = None
+    type: Optional[RoomType] = None
+    capacity: Optional[int] = None
+    equipment: Optional[List[str]] = None
+    is_active: Optional[bool] = None
+
+    @validator('capacity')
+    def capacity_positive(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError('Capacity must be positive')
+        return v
+
+class RoomResponse(RoomBase):
+    id: str
+    is_active: bool = True
+    created_at: datetime
+    updated_at: datetime
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, EmailStr, model_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -43,17 +43,22 @@ class UserUpdate(BaseModel):
     is_active: Optional[bool] = None
     status: Optional[UserStatus] = None
 
+class UserStatusUpdate(BaseModel):
+    status: UserStatus
+
 class UserResponse(UserBase):
     id: str
-    name: str
+    # Always derived from first_name and last_name
+    name: str = ""
     is_first_login: bool
     last_login: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
-    @validator('name', always=True)
-    def compute_name(cls, v, values):
-        return f"{values.get('first_name', '')} {values.get('last_name', '')}".strip()
+    @model_validator(mode="after")
+    def compute_name(self):
+        self.name = f"{self.first_name} {self.last_name}".strip()
+        return self
 
 class UserLogin(BaseModel):
     matricule: str
@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+
+from app.config import settings
+
+# (column, descending) pairs; the last column must be unique (the id)
+SortKey = Sequence[Tuple[str, bool]]
+
+COURSE_SORT: SortKey = (('name', False), ('id', False))
+SCHEDULE_SORT: SortKey = (('day', False), ('start_time', False), ('id', False))
+SESSION_SORT: SortKey = (('scheduled_start', True), ('id', True))
+
+def order_clause(sort: SortKey) -> str:
+    """Comma-separated PostgREST order value for the sort key"""
+    return ",".join(f"{column}.desc" if desc else column for column, desc in sort)
+
+def _cursor_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_cursor_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: SortKey) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return values
+
+def _quote(value: Any) -> str:
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+def keyset_filter(sort: SortKey, values: Sequence[Any]) -> str:
+    """PostgREST ``or`` filter selecting rows strictly after ``values`` in sort order.
+
+    For (a, b, id) this expands to ``a > A or (a = A and b > B) or
+    (a = A and b = B and id > I)``, with ``<`` for descending columns.
+    """
+    branches = []
+    for i, (column, desc) in enumerate(sort):
+        terms = [f"{c}.eq.{_quote(v)}" for (c, _), v in zip(sort[:i], values[:i])]
+        terms.append(f"{column}.{'lt' if desc else 'gt'}.{_quote(values[i])}")
+        branches.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+    return ",".join(branches)
+
+def apply_page(query, sort: SortKey, limit: int, offset: int = 0, cursor: Optional[str] = None):
+    """Order the query by its sort key and page it by cursor or by offset"""
+    query = query.order(order_clause(sort))
+    if cursor:
+        return query.or_(keyset_filter(sort, decode_cursor(cursor, sort))).limit(limit)
+    return query.range(offset, offset + limit - 1)
+
+def _after(values: Sequence[Any], bound: Sequence[Any], sort: SortKey) -> bool:
+    for value, edge, (_, desc) in zip(values, bound, sort):
+        if value != edge:
+            return (value < edge) if desc else (value > edge)
+    return False
+
+def page_rows(rows: Sequence[dict], sort: SortKey, limit: int, offset: int = 0, cursor: Optional[str] = None) -> List[dict]:
+    """``apply_page`` for rows already in memory and in ``sort`` order"""
+    if cursor:
+        bound = decode_cursor(cursor, sort)
+        rows = [row for row in rows if _after([_cursor_value(row.get(column)) for column, _ in sort], bound, sort)]
+        return list(rows[:limit])
+    return list(rows[offset:offset + limit])
+
+def check_page_size(limit: int, offset: int, cursor: Optional[str]):
+    """Large pages are only allowed where they stay cheap: cursor or first page"""
+    if offset and cursor:
+        raise HTTPException(status_code=400, detail="Use either offset or cursor, not both")
+    if offset and limit > settings.offset_page_size_max:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit above {settings.offset_page_size_max} requires cursor pagination"
+        )
+
+def next_cursor(items: Sequence[Any], limit: int, sort: SortKey) -> Optional[str]:
+    """Cursor for the page after ``items``, or None when it was the last page"""
+    if items and len(items) >= limit:
+        last = items[-1]
+        get = last.get if isinstance(last, dict) else lambda column: getattr(last, column)
+        return encode_cursor([get(column) for column, _ in sort])
+    return None
+
+def set_next_cursor(response: Response, items: Sequence[Any], limit: int, sort: SortKey):
+    """Expose the cursor for the page after ``items`` as X-Next-Cursor"""
+    cursor = next_cursor(items, limit, sort)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
@@ -0,0 +1,604 @@
+import asyncio
+import json
+import logging
+import re
+import time
+import uuid
+from datetime import date, datetime, time as dt_time
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EMBED_RE = re.compile(r'^(?:(\w+):)?(\w+)(?:!(\w+))?\((.*)\)$', re.S)
+
+SCHEMA_COLUMNS_SQL = """
+SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod)
+FROM pg_attribute a
+JOIN pg_class c ON c.oid = a.attrelid
+WHERE c.relnamespace = 'public'::regnamespace
+  AND c.relkind IN ('r', 'v', 'm', 'p')
+  AND a.attnum > 0 AND NOT a.attisdropped
+"""
+
+SCHEMA_FOREIGN_KEYS_SQL = """
+SELECT src.relname, a.attname, dst.relname, af.attname
+FROM pg_constraint con
+JOIN pg_class src ON src.oid = con.conrelid
+JOIN pg_class dst ON dst.oid = con.confrelid
+JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = con.conkey[1]
+JOIN pg_attribute af ON af.attrelid = con.confrelid AND af.attnum = con.confkey[1]
+WHERE con.contype = 'f' AND con.connamespace = 'public'::regnamespace
+  AND array_length(con.conkey, 1) = 1
+"""
+
+SCHEMA_FUNCTIONS_SQL = """
+SELECT proname, bool_or(proretset)
+FROM pg_proc
+WHERE pronamespace = 'public'::regnamespace
+GROUP BY proname
+"""
+
+def quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+def to_text(value: Any) -> str:
+    """Render a filter value the way PostgREST receives it in a query string"""
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    return str(value)
+
+def json_default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def split_top_level(spec: str) -> List[str]:
+    """Split a select string on commas that are not inside an embed"""
+    items, depth, current = [], 0, []
+    for char in spec:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        if char == ',' and depth == 0:
+            items.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    items.append(''.join(current).strip())
+    return [item for item in items if item]
+
+def split_logic(text: str) -> List[str]:
+    """Split a PostgREST logic tree on top-level commas, honouring quotes"""
+    items, depth, quoted, escaped, current = [], 0, False, False, []
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and char == ',':
+            items.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    items.append(''.join(current).strip())
+    return [item for item in items if item]
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return value
+
+def parse_logic(text: str) -> List[Tuple[str, str, Any]]:
+    """Parse ``a.gt.1,and(b.eq.2,c.lt.3)`` into (column, op, value) nodes"""
+    nodes = []
+    for item in split_logic(text):
+        match = re.match(r'^(and|or)\((.*)\)$', item, re.S)
+        if match:
+            nodes.append(("", match.group(1), parse_logic(match.group(2))))
+            continue
+        column, op, value = item.split('.', 2)
+        if op == "in":
+            value = [unquote(v) for v in split_logic(value.strip()[1:-1])]
+        else:
+            value = unquote(value)
+        nodes.append((column, op, value))
+    return nodes
+
+class QueryResult:
+    """Same shape as postgrest's APIResponse: ``data`` and ``count``"""
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+class SchemaCache:
+    """Column types, foreign keys and functions of the public schema"""
+
+    def __init__(self, columns: Dict[str, Dict[str, str]],
+                 foreign_keys: Dict[str, Dict[str, Tuple[str, str]]],
+                 functions: Dict[str, bool]):
+        self.columns = columns
+        self.foreign_keys = foreign_keys
+        self.functions = functions
+
+    @classmethod
+    async def load(cls, conn) -> "SchemaCache":
+        columns: Dict[str, Dict[str, str]] = {}
+        for table, column, type_name in await conn.fetch(SCHEMA_COLUMNS_SQL):
+            columns.setdefault(table, {})[column] = type_name
+        foreign_keys: Dict[str, Dict[str, Tuple[str, str]]] = {}
+        for table, column, ref_table, ref_column in await conn.fetch(SCHEMA_FOREIGN_KEYS_SQL):
+            foreign_keys.setdefault(table, {})[column] = (ref_table, ref_column)
+        functions = {name: retset for name, retset in await conn.fetch(SCHEMA_FUNCTIONS_SQL)}
+        return cls(columns, foreign_keys, functions)
+
+    def column_type(self, table: str, column: str) -> str:
+        try:
+            return self.columns[table][column]
+        except KeyError:
+            raise ValueError(f"column {table}.{column} does not exist")
+
+    def relationship(self, table: str, target: str, hint: Optional[str] = None) -> Tuple[str, str, str, bool]:
+        """Resolve an embed to (target_table, local_column, remote_column, many)"""
+        fks = self.foreign_keys.get(table, {})
+        if target in fks:
+            ref_table, ref_column = fks[target]
+            return ref_table, target, ref_column, False
+
+        forward = [(col, ref) for col, ref in fks.items() if ref[0] == target and (hint is None or hint == col)]
+        if len(forward) == 1:
+            column, (ref_table, ref_column) = forward[0]
+            return ref_table, column, ref_column, False
+
+        backward = [
+            (col, ref) for col, ref in self.foreign_keys.get(target, {}).items()
+            if ref[0] == table and (hint is None or hint == col)
+        ]
+        if len(backward) == 1:
+            column, (_, ref_column) = backward[0]
+            return target, ref_column, column, True
+
+        if len(forward) > 1 or len(backward) > 1:
+            raise ValueError(f"More than one relationship between {table} and {target}; add a !hint")
+        raise ValueError(f"Could not find a relationship between {table} and {target}")
+
+class QueryCompiler:
+    """Translates the PostgREST builder state into one parameterised SQL statement.
+
+    Rows are shaped with ``row_to_json``/``json_agg`` so the result decodes to
+    exactly what PostgREST would return (ISO timestamps, ``HH:MM:SS`` times,
+    embeds as nested objects or arrays). Identical query shapes produce
+    identical SQL text, so asyncpg's statement cache reuses the prepared plan.
+    """
+
+    def __init__(self, schema: SchemaCache, embed_filters: Dict[str, List[Tuple[str, str, Any]]]):
+        self.schema = schema
+        self.embed_filters = embed_filters
+        self.params: List[Any] = []
+        self.aliases = 0
+
+    def param(self, value: Any, cast: Optional[str] = None) -> str:
+        self.params.append(value)
+        placeholder = f"${len(self.params)}"
+        return f"{placeholder}::{cast}" if cast else placeholder
+
+    def alias(self) -> str:
+        self.aliases += 1
+        return f"t{self.aliases}"
+
+    def condition(self, table: str, alias: str, column: str, op: str, value: Any) -> str:
+        if op in ("and", "or"):
+            joined = f" {op.upper()} ".join(self.condition(table, alias, *node) for node in value)
+            return f"({joined})"
+
+        ref = f"{alias}.{quote(column)}"
+        type_name = self.schema.column_type(table, column)
+
+        if op == "is":
+            keyword = {"null": "NULL", "true": "TRUE", "false": "FALSE", "unknown": "UNKNOWN"}.get(to_text(value).lower())
+            if keyword is None:
+                raise ValueError(f"Unsupported is_ value: {value}")
+            return f"{ref} IS {keyword}"
+        if op == "in":
+            values = [to_text(v) for v in value]
+            return f"{ref} = ANY(({self.param(values, 'text[]')})::{type_name}[])"
+        if op == "cs":
+            if type_name.endswith("[]"):
+                return f"{ref} @> ({self.param([to_text(v) for v in value], 'text[]')})::{type_name}"
+            return f"{ref} @> ({self.param(json.dumps(value, default=json_default), 'text')})::jsonb"
+        if op in ("like", "ilike"):
+            keyword = "LIKE" if op == "like" else "ILIKE"
+            return f"{ref}::text {keyword} {self.param(to_text(value).replace('*', '%'), 'text')}"
+
+        operator = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}[op]
+        return f"{ref} {operator} ({self.param(to_text(value), 'text')})::{type_name}"
+
+    def select_list(self, table: str, alias: str, spec: str, path: str = "") -> Tuple[str, List[str]]:
+        """Return the select list and any conditions ``!inner`` embeds add to the parent"""
+        parts, inner_conditions = [], []
+        for item in split_top_level(spec or "*"):
+            match = EMBED_RE.match(item)
+            if match:
+                name, target, hint, inner_spec = match.groups()
+                key = path + (name or target)
+                inner = hint == "inner"
+                expression, exists = self.embed(table, alias, target, None if inner else hint, inner_spec, key)
+                parts.append(f"{expression} AS {quote(name or target)}")
+                if inner:
+                    inner_conditions.append(exists)
+            elif item == "*":
+                parts.append(f"{alias}.*")
+            elif ":" in item:
+                label, column = item.split(":", 1)
+                self.schema.column_type(table, column.strip())
+                parts.append(f"{alias}.{quote(column.strip())} AS {quote(label.strip())}")
+            else:
+                self.schema.column_type(table, item)
+                parts.append(f"{alias}.{quote(item)}")
+        return ", ".join(parts), inner_conditions
+
+    def embed(self, table: str, parent: str, target: str, hint: Optional[str], spec: str, key: str) -> Tuple[str, str]:
+        target_table, local, remote, many = self.schema.relationship(table, target, hint)
+        child = self.alias()
+        where = [f"{child}.{quote(remote)} = {parent}.{quote(local)}"]
+        where += [self.condition(target_table, child, col, op, value) for col, op, value in self.embed_filters.get(key, [])]
+        columns, inner_conditions = self.select_list(target_table, child, spec, key + ".")
+        where += inner_conditions
+        where_sql = " AND ".join(where)
+
+        inner = f"SELECT {columns} FROM {quote(target_table)} {child} WHERE {where_sql}"
+        if many:
+            expression = f"(SELECT coalesce(json_agg(_{child}), '[]'::json) FROM ({inner}) _{child})"
+        else:
+            expression = f"(SELECT row_to_json(_{child}) FROM ({inner}) _{child})"
+        exists = f"EXISTS (SELECT 1 FROM {quote(target_table)} {child} WHERE {where_sql})"
+        return expression, exists
+
+class PostgresQuery:
+    """PostgREST-compatible request builder executed over asyncpg"""
+
+    def __init__(self, backend: "PostgresDatabase", table: str):
+        self.backend = backend
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.returned = "*"
+        self.count: Optional[str] = None
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.filters: List[Tuple[str, str, Any]] = []
+        self.orders: List[Tuple[str, bool, Optional[bool]]] = []
+        self.row_limit: Optional[int] = None
+        self.row_offset: Optional[int] = None
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "PostgresQuery":
+        self.operation = "select"
+        self.columns = ",".join(columns) or "*"
+        self.count = count
+        return self
+
+    def insert(self, json_data: Any, *, count: Optional[str] = None, upsert: bool = False, **kwargs) -> "PostgresQuery":
+        self.operation = "upsert" if upsert else "insert"
+        self.payload = json_data if isinstance(json_data, list) else [json_data]
+        self.count = count
+        return self
+
+    def upsert(self, json_data: Any, *, count: Optional[str] = None, on_conflict: str = "id", **kwargs) -> "PostgresQuery":
+        self.insert(json_data, count=count, upsert=True)
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, json_data: Dict[str, Any], *, count: Optional[str] = None, **kwargs) -> "PostgresQuery":
+        self.operation = "update"
+        self.payload = json_data
+        self.count = count
+        return self
+
+    def returning(self, columns: str) -> "PostgresQuery":
+        """Select list, embeds included, for the rows a write returns"""
+        self.returned = columns
+        return self
+
+    def delete(self, *, count: Optional[str] = None, **kwargs) -> "PostgresQuery":
+        self.operation = "delete"
+        self.count = count
+        return self
+
+    def filter(self, column: str, operator: str, value: Any) -> "PostgresQuery":
+        self.filters.append((column, operator, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "PostgresQuery":
+        return self.filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "PostgresQuery":
+        return self.filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "PostgresQuery":
+        return self.filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "PostgresQuery":
+        return self.filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "PostgresQuery":
+        return self.filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "PostgresQuery":
+        return self.filter(column, "lte", value)
+
+    def like(self, column: str, pattern: str) -> "PostgresQuery":
+        return self.filter(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str) -> "PostgresQuery":
+        return self.filter(column, "ilike", pattern)
+
+    def is_(self, column: str, value: Any) -> "PostgresQuery":
+        return self.filter(column, "is", value)
+
+    def in_(self, column: str, values: List[Any]) -> "PostgresQuery":
+        return self.filter(column, "in", list(values))
+
+    def contains(self, column: str, value: Any) -> "PostgresQuery":
+        return self.filter(column, "cs", value)
+
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> "PostgresQuery":
+        column = f"{reference_table}." if reference_table else ""
+        return self.filter(column, "or", parse_logic(filters))
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None, **kwargs) -> "PostgresQuery":
+        for part in column.split(","):
+            name, _, direction = part.strip().partition(".")
+            self.orders.append((name, direction == "desc" if direction else desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, **kwargs) -> "PostgresQuery":
+        self.row_limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> "PostgresQuery":
+        self.row_offset = start
+        self.row_limit = end - start + 1
+        return self
+
+    def _root_filters(self) -> Tuple[List[Tuple[str, str, Any]], Dict[str, List[Tuple[str, str, Any]]]]:
+        # 'courses.lecturer_id' filters the embed aliased 'courses', as in PostgREST
+        root, embedded = [], {}
+        for column, op, value in self.filters:
+            path, _, name = column.rstrip(".").rpartition(".") if op != "or" else (column.rstrip("."), "", "")
+            if path:
+                embedded.setdefault(path, []).append((name, op, value))
+            else:
+                root.append((column, op, value))
+        return root, embedded
+
+    def _written(self, compiler: QueryCompiler, sql: str) -> str:
+        """Wrap a data-modifying statement so it returns the requested representation"""
+        if self.returned == "*":
+            return f"WITH _w AS ({sql}) SELECT coalesce(json_agg(_w), '[]'::json) FROM _w"
+        columns, _ = compiler.select_list(self.table, "t0", self.returned)
+        return f"WITH _w AS ({sql}) SELECT coalesce(json_agg(_r), '[]'::json) FROM (SELECT {columns} FROM _w t0) _r"
+
+    def compile(self, schema: SchemaCache) -> Tuple[str, List[Any]]:
+        root_filters, embedded = self._root_filters()
+        compiler = QueryCompiler(schema, embedded)
+        table = quote(self.table)
+
+        if self.operation in ("insert", "upsert"):
+            columns = list(dict.fromkeys(key for row in self.payload for key in row))
+            for column in columns:
+                schema.column_type(self.table, column)
+            column_list = ", ".join(quote(c) for c in columns)
+            payload = compiler.param(json.dumps(self.payload, default=json_default), "json")
+            sql = (
+                f"INSERT INTO {table} ({column_list}) "
+                f"SELECT {column_list} FROM json_populate_recordset(NULL::{table}, {payload})"
+            )
+            if self.operation == "upsert":
+                updates = ", ".join(f"{quote(c)} = EXCLUDED.{quote(c)}" for c in columns)
+                sql += f" ON CONFLICT ({quote(self.on_conflict)}) DO UPDATE SET {updates}"
+            return self._written(compiler, f"{sql} RETURNING *"), compiler.params
+
+        where = [compiler.condition(self.table, "t0", col, op, value) for col, op, value in root_filters]
+
+        if self.operation == "update":
+            for column in self.payload:
+                schema.column_type(self.table, column)
+            assignments = ", ".join(f"{quote(c)} = _p.{quote(c)}" for c in self.payload)
+            payload = compiler.param(json.dumps(self.payload, default=json_default), "json")
+            sql = f"UPDATE {table} t0 SET {assignments} FROM json_populate_record(NULL::{table}, {payload}) _p"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            return self._written(compiler, f"{sql} RETURNING t0.*"), compiler.params
+
+        if self.operation == "delete":
+            sql = f"DELETE FROM {table} t0"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            return self._written(compiler, f"{sql} RETURNING t0.*"), compiler.params
+
+        columns, inner_conditions = compiler.select_list(self.table, "t0", self.columns)
+        where += inner_conditions
+        where_sql = (" WHERE " + " AND ".join(where)) if where else ""
+
+        sql = f"SELECT {columns} FROM {table} t0{where_sql}"
+        if self.orders:
+            terms = []
+            for column, desc, nullsfirst in self.orders:
+                schema.column_type(self.table, column)
+                term = f"t0.{quote(column)} {'DESC' if desc else 'ASC'}"
+                if nullsfirst is not None:
+                    term += " NULLS FIRST" if nullsfirst else " NULLS LAST"
+                terms.append(term)
+            sql += " ORDER BY " + ", ".join(terms)
+        if self.row_limit is not None:
+            sql += f" LIMIT {compiler.param(self.row_limit, 'bigint')}"
+        if self.row_offset:
+            sql += f" OFFSET {compiler.param(self.row_offset, 'bigint')}"
+
+        data_sql = f"(SELECT coalesce(json_agg(_r), '[]'::json) FROM ({sql}) _r)"
+        if self.count:
+            count_sql = f"(SELECT count(*) FROM {table} t0{where_sql})"
+            return f"SELECT json_build_array({data_sql}, {count_sql})", compiler.params
+        return f"SELECT {data_sql}", compiler.params
+
+    async def execute(self) -> QueryResult:
+        schema = await self.backend.get_schema()
+        sql, params = self.compile(schema)
+        value = json.loads(await self.backend.fetchval(sql, params))
+        if self.operation == "select" and self.count:
+            data, count = value
+            return QueryResult(data, count)
+        return QueryResult(value, len(value) if self.count else None)
+
+class PostgresRPC:
+    """Stored procedure call with PostgREST's result shape"""
+
+    def __init__(self, backend: "PostgresDatabase", function: str, params: Optional[Dict[str, Any]] = None):
+        self.backend = backend
+        self.function = function
+        self.params = params or {}
+
+    async def execute(self) -> QueryResult:
+        schema = await self.backend.get_schema()
+        if self.function not in schema.functions:
+            raise ValueError(f"Could not find the function {self.function}")
+
+        names = list(self.params)
+        args = ", ".join(f"{quote(name)} => ${i}" for i, name in enumerate(names, start=1))
+        call = f"{quote(self.function)}({args})"
+        if schema.functions[self.function]:
+            sql = f"SELECT coalesce(json_agg(_r), '[]'::json) FROM {call} _r"
+        else:
+            sql = f"SELECT to_json({call})"
+        value = await self.backend.fetchval(sql, [self.params[name] for name in names])
+        return QueryResult(json.loads(value) if value is not None else None)
+
+class PostgresClient:
+    """Stands in for ``AsyncPostgrestClient``: ``table()``, ``from_()`` and ``rpc()``"""
+
+    def __init__(self, backend: "PostgresDatabase"):
+        self.backend = backend
+
+    def table(self, name: str) -> PostgresQuery:
+        return PostgresQuery(self.backend, name)
+
+    def from_(self, name: str) -> PostgresQuery:
+        return self.table(name)
+
+    def rpc(self, function: str, params: Optional[Dict[str, Any]] = None) -> PostgresRPC:
+        return PostgresRPC(self.backend, function, params)
+
+class PostgresDatabase:
+    """Direct Postgres backend with the same surface as ``Database``.
+
+    Queries run on an asyncpg pool; each distinct query shape becomes a
+    server-side prepared statement cached per connection. The connection
+    role is the table owner, so row level security is not evaluated; access
+    control stays in the services, as with the PostgREST backend.
+    """
+
+    def __init__(self, dsn: str, min_size: int, max_size: int,
+                 statement_cache_size: int, command_timeout: float):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self.command_timeout = command_timeout
+        self._pool = None
+        self._schema: Optional[SchemaCache] = None
+        # Concurrent first queries must not each open a pool or load the schema
+        self._pool_lock = asyncio.Lock()
+        self._schema_lock = asyncio.Lock()
+        self.supabase = PostgresClient(self)
+        self.admin_client = self.supabase
+        self.queries = 0
+        self.errors = 0
+        self.query_seconds = 0.0
+        self._shapes = set()
+
+    async def get_pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    import asyncpg
+
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        statement_cache_size=self.statement_cache_size,
+                        command_timeout=self.command_timeout
+                    )
+        return self._pool
+
+    async def get_schema(self) -> SchemaCache:
+        if self._schema is None:
+            async with self._schema_lock:
+                if self._schema is None:
+                    pool = await self.get_pool()
+                    async with pool.acquire() as conn:
+                        self._schema = await SchemaCache.load(conn)
+        return self._schema
+
+    async def fetchval(self, sql: str, params: List[Any]) -> Any:
+        pool = await self.get_pool()
+        started = time.perf_counter()
+        try:
+            return await pool.fetchval(sql, *params)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - started
+            if len(self._shapes) < 10000:
+                self._shapes.add(sql)
+
+    def get_client(self, admin: bool = False) -> PostgresClient:
+        """Get database client (both roles share the pool)"""
+        return self.admin_client if admin else self.supabase
+
+    async def health_check(self) -> bool:
+        """Check database connection health"""
+        try:
+            await self.fetchval("SELECT 1", [])
+            return True
+        except Exception as e:
+            logger.error(f"Database health check failed: {e}")
+            return False
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Live connection pool metrics"""
+        pool = self._pool
+        return {
+            "backend": "postgres",
+            "max_connections": self.max_size,
+            "open_connections": pool.get_size() if pool else 0,
+            "idle_connections": pool.get_idle_size() if pool else 0,
+            "queries": self.queries,
+            "errors": self.errors,
+            "avg_query_ms": round(self.query_seconds / self.queries * 1000, 3) if self.queries else 0.0,
+            "statement_shapes": len(self._shapes)
+        }
+
+    async def close(self):
+        """Close the connection pool"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
@@ -1,19 +1,80 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.config import settings
 from app.database import get_database
+from app.cache import TTLCache
+from app.services.password_hasher import PasswordHasher, pwd_context
+from app.services.last_login_writer import LastLoginWriter
+from app.services.revocation_list import RevocationList
+from app.services.login_throttle import LoginThrottle, LocalThrottleBackend, RedisThrottleBackend
 from app.models.user import UserLogin, UserResponse, Token
 import secrets
 import string
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Profile fields embedded in claims-mode tokens
+CLAIM_PROFILE_FIELDS = (
+    'first_name', 'last_name', 'email', 'phone', 'role', 'department',
+    'specialty', 'level', 'is_active', 'status', 'is_first_login',
+    'created_at', 'updated_at'
+)
 
 class AuthService:
     def __init__(self):
         self.db = get_database()
+        # Principals keyed by (matricule, token issue time)
+        self.principal_cache = TTLCache(
+            maxsize=settings.principal_cache_size,
+            ttl=settings.principal_cache_ttl_seconds
+        )
+        self.password_hasher = PasswordHasher(
+            max_workers=settings.password_hash_workers,
+            executor_type=settings.password_hash_executor
+        )
+        self.last_login_writer = LastLoginWriter(
+            self.db,
+            flush_interval_ms=settings.last_login_flush_interval_ms,
+            max_batch=settings.last_login_max_batch
+        )
+        self.revocation_list = RevocationList(
+            self.db,
+            refresh_interval_seconds=settings.revocation_refresh_seconds,
+            token_lifetime_minutes=settings.access_token_expire_minutes
+        )
+        self.login_throttle = LoginThrottle(
+            RedisThrottleBackend(settings.redis_url)
+            if settings.login_throttle_backend == "redis"
+            else LocalThrottleBackend(),
+            user_capacity=settings.login_user_bucket_capacity,
+            user_refill_per_minute=settings.login_user_refill_per_minute,
+            ip_capacity=settings.login_ip_bucket_capacity,
+            ip_refill_per_minute=settings.login_ip_refill_per_minute,
+            backoff_free_failures=settings.login_backoff_free_failures,
+            backoff_base_seconds=settings.login_backoff_base_seconds,
+            backoff_max_seconds=settings.login_backoff_max_seconds
+        )
+    
+    def user_from_row(self, user_data: dict) -> UserResponse:
+        """Build a UserResponse from a users table row"""
+        return UserResponse(
+            id=user_data['id'],
+            matricule=user_data['matricule'],
+            first_name=user_data['first_name'],
+            last_name=user_data['last_name'],
+            email=user_data['email'],
+            phone=user_data.get('phone'),
+            role=user_data['role'],
+            department=user_data.get('department'),
+            specialty=user_data.get('specialty'),
+            level=user_data.get('level'),
+            is_active=user_data['is_active'],
+            status=user_data['status'],
+            is_first_login=user_data['is_first_login'],
+            last_login=user_data.get('last_login'),
+            created_at=user_data['created_at'],
+            updated_at=user_data['updated_at']
+        )
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash"""
@@ -31,12 +92,13 @@ class AuthService:
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None):
         """Create JWT access token"""
         to_encode = data.copy()
+        issued_at = datetime.utcnow()
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            expire = issued_at + expires_delta
         else:
-            expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+            expire = issued_at + timedelta(minutes=settings.access_token_expire_minutes)
         
-        to_encode.update({"exp": expire})
+        to_encode.update({"exp": expire, "iat": issued_at})
         encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
         return encoded_jwt
     
@@ -54,60 +116,57 @@ class AuthService:
     
     async def authenticate_user(self, login_data: UserLogin) -> Optional[UserResponse]:
         """Authenticate user with matricule and password"""
+        user_data = await self._authenticate(login_data)
+        return self.user_from_row(user_data) if user_data else None
+    
+    async def _authenticate(self, login_data: UserLogin) -> Optional[dict]:
+        """Verify credentials and return the matching users row"""
         try:
             # Get user from database
-            result = self.db.supabase.table('users').select('*').eq('matricule', login_data.matricule).execute()
+            result = await self.db.supabase.table('users').select('*').eq('matricule', login_data.matricule).execute()
             
             if not result.data:
                 return None
             
             user_data = result.data[0]
             
-            # Verify password
-            if not self.verify_password(login_data.password, user_data['password_hash']):
+            # Verify password on the hashing pool
+            if not await self.password_hasher.verify(login_data.password, user_data['password_hash']):
                 return None
             
-            # Update last login
-            self.db.supabase.table('users').update({
-                'last_login': datetime.utcnow().isoformat()
-            }).eq('id', user_data['id']).execute()
+            # Queue last login update (flushed in batches)
+            self.last_login_writer.record(user_data['id'])
             
-            # Convert to UserResponse
-            return UserResponse(
-                id=user_data['id'],
-                matricule=user_data['matricule'],
-                first_name=user_data['first_name'],
-                last_name=user_data['last_name'],
-                email=user_data['email'],
-                phone=user_data.get('phone'),
-                role=user_data['role'],
-                department=user_data.get('department'),
-                specialty=user_data.get('specialty'),
-                level=user_data.get('level'),
-                is_active=user_data['is_active'],
-                status=user_data['status'],
-                is_first_login=user_data['is_first_login'],
-                last_login=user_data.get('last_login'),
-                created_at=user_data['created_at'],
-                updated_at=user_data['updated_at']
-            )
+            return user_data
             
         except Exception as e:
             print(f"Authentication error: {e}")
             return None
     
-    async def login(self, login_data: UserLogin) -> Token:
+    async def login(self, login_data: UserLogin, client_ip: Optional[str] = None) -> Token:
         """Login user and return token"""
-        user = await self.authenticate_user(login_data)
-        if not user:
+        # Rejected attempts never reach bcrypt
+        await self.login_throttle.check(login_data.matricule, client_ip)
+        
+        user_data = await self._authenticate(login_data)
+        if not user_data:
+            await self.login_throttle.record_failure(login_data.matricule)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect matricule or password"
             )
         
+        await self.login_throttle.record_success(login_data.matricule)
+        user = self.user_from_row(user_data)
+        claims = {"sub": user.matricule, "user_id": user.id}
+        if settings.auth_token_mode == "claims":
+            # Self-contained token: get_current_user needs no users lookup
+            claims["ver"] = user_data.get('token_version', 1)
+            claims["usr"] = {field: user_data.get(field) for field in CLAIM_PROFILE_FIELDS}
+        
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
         access_token = self.create_access_token(
-            data={"sub": user.matricule, "user_id": user.id},
+            data=claims,
             expires_delta=access_token_expires
         )
         
@@ -127,8 +186,17 @@ class AuthService:
                 detail="Could not validate credentials"
             )
         
+        if settings.auth_token_mode == "claims" and "usr" in payload:
+            return self._user_from_claims(payload)
+        
+        # Serve from the principal cache when this token was seen recently
+        cache_key = (matricule, payload.get("iat"))
+        cached_user = self.principal_cache.get(cache_key)
+        if cached_user is not None:
+            return cached_user
+        
         # Get user from database
-        result = self.db.supabase.table('users').select('*').eq('matricule', matricule).execute()
+        result = await self.db.supabase.table('users').select('*').eq('matricule', matricule).execute()
         
         if not result.data:
             raise HTTPException(
@@ -136,24 +204,61 @@ class AuthService:
                 detail="User not found"
             )
         
-        user_data = result.data[0]
-        return UserResponse(
-            id=user_data['id'],
-            matricule=user_data['matricule'],
-            first_name=user_data['first_name'],
-            last_name=user_data['last_name'],
-            email=user_data['email'],
-            phone=user_data.get('phone'),
-            role=user_data['role'],
-            department=user_data.get('department'),
-            specialty=user_data.get('specialty'),
-            level=user_data.get('level'),
-            is_active=user_data['is_active'],
-            status=user_data['status'],
-            is_first_login=user_data['is_first_login'],
-            last_login=user_data.get('last_login'),
-            created_at=user_data['created_at'],
-            updated_at=user_data['updated_at']
+        user = self.user_from_row(result.data[0])
+        self.principal_cache.set(cache_key, user)
+        return user
+    
+    def _user_from_claims(self, payload: dict) -> UserResponse:
+        """Build the principal from a claims-mode token without touching the database"""
+        user_id = payload.get("user_id")
+        if self.revocation_list.is_revoked(user_id, payload.get("ver", 1)):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        cache_key = (payload["sub"], payload.get("iat"))
+        cached_user = self.principal_cache.get(cache_key)
+        if cached_user is not None:
+            return cached_user
+        
+        user = UserResponse(id=user_id, matricule=payload["sub"], **payload["usr"])
+        self.principal_cache.set(cache_key, user)
+        return user
+    
+    async def revoke_tokens(self, user_id: str, matricule: Optional[str] = None) -> int:
+        """Bump a user's token version so previously issued claims tokens stop working"""
+        result = await self.db.supabase.table('users').select('token_version').eq('id', user_id).execute()
+        if not result.data:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        new_version = (result.data[0].get('token_version') or 1) + 1
+        await self.db.supabase.table('users').update({
+            'token_version': new_version,
+            'updated_at': datetime.utcnow().isoformat()
+        }).eq('id', user_id).execute()
+        
+        self.revocation_list.push(user_id, new_version)
+        self.invalidate_user(matricule=matricule, user_id=user_id)
+        return new_version
+    
+    def invalidate_user(self, matricule: Optional[str] = None, user_id: Optional[str] = None) -> int:
+        """Drop cached principals for a user after their credentials or status change"""
+        return self.principal_cache.discard_where(
+            lambda key, user: key[0] == matricule or user.id == user_id
         )
 
+    async def startup(self):
+        """Start background refresh of the token revocation list"""
+        if settings.auth_token_mode == "claims":
+            self.revocation_list.start()
+    
+    async def shutdown(self):
+        """Flush queued writes and release the hashing pool"""
+        await self.revocation_list.stop()
+        await self.last_login_writer.stop()
+        await self.login_throttle.close()
+        self.password_hasher.shutdown()
+
 auth_service = AuthService()
\ No newline at end of file
@@ -0,0 +1,213 @@
+import hashlib
+import hmac
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from app.cache import TTLCache
+from app.config import settings
+from app.database import get_database
+from app.etag import etag_matches, make_etag
+from app.ics import calendar_header, CALENDAR_FOOTER, schedule_event, session_event
+from app.services.cohort_timetables import cohort_timetables
+from app.tracing import fan_out, traced
+
+# (kind, row id) -> (version, rendered VEVENT)
+Fragments = Dict[Tuple[str, str], Tuple[Any, str]]
+
+class CalendarFeed:
+    """A rendered feed and the validators it is served with"""
+
+    __slots__ = ("body", "etag", "last_modified")
+
+    def __init__(self, body: Optional[str], etag: str, last_modified: Optional[datetime]):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+
+def _parse_stamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    stamp = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    # Rows written by the app store naive UTC
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+class CalendarFeedService:
+    """Per-user ICS feeds for calendar app subscriptions.
+
+    Each user's events are cached as pre-rendered VEVENT fragments keyed by
+    source row. A poll reads only the ids and ``updated_at`` of the user's
+    rows, re-renders the fragments whose row changed (fetching just those
+    rows), and concatenates the rest as they are.
+    """
+
+    def __init__(self):
+        self.db = get_database()
+        self.fragments = TTLCache(settings.calendar_feed_cache_size, settings.calendar_feed_cache_ttl_seconds)
+        self.rendered = 0
+        self.reused = 0
+
+    def token(self, user_id: str, feed_version: int) -> str:
+        """Feed token for the user; calendar apps cannot send an Authorization header"""
+        message = f"calendar:{user_id}:{feed_version}".encode()
+        return hmac.new(settings.secret_key.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+    async def _feed_version(self, user_id: str) -> int:
+        result = await self.db.supabase.table('users').select('calendar_feed_version').eq('id', user_id).execute()
+        if not result.data:
+            raise HTTPException(status_code=404, detail="User not found")
+        return result.data[0].get('calendar_feed_version') or 1
+
+    async def feed_token(self, user_id: str) -> str:
+        """The user's current feed token"""
+        try:
+            return self.token(user_id, await self._feed_version(user_id))
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting calendar feed token: {str(e)}")
+
+    async def rotate_token(self, user_id: str) -> str:
+        """Bump the user's feed version so previously shared feed URLs stop working"""
+        try:
+            new_version = await self._feed_version(user_id) + 1
+            await self.db.supabase.table('users').update({
+                'calendar_feed_version': new_version,
+                'updated_at': datetime.utcnow().isoformat()
+            }).eq('id', user_id).execute()
+            return self.token(user_id, new_version)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error rotating calendar feed token: {str(e)}")
+
+    async def _user(self, user_id: str, token: str) -> Dict[str, Any]:
+        result = await self.db.supabase.table('users').select(
+            'id, first_name, last_name, role, specialty, level, is_active, calendar_feed_version'
+        ).eq('id', user_id).execute()
+        if not result.data or not result.data[0].get('is_active', True):
+            raise HTTPException(status_code=404, detail="Calendar not found")
+        user = result.data[0]
+        # A wrong or rotated token looks the same as a missing calendar
+        if not hmac.compare_digest(self.token(user_id, user.get('calendar_feed_version') or 1), token or ""):
+            raise HTTPException(status_code=404, detail="Calendar not found")
+        return user
+
+    def _courses_query(self, user: Dict[str, Any]):
+        query = self.db.supabase.table('courses').select('id, code, name, updated_at')
+        if user['role'] == 'lecturer':
+            return query.eq('lecturer_id', user['id'])
+        # Students get the courses of their cohort's timetable
+        return query.in_('id', cohort_timetables.course_ids(user['specialty'], user.get('level')))
+
+    def _sessions_query(self, user: Dict[str, Any], select: str):
+        since = (datetime.utcnow() - timedelta(days=settings.calendar_feed_past_days)).isoformat()
+        query = self.db.supabase.table('virtual_classrooms').select(select).gte('scheduled_start', since)
+        if user['role'] == 'lecturer':
+            return query.eq('instructor_id', user['id'])
+        query = query.contains('target_specialties', [user['specialty']])
+        if user.get('level'):
+            # Sessions without a level are open to every level
+            query = query.or_(f"target_level.eq.{user['level']},target_level.is.null")
+        return query
+
+    async def _versions(self, user: Dict[str, Any]) -> Tuple[Dict[Tuple[str, str], Any], Dict[str, Dict[str, Any]]]:
+        """Version of every event source row of the user, and the courses they hang off"""
+        if user['role'] not in ('lecturer', 'student'):
+            return {}, {}
+        if user['role'] == 'student':
+            # Without a specialty a student belongs to no cohort
+            if not user.get('specialty'):
+                return {}, {}
+            await cohort_timetables.ensure_loaded(self.db.supabase)
+
+        results = await fan_out(
+            courses=self._courses_query(user).execute(),
+            sessions=self._sessions_query(user, 'id, updated_at').execute()
+        )
+        courses = {row['id']: row for row in results['courses'].data}
+
+        versions: Dict[Tuple[str, str], Any] = {
+            ('session', row['id']): row.get('updated_at') for row in results['sessions'].data
+        }
+        if courses:
+            schedules = await traced('schedules', self.db.supabase.table('course_schedules').select(
+                'id, course_id, updated_at'
+            ).in_('course_id', list(courses)).execute())
+            for row in schedules.data:
+                # A renamed course changes the event summary, so its timestamp is part of the version
+                versions[('schedule', row['id'])] = (row.get('updated_at'), courses[row['course_id']].get('updated_at'))
+        return versions, courses
+
+    async def _render(self, kind: str, ids: List[str], courses: Dict[str, Dict[str, Any]]) -> Dict[Tuple[str, str], str]:
+        if not ids:
+            return {}
+        if kind == 'session':
+            result = await self.db.supabase.table('virtual_classrooms').select('*').in_('id', ids).execute()
+            return {(kind, row['id']): session_event(row) for row in result.data}
+
+        result = await self.db.supabase.table('course_schedules').select('*').in_('id', ids).execute()
+        rendered = {}
+        for row in result.data:
+            row['courses'] = courses.get(row['course_id'])
+            # A fixed first occurrence keeps the fragment identical from one poll to the next
+            first = (_parse_stamp(row.get('created_at')) or datetime.utcnow()).date()
+            rendered[(kind, row['id'])] = schedule_event(row, first)
+        return rendered
+
+    async def get_feed(self, user_id: str, token: str, if_none_match: Optional[str] = None) -> CalendarFeed:
+        """The user's feed, re-rendering only events whose source row changed.
+
+        ``token`` must be the user's current feed token. The validators depend
+        on the versions alone, so when ``if_none_match`` already matches
+        nothing is rendered and the feed has no body.
+        """
+        try:
+            user = await self._user(user_id, token)
+            versions, courses = await self._versions(user)
+
+            name = f"{user['first_name']} {user['last_name']} - COUMANO"
+            ordered = sorted(versions)
+            etag = make_etag(user_id, name, [(key, versions[key]) for key in ordered])
+            stamps = [stamp for key in ordered for stamp in _flatten(versions[key])]
+            last_modified = max((_parse_stamp(stamp) for stamp in stamps if stamp), default=None)
+            if if_none_match and etag_matches(if_none_match, etag):
+                return CalendarFeed(None, etag, last_modified)
+
+            cached: Fragments = self.fragments.get(user_id) or {}
+            fragments: Fragments = {}
+            stale: Dict[str, List[str]] = {'schedule': [], 'session': []}
+            for key, version in versions.items():
+                entry = cached.get(key)
+                if entry is not None and entry[0] == version:
+                    fragments[key] = entry
+                else:
+                    stale[key[0]].append(key[1])
+
+            self.reused += len(fragments)
+            results = await fan_out(
+                schedules=self._render('schedule', stale['schedule'], courses),
+                sessions=self._render('session', stale['session'], courses)
+            )
+            for rendered in results.values():
+                for key, fragment in rendered.items():
+                    fragments[key] = (versions[key], fragment)
+            self.rendered += len(stale['schedule']) + len(stale['session'])
+            self.fragments.set(user_id, fragments)
+
+            body = calendar_header(name) + "".join(fragments[key][1] for key in ordered if key in fragments) + CALENDAR_FOOTER
+            return CalendarFeed(body, etag, last_modified)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error building calendar feed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.fragments.stats(), "rendered": self.rendered, "reused": self.reused}
+
+def _flatten(version: Any) -> List[Any]:
+    return list(version) if isinstance(version, tuple) else [version]
+
+calendar_feed_service = CalendarFeedService()
@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Cohort = Tuple[str, Optional[str]]
+
+# Level key of the timetable shown to students with no level: every level of the specialty
+ALL_LEVELS = "*"
+
+COURSE_COLUMNS = 'id, name, code, lecturer_id, specialties, target_level'
+
+def _plain_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: (v.value if isinstance(v, Enum) else v) for k, v in row.items()}
+
+def _sort_key(row: Dict[str, Any]) -> Tuple[str, str, str]:
+    # Same order as SCHEDULE_SORT, so cursors from these pages decode as usual
+    return (row['day'], str(row['start_time']), row['id'])
+
+class CohortTimetableStore:
+    """Per-(specialty, level) timetables, precomputed from courses and schedules.
+
+    A course belongs to the cohorts of each of its ``specialties`` at its
+    ``target_level``; courses without a level belong to every level. Each
+    cohort's schedules (with their course embedded) are kept as one sorted,
+    compact JSON blob plus its digest, so a student's timetable is a dict
+    lookup. Writes mark only the cohorts of the course they touch for
+    rebuild; the whole store is reloaded after ``ttl`` seconds to pick up
+    other workers' writes.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._courses: Dict[str, Dict[str, Any]] = {}
+        self._schedules: Dict[str, Dict[str, Any]] = {}
+        self._by_course: Dict[str, Set[str]] = {}
+        self._members: Dict[Cohort, Set[str]] = {}
+        self._levels: Dict[str, Set[Optional[str]]] = {}
+        self._blobs: Dict[Cohort, Tuple[str, bytes]] = {}
+        self._dirty: Set[Cohort] = set()
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        # Writes recorded while a load is reading the tables, replayed once it swaps in
+        self._pending: Optional[List[Tuple[str, Any]]] = None
+        self.loads = 0
+        self.rebuilds = 0
+        self.lookups = 0
+
+    @property
+    def fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def _read_all(self, client, table: str, select: str, page_size: int) -> List[Dict[str, Any]]:
+        rows, offset = [], 0
+        while True:
+            result = await client.table(table).select(select).order('id').range(offset, offset + page_size - 1).execute()
+            rows.extend(result.data)
+            if len(result.data) < page_size:
+                return rows
+            offset += page_size
+
+    async def load(self, client, page_size: int = 1000):
+        """Rebuild every cohort from the tables"""
+        async with self._lock:
+            await self._load(client, page_size)
+
+    async def ensure_loaded(self, client):
+        if self.fresh:
+            return
+        async with self._lock:
+            if not self.fresh:
+                await self._load(client)
+
+    async def _load(self, client, page_size: int = 1000):
+        self._pending = []
+        try:
+            courses, schedules = await asyncio.gather(
+                self._read_all(client, 'courses', COURSE_COLUMNS, page_size),
+                self._read_all(client, 'course_schedules', '*', page_size)
+            )
+            self._courses, self._schedules, self._by_course = {}, {}, {}
+            self._members, self._levels, self._blobs, self._dirty = {}, {}, {}, set()
+            for course in courses:
+                self._put_course(course)
+            for row in schedules:
+                self._put_schedule(row)
+            for cohort in self._all_cohorts():
+                self._rebuild(cohort)
+            self._loaded_at = time.monotonic()
+            # A page read before one of these writes would otherwise undo it
+            pending, self._pending = self._pending, None
+            for op, arg in pending:
+                getattr(self, op)(arg)
+        finally:
+            self._pending = None
+        self.loads += 1
+        logger.info(f"Cohort timetables loaded {len(self._schedules)} schedules into {len(self._blobs)} cohorts")
+
+    def _cohorts_of(self, course: Dict[str, Any]) -> Set[Cohort]:
+        """Every stored cohort whose timetable includes the course"""
+        level = course.get('target_level')
+        cohorts: Set[Cohort] = set()
+        for specialty in course.get('specialties') or ():
+            levels = self._levels.get(specialty, set()) | {None} if level is None else {level}
+            cohorts.update((specialty, lvl) for lvl in levels)
+            cohorts.add((specialty, ALL_LEVELS))
+        return cohorts
+
+    def _all_cohorts(self) -> Set[Cohort]:
+        cohorts: Set[Cohort] = set()
+        for specialty, levels in self._levels.items():
+            cohorts.update((specialty, level) for level in levels | {None, ALL_LEVELS})
+        return cohorts
+
+    def _put_course(self, course: Dict[str, Any]):
+        course = {key: course.get(key) for key in ('id', 'name', 'code', 'lecturer_id', 'specialties', 'target_level')}
+        self._courses[course['id']] = course
+        for specialty in course['specialties'] or ():
+            self._levels.setdefault(specialty, set()).add(course['target_level'])
+            self._members.setdefault((specialty, course['target_level']), set()).add(course['id'])
+
+    def _drop_course(self, course_id: str):
+        course = self._courses.pop(course_id, None)
+        if course is None:
+            return
+        for specialty in course['specialties'] or ():
+            self._members.get((specialty, course['target_level']), set()).discard(course_id)
+
+    def _put_schedule(self, row: Dict[str, Any]):
+        row = _plain_row({k: v for k, v in row.items() if k not in ('courses', 'lecturers')})
+        self._schedules[row['id']] = row
+        self._by_course.setdefault(row['course_id'], set()).add(row['id'])
+
+    def _course_ids(self, cohort: Cohort) -> Set[str]:
+        specialty, level = cohort
+        if level == ALL_LEVELS:
+            ids: Set[str] = set()
+            for lvl in self._levels.get(specialty, ()):
+                ids |= self._members.get((specialty, lvl), set())
+            return ids
+        return self._members.get((specialty, level), set()) | self._members.get((specialty, None), set())
+
+    def _rebuild(self, cohort: Cohort):
+        rows = []
+        for course_id in self._course_ids(cohort):
+            course = self._courses[course_id]
+            embed = {'name': course['name'], 'code': course['code'], 'lecturer_id': course['lecturer_id']}
+            rows.extend({**self._schedules[sid], 'courses': embed} for sid in self._by_course.get(course_id, ()))
+        if not rows:
+            self._blobs.pop(cohort, None)
+            return
+        rows.sort(key=_sort_key)
+        blob = json.dumps(rows, separators=(",", ":"), default=str).encode()
+        self._blobs[cohort] = (hashlib.sha256(blob).hexdigest()[:32], blob)
+        self.rebuilds += 1
+
+    def _rebuild_all(self, cohorts: Iterable[Cohort]):
+        # Deferred to the next read, so a bulk write rebuilds each cohort once
+        self._dirty.update(cohorts)
+
+    def _entry(self, cohort: Cohort) -> Optional[Tuple[str, bytes]]:
+        if cohort in self._dirty:
+            self._dirty.discard(cohort)
+            self._rebuild(cohort)
+        return self._blobs.get(cohort)
+
+    def course_changed(self, course: Dict[str, Any]):
+        """Record a created or updated course (needs the COURSE_COLUMNS fields)"""
+        if self._pending is not None:
+            self._pending.append(('course_changed', course))
+        if self._loaded_at is None:
+            return
+        old = self._courses.get(course['id'])
+        affected = self._cohorts_of(old) if old else set()
+        self._drop_course(course['id'])
+        self._put_course(course)
+        self._rebuild_all(affected | self._cohorts_of(course))
+
+    def schedule_changed(self, row: Dict[str, Any]):
+        """Record a created or updated schedule row"""
+        if self._pending is not None:
+            self._pending.append(('schedule_changed', row))
+        if self._loaded_at is None:
+            return
+        old = self._schedules.get(row['id'])
+        if old is not None:
+            self._by_course.get(old['course_id'], set()).discard(row['id'])
+        self._put_schedule(row)
+        affected: Set[Cohort] = set()
+        for course_id in {row['course_id'], old['course_id'] if old else None} - {None}:
+            if course_id in self._courses:
+                affected |= self._cohorts_of(self._courses[course_id])
+        self._rebuild_all(affected)
+
+    def schedule_removed(self, schedule_id: str):
+        if self._pending is not None:
+            self._pending.append(('schedule_removed', schedule_id))
+        old = self._schedules.pop(schedule_id, None)
+        if old is None:
+            return
+        self._by_course.get(old['course_id'], set()).discard(schedule_id)
+        if old['course_id'] in self._courses:
+            self._rebuild_all(self._cohorts_of(self._courses[old['course_id']]))
+
+    def _cohort_for(self, specialty: str, level: Optional[str]) -> Cohort:
+        if level is None:
+            return (specialty, ALL_LEVELS)
+        # A level no course targets yet only sees the courses open to every level
+        return (specialty, level) if level in self._levels.get(specialty, ()) else (specialty, None)
+
+    def digest(self, specialty: Optional[str], level: Optional[str]) -> str:
+        """Content digest of the cohort's timetable, for ETags"""
+        if not specialty:
+            return ""
+        entry = self._entry(self._cohort_for(specialty, level))
+        return entry[0] if entry else ""
+
+    def timetable(self, specialty: Optional[str], level: Optional[str]) -> List[Dict[str, Any]]:
+        """The cohort's schedule rows (course embedded) in (day, start_time, id) order"""
+        self.lookups += 1
+        if not specialty:
+            return []
+        entry = self._entry(self._cohort_for(specialty, level))
+        return json.loads(entry[1]) if entry else []
+
+    def course_ids(self, specialty: Optional[str], level: Optional[str]) -> List[str]:
+        if not specialty:
+            return []
+        return sorted(self._course_ids(self._cohort_for(specialty, level)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cohorts": len(self._blobs),
+            "schedules": len(self._schedules),
+            "bytes": sum(len(blob) for _, blob in self._blobs.values()),
+            "loads": self.loads,
+            "rebuilds": self.rebuilds,
+            "lookups": self.lookups,
+            "age_seconds": None if self._loaded_at is None else round(time.monotonic() - self._loaded_at, 1)
+        }
+
+cohort_timetables = CohortTimetableStore(ttl=settings.cohort_timetable_ttl_seconds)
@@ -0,0 +1,133 @@
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from app.cache import TTLCache
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class CourseCache:
+    """Read-through cache for course detail and course list responses.
+
+    Entries are keyed by ``(catalog version, *key)``. Any course or schedule
+    write bumps the version, which orphans every cached detail and page at
+    once; course data changes rarely, so this is cheaper than tracking which
+    pages contain which course. With a Redis URL the version counter and the
+    serialized entries are shared, so a write on one worker is seen by all.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, redis_url: Optional[str] = None, prefix: str = "coumano:courses"):
+        self.local = TTLCache(maxsize, ttl)
+        self.ttl = ttl
+        self.prefix = prefix
+        self._version = 0
+        # Local versions restart at 0 with the process; the epoch keeps them unique
+        self._epoch = uuid.uuid4().hex[:8]
+        self._seen_version: Optional[str] = None
+        self._redis = None
+        if redis_url:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(redis_url)
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+        self.invalidations = 0
+
+    async def version(self) -> str:
+        """Current catalog version, shared through Redis when configured"""
+        version = f"l{self._epoch}.{self._version}"
+        if self._redis is not None:
+            try:
+                value = await self._redis.get(f"{self.prefix}:version")
+                version = f"r{int(value or 0)}"
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Course cache version lookup failed: {e}")
+
+        if version != self._seen_version:
+            # Entries under an older version can never be read again
+            if self._seen_version is not None:
+                self.local.clear()
+            self._seen_version = version
+        return version
+
+    async def fingerprint(self, version: Optional[str] = None) -> str:
+        """Version plus TTL window, so an ETag cannot outlive the entries it describes"""
+        return f"{version or await self.version()}:{int(time.time() // self.ttl)}"
+
+    def _shared_key(self, key: Tuple[Hashable, ...]) -> str:
+        return f"{self.prefix}:" + "|".join(str(part) for part in key)
+
+    async def get_or_load(self, key: Tuple[Hashable, ...], loader: Callable[[], Awaitable[Any]], adapter: TypeAdapter,
+                          version: Optional[str] = None) -> Any:
+        """Return the cached value for key, calling loader on a miss.
+
+        ``version`` pins the read to a version the caller already holds.
+        """
+        full_key = (version or await self.version(),) + key
+        value = self.local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(self._shared_key(full_key))
+                if raw is not None:
+                    self.shared_hits += 1
+                    value = adapter.validate_json(raw)
+                    self.local.set(full_key, value)
+                    return value
+                self.shared_misses += 1
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Course cache read failed: {e}")
+
+        value = await loader()
+        self.local.set(full_key, value)
+        if self._redis is not None:
+            try:
+                await self._redis.set(self._shared_key(full_key), adapter.dump_json(value), ex=int(self.ttl))
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Course cache write failed: {e}")
+        return value
+
+    async def invalidate(self):
+        """Drop every cached course and page after a catalog write"""
+        self.invalidations += 1
+        self._version += 1
+        self.local.clear()
+        if self._redis is not None:
+            try:
+                await self._redis.incr(f"{self.prefix}:version")
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Course cache invalidation failed: {e}")
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.local.stats(),
+            "backend": "redis" if self._redis is not None else "local",
+            "version": self._seen_version,
+            "invalidations": self.invalidations,
+            "shared_hits": self.shared_hits,
+            "shared_misses": self.shared_misses,
+            "shared_errors": self.shared_errors
+        }
+
+course_cache = CourseCache(
+    maxsize=settings.course_cache_size,
+    ttl=settings.course_cache_ttl_seconds,
+    redis_url=settings.redis_url if settings.course_cache_backend == "redis" else None
+)
@@ -1,22 +1,120 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime, time, timedelta
-from fastapi import HTTPException, status, UploadFile
-from app.database import get_database
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+from datetime import date, datetime, time, timedelta
+from fastapi import HTTPException, status
+from app.config import settings
+from app.database import get_database, returning
+from app.dataloader import load_row, invalidate_row
+from app.etag import row_versions
+from app.ics import CALENDAR_FOOTER, WEEKDAYS, calendar_header, schedule_event
+from app.pagination import SCHEDULE_SORT, apply_page, next_cursor, page_rows
+from app.tracing import traced
+from app.services.course_cache import course_cache
+from app.services.cohort_timetables import cohort_timetables
+from app.services.schedule_index import from_seconds, overlapping_pairs, schedule_index, to_seconds
+from app.services.room_directory import room_directory, room_pairs
 from app.models.course_schedule import (
     CourseScheduleCreate, CourseScheduleUpdate, CourseScheduleResponse,
     ScheduleConflictCheck, ScheduleConflict, RoomAvailability,
-    ScheduleOptimizationRequest, ScheduleStats, OptimalScheduleSuggestion
+    ScheduleOptimizationRequest, ScheduleStats, OptimalScheduleSuggestion,
+    BulkScheduleMode, BulkScheduleResult, BulkScheduleRowResult, BulkRowStatus
 )
 from app.models.user import UserResponse
+import asyncio
 import uuid
 import csv
 import io
+import tempfile
 import pandas as pd
 
+SCHEDULE_SELECT = '*, courses:course_id(name, code, lecturer_id), lecturers:courses(lecturer_id)'
+# Just enough of a page to tell whether it changed, for ETags; aliased so it
+# can be added to SCHEDULE_SELECT without clashing with its embeds
+SCHEDULE_VERSION_SELECT = 'id, updated_at, course_version:course_id(updated_at)'
+SCHEDULE_VERSION_EMBEDS = ('course_version',)
+# Added by _schedules_query to filter by lecturer
+LECTURER_FILTER_EMBED = 'lecturer_filter:course_id!inner(lecturer_id)'
+# Aliases of SCHEDULE_SELECT's embeds, stripped before rows go into the schedule index
+SCHEDULE_EMBEDS = ('courses', 'lecturers')
+EXPORT_COLUMNS = ('Course Code', 'Course Name', 'Day', 'Start Time', 'End Time', 'Room', 'Building', 'Type', 'Status', 'Notes')
+
 class CourseScheduleService:
     def __init__(self):
         self.db = get_database()
     
+    def _schedule_response(self, schedule_data: Dict[str, Any]) -> CourseScheduleResponse:
+        """Build a CourseScheduleResponse from a schedule row with its course embedded"""
+        course = schedule_data.get('courses') or {}
+        return CourseScheduleResponse(
+            id=schedule_data['id'],
+            course_id=schedule_data['course_id'],
+            day=schedule_data['day'],
+            start_time=schedule_data['start_time'],
+            end_time=schedule_data['end_time'],
+            room=schedule_data['room'],
+            building=schedule_data.get('building'),
+            type=schedule_data['type'],
+            capacity=schedule_data.get('capacity'),
+            notes=schedule_data.get('notes'),
+            status=schedule_data.get('status', 'scheduled'),
+            lecturer_id=course.get('lecturer_id', ''),
+            lecturer_name=schedule_data.get('lecturer_name'),
+            course_name=course.get('name'),
+            course_code=course.get('code'),
+            enrolled_count=schedule_data.get('enrolled_count', 0),
+            is_recurring=schedule_data.get('is_recurring', False),
+            recurrence_pattern=schedule_data.get('recurrence_pattern'),
+            created_at=schedule_data['created_at'],
+            updated_at=schedule_data['updated_at']
+        )
+    
+    def _indexed_response(self, schedule_data: Dict[str, Any]) -> CourseScheduleResponse:
+        """Index a written row and build its response from the representation the write returned"""
+        row = {k: v for k, v in schedule_data.items() if k not in SCHEDULE_EMBEDS}
+        schedule_index.add(row)
+        cohort_timetables.schedule_changed(row)
+        return self._schedule_response(schedule_data)
+    
+    async def _written_schedule(self, schedule_data: Dict[str, Any]) -> CourseScheduleResponse:
+        """Response for the representation a write returned, without reading it back"""
+        if not schedule_data.get('courses') and schedule_data.get('course_id'):
+            # Embed missing (e.g. hidden by RLS): use the request's row cache
+            schedule_data['courses'] = await load_row(
+                self.db.supabase, 'courses', schedule_data['course_id'], 'id, name, code, lecturer_id'
+            )
+        return self._indexed_response(schedule_data)
+    
+    async def _fill_course_embeds(self, rows: List[Dict[str, Any]]):
+        """Load the course embeds a bulk write did not return, in one query"""
+        missing = sorted({row['course_id'] for row in rows if not row.get('courses') and row.get('course_id')})
+        if not missing:
+            return
+        result = await self.db.supabase.table('courses').select('id, name, code, lecturer_id').in_('id', missing).execute()
+        courses = {course['id']: course for course in result.data}
+        for row in rows:
+            if not row.get('courses'):
+                row['courses'] = courses.get(row.get('course_id'))
+    
+    def _schedule_row(self, schedule_data: CourseScheduleCreate, created_by: str) -> Dict[str, Any]:
+        """Row to insert for a new schedule"""
+        return {
+            'id': str(uuid.uuid4()),
+            'course_id': schedule_data.course_id,
+            'day': schedule_data.day,
+            'start_time': schedule_data.start_time.isoformat(),
+            'end_time': schedule_data.end_time.isoformat(),
+            'room': schedule_data.room,
+            'building': schedule_data.building,
+            'type': schedule_data.type,
+            'capacity': schedule_data.capacity,
+            'notes': schedule_data.notes,
+            'status': 'scheduled',
+            'is_recurring': schedule_data.is_recurring,
+            'recurrence_pattern': schedule_data.recurrence_pattern,
+            'created_by': created_by,
+            'created_at': datetime.utcnow().isoformat(),
+            'updated_at': datetime.utcnow().isoformat()
+        }
+    
     async def create_schedule(self, schedule_data: CourseScheduleCreate, created_by: str) -> CourseScheduleResponse:
         """Create a new course schedule"""
         try:
@@ -27,39 +125,28 @@ class CourseScheduleService:
                 start_time=schedule_data.start_time,
                 end_time=schedule_data.end_time,
                 room=schedule_data.room,
-                building=schedule_data.building
+                building=schedule_data.building,
+                capacity=schedule_data.capacity
             )
             
+            # Other workers' writes since the index's last load count too
+            await schedule_index.refresh(self.db.supabase, [(schedule_data.room, schedule_data.day)])
             conflicts = await self.check_conflicts(conflict_check)
             if conflicts and len(conflicts) > 0:
                 # Log conflicts but allow creation (can be overridden)
                 print(f"Warning: Creating schedule with {len(conflicts)} conflicts")
             
-            schedule_dict = {
-                'id': str(uuid.uuid4()),
-                'course_id': schedule_data.course_id,
-                'day': schedule_data.day,
-                'start_time': schedule_data.start_time.isoformat(),
-                'end_time': schedule_data.end_time.isoformat(),
-                'room': schedule_data.room,
-                'building': schedule_data.building,
-                'type': schedule_data.type,
-                'capacity': schedule_data.capacity,
-                'notes': schedule_data.notes,
-                'status': 'scheduled',
-                'is_recurring': schedule_data.is_recurring,
-                'recurrence_pattern': schedule_data.recurrence_pattern,
-                'created_by': created_by,
-                'created_at': datetime.utcnow().isoformat(),
-                'updated_at': datetime.utcnow().isoformat()
-            }
+            schedule_dict = self._schedule_row(schedule_data, created_by)
             
-            result = self.db.supabase.table('course_schedules').insert(schedule_dict).execute()
+            result = await returning(
+                self.db.supabase.table('course_schedules').insert(schedule_dict), SCHEDULE_SELECT
+            ).execute()
             
             if not result.data:
                 raise HTTPException(status_code=500, detail="Failed to create schedule")
             
-            return await self.get_schedule(result.data[0]['id'])
+            await course_cache.invalidate()
+            return await self._written_schedule(result.data[0])
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error creating schedule: {str(e)}")
@@ -67,113 +154,113 @@ class CourseScheduleService:
     async def get_schedule(self, schedule_id: str) -> CourseScheduleResponse:
         """Get schedule by ID with related data"""
         try:
-            result = self.db.supabase.table('course_schedules').select('''
-                *,
-                courses:course_id(name, code, lecturer_id),
-                lecturers:courses(lecturer_id)
-            ''').eq('id', schedule_id).execute()
+            schedule_data = await traced('schedule', load_row(self.db.supabase, 'course_schedules', schedule_id, SCHEDULE_SELECT))
             
-            if not result.data:
+            if not schedule_data:
                 raise HTTPException(status_code=404, detail="Schedule not found")
             
-            schedule_data = result.data[0]
-            
-            return CourseScheduleResponse(
-                id=schedule_data['id'],
-                course_id=schedule_data['course_id'],
-                day=schedule_data['day'],
-                start_time=schedule_data['start_time'],
-                end_time=schedule_data['end_time'],
-                room=schedule_data['room'],
-                building=schedule_data.get('building'),
-                type=schedule_data['type'],
-                capacity=schedule_data.get('capacity'),
-                notes=schedule_data.get('notes'),
-                status=schedule_data.get('status', 'scheduled'),
-                lecturer_id=schedule_data.get('courses', {}).get('lecturer_id', ''),
-                lecturer_name=schedule_data.get('lecturer_name'),
-                course_name=schedule_data.get('courses', {}).get('name'),
-                course_code=schedule_data.get('courses', {}).get('code'),
-                enrolled_count=schedule_data.get('enrolled_count', 0),
-                is_recurring=schedule_data.get('is_recurring', False),
-                recurrence_pattern=schedule_data.get('recurrence_pattern'),
-                created_at=schedule_data['created_at'],
-                updated_at=schedule_data['updated_at']
-            )
+            return self._schedule_response(schedule_data)
             
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching schedule: {str(e)}")
     
+    def _schedules_query(self, user: UserResponse, filters: Dict[str, Any], select: str):
+        """Filtered, paginated schedule query shared by get_schedules, its ETag probe and the export"""
+        lecturer_ids = [user.id] if user.role == "lecturer" else []
+        if filters.get('lecturer_id'):
+            lecturer_ids.append(filters['lecturer_id'])
+        if lecturer_ids:
+            # A filter on a plain embed only nulls the embed; an !inner one drops the row
+            select = f"{select}, {LECTURER_FILTER_EMBED}"
+        query = self.db.supabase.table('course_schedules').select(select)
+        
+        # Apply role-based filtering; lecturers see only their schedules
+        for lecturer_id in lecturer_ids:
+            query = query.eq('lecturer_filter.lecturer_id', lecturer_id)
+        if user.role == "student":
+            # Students see their cohort's courses; get_schedules serves them from memory
+            query = query.in_('course_id', filters.get('course_ids') or [])
+        
+        # Apply filters
+        if filters.get('course_id'):
+            query = query.eq('course_id', filters['course_id'])
+        if filters.get('day'):
+            query = query.eq('day', filters['day'])
+        if filters.get('days'):
+            query = query.in_('day', filters['days'])
+        if filters.get('room'):
+            query = query.eq('room', filters['room'])
+        if filters.get('building'):
+            query = query.eq('building', filters['building'])
+        if filters.get('type'):
+            query = query.eq('type', filters['type'])
+        if filters.get('status'):
+            query = query.eq('status', filters['status'])
+        
+        # Apply pagination, by (day, start_time, id) keyset when a cursor is given
+        limit = filters.get('limit', 50)
+        offset = filters.get('offset', 0)
+        return apply_page(query, SCHEDULE_SORT, limit, offset, filters.get('cursor'))
+    
+    def _cohort_schedules(self, user: UserResponse, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """A student's page of get_schedules, filtered and paged from the cohort timetable"""
+        rows = cohort_timetables.timetable(user.specialty, user.level)
+        matches = {
+            key: filters[key] for key in ('course_id', 'day', 'room', 'building', 'type', 'status')
+            if filters.get(key)
+        }
+        lecturer_id = filters.get('lecturer_id')
+        if matches or lecturer_id:
+            rows = [
+                row for row in rows
+                if all(row.get(key) == value for key, value in matches.items())
+                and (not lecturer_id or row['courses'].get('lecturer_id') == lecturer_id)
+            ]
+        return page_rows(rows, SCHEDULE_SORT, filters.get('limit', 50), filters.get('offset', 0), filters.get('cursor'))
+    
+    async def schedule_versions(self, user: UserResponse, filters: Dict[str, Any]) -> List[Any]:
+        """Fingerprint of the page get_schedules would return, from ids and timestamps only"""
+        try:
+            if user.role == "student":
+                # The cohort digest covers every page of the timetable; the URL tells pages apart
+                await cohort_timetables.ensure_loaded(self.db.supabase)
+                return [cohort_timetables.digest(user.specialty, user.level)]
+            
+            result = await self._schedules_query(user, filters, SCHEDULE_VERSION_SELECT).execute()
+            return row_versions(result.data, SCHEDULE_VERSION_EMBEDS)
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching schedules: {str(e)}")
+    
     async def get_schedules(self, user: UserResponse, filters: Dict[str, Any]) -> List[CourseScheduleResponse]:
         """Get schedules with filters based on user role"""
+        _, schedules = await self.schedule_page(user, filters)
+        return schedules
+    
+    async def schedule_page(self, user: UserResponse, filters: Dict[str, Any]) -> Tuple[List[Any], List[CourseScheduleResponse]]:
+        """A page of get_schedules with the schedule_versions fingerprint of the same rows"""
         try:
-            query = self.db.supabase.table('course_schedules').select('''
-                *,
-                courses:course_id(name, code, lecturer_id),
-                lecturers:courses(lecturer_id)
-            ''')
-            
-            # Apply role-based filtering
-            if user.role == "lecturer":
-                # Lecturers see only their schedules
-                query = query.eq('courses.lecturer_id', user.id)
-            elif user.role == "student":
-                # Students see schedules for their courses
-                # This would need to be implemented based on enrollment
-                pass
-            
-            # Apply filters
-            if filters.get('course_id'):
-                query = query.eq('course_id', filters['course_id'])
-            if filters.get('lecturer_id'):
-                query = query.eq('courses.lecturer_id', filters['lecturer_id'])
-            if filters.get('day'):
-                query = query.eq('day', filters['day'])
-            if filters.get('room'):
-                query = query.eq('room', filters['room'])
-            if filters.get('building'):
-                query = query.eq('building', filters['building'])
-            if filters.get('type'):
-                query = query.eq('type', filters['type'])
-            if filters.get('status'):
-                query = query.eq('status', filters['status'])
-            
-            # Apply pagination
-            limit = filters.get('limit', 50)
-            offset = filters.get('offset', 0)
-            query = query.range(offset, offset + limit - 1)
-            query = query.order('day, start_time')
-            
-            result = query.execute()
+            if user.role == "student":
+                await cohort_timetables.ensure_loaded(self.db.supabase)
+                version = [cohort_timetables.digest(user.specialty, user.level)]
+                rows = self._cohort_schedules(user, filters)
+            else:
+                select = f"{SCHEDULE_SELECT}, {SCHEDULE_VERSION_SELECT}"
+                rows = (await self._schedules_query(user, filters, select).execute()).data
+                version = row_versions(rows, SCHEDULE_VERSION_EMBEDS)
             
             schedules = []
-            for schedule_data in result.data:
-                schedules.append(CourseScheduleResponse(
-                    id=schedule_data['id'],
-                    course_id=schedule_data['course_id'],
-                    day=schedule_data['day'],
-                    start_time=schedule_data['start_time'],
-                    end_time=schedule_data['end_time'],
-                    room=schedule_data['room'],
-                    building=schedule_data.get('building'),
-                    type=schedule_data['type'],
-                    capacity=schedule_data.get('capacity'),
-                    notes=schedule_data.get('notes'),
-                    status=schedule_data.get('status', 'scheduled'),
-                    lecturer_id=schedule_data.get('courses', {}).get('lecturer_id', ''),
-                    course_name=schedule_data.get('courses', {}).get('name'),
-                    course_code=schedule_data.get('courses', {}).get('code'),
-                    enrolled_count=schedule_data.get('enrolled_count', 0),
-                    is_recurring=schedule_data.get('is_recurring', False),
-                    recurrence_pattern=schedule_data.get('recurrence_pattern'),
-                    created_at=schedule_data['created_at'],
-                    updated_at=schedule_data['updated_at']
-                ))
-            
-            return schedules
+            for schedule_data in rows:
+                schedules.append(self._schedule_response(schedule_data))
             
+            return version, schedules
+            
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching schedules: {str(e)}")
     
@@ -207,8 +294,8 @@ class CourseScheduleService:
             if schedule_data.notes is not None:
                 update_data['notes'] = schedule_data.notes
             
-            # Check for conflicts if time/room changed
-            if any(key in update_data for key in ['day', 'start_time', 'end_time', 'room']):
+            # Check for conflicts if time/room/attendance changed
+            if any(key in update_data for key in ['day', 'start_time', 'end_time', 'room', 'building', 'capacity']):
                 conflict_check = ScheduleConflictCheck(
                     course_id=existing.course_id,
                     day=schedule_data.day or existing.day,
@@ -216,20 +303,26 @@ class CourseScheduleService:
                     end_time=schedule_data.end_time or existing.end_time,
                     room=schedule_data.room or existing.room,
                     building=schedule_data.building or existing.building,
+                    capacity=schedule_data.capacity or existing.capacity,
                     exclude_id=schedule_id
                 )
                 
+                await schedule_index.refresh(self.db.supabase, [(conflict_check.room, conflict_check.day)])
                 conflicts = await self.check_conflicts(conflict_check)
                 if conflicts and len(conflicts) > 0:
                     print(f"Warning: Updating schedule with {len(conflicts)} conflicts")
             
             # Update schedule
-            result = self.db.supabase.table('course_schedules').update(update_data).eq('id', schedule_id).execute()
+            result = await returning(
+                self.db.supabase.table('course_schedules').update(update_data), SCHEDULE_SELECT
+            ).eq('id', schedule_id).execute()
             
             if not result.data:
                 raise HTTPException(status_code=500, detail="Failed to update schedule")
             
-            return await self.get_schedule(schedule_id)
+            invalidate_row('course_schedules', schedule_id)
+            await course_cache.invalidate()
+            return await self._written_schedule(result.data[0])
             
         except HTTPException:
             raise
@@ -239,11 +332,15 @@ class CourseScheduleService:
     async def delete_schedule(self, schedule_id: str) -> Dict[str, str]:
         """Delete a course schedule"""
         try:
-            result = self.db.supabase.table('course_schedules').delete().eq('id', schedule_id).execute()
+            result = await self.db.supabase.table('course_schedules').delete().eq('id', schedule_id).execute()
             
             if not result.data:
                 raise HTTPException(status_code=404, detail="Schedule not found")
             
+            invalidate_row('course_schedules', schedule_id)
+            schedule_index.remove(schedule_id)
+            cohort_timetables.schedule_removed(schedule_id)
+            await course_cache.invalidate()
             return {"message": "Schedule deleted successfully"}
             
         except HTTPException:
@@ -256,98 +353,160 @@ class CourseScheduleService:
         try:
             conflicts = []
             
-            # Check room conflicts
-            room_query = self.db.supabase.table('course_schedules').select('*').eq('day', conflict_check.day).eq('room', conflict_check.room)
-            
-            if conflict_check.exclude_id:
-                room_query = room_query.neq('id', conflict_check.exclude_id)
-            
-            room_result = room_query.execute()
+            # Check room conflicts against the in-memory occupancy index
+            await schedule_index.ensure_loaded(self.db.supabase)
+            overlapping = schedule_index.overlapping(
+                conflict_check.room, conflict_check.day, conflict_check.start_time, conflict_check.end_time,
+                building=conflict_check.building, exclude_id=conflict_check.exclude_id
+            )
             
-            for existing_schedule in room_result.data:
-                existing_start = datetime.strptime(existing_schedule['start_time'], '%H:%M:%S').time()
-                existing_end = datetime.strptime(existing_schedule['end_time'], '%H:%M:%S').time()
-                
-                # Check for time overlap
-                if (conflict_check.start_time < existing_end and conflict_check.end_time > existing_start):
-                    conflicts.append({
-                        "type": "room",
-                        "severity": "high",
-                        "conflicting_schedules": [existing_schedule],
-                        "suggested_solutions": [
-                            {
-                                "id": str(uuid.uuid4()),
-                                "type": "change_room",
-                                "description": "Move to available room",
-                                "impact": "low"
-                            },
-                            {
-                                "id": str(uuid.uuid4()),
-                                "type": "change_time",
-                                "description": "Reschedule to avoid conflict",
-                                "impact": "medium"
-                            }
-                        ]
-                    })
+            # Check the room seats the expected attendance, against the in-memory room directory
+            await room_directory.ensure_loaded(self.db.supabase)
+            room = room_directory.lookup(conflict_check.room, conflict_check.building)
+            too_small = bool(conflict_check.capacity and room and room.get('capacity') and room['capacity'] < conflict_check.capacity)
+            
+            # Another time in a room that is too small fixes nothing, so only other rooms are offered then
+            solutions = self._suggest_solutions(conflict_check, room, change_time=not too_small) if overlapping or too_small else []
+            for existing_schedule in overlapping:
+                conflicts.append({
+                    "type": "room",
+                    "severity": "high",
+                    "conflicting_schedules": [existing_schedule],
+                    "suggested_solutions": solutions
+                })
+            if too_small:
+                conflicts.append({
+                    "type": "capacity",
+                    "severity": "medium",
+                    "conflicting_schedules": [],
+                    "suggested_solutions": solutions
+                })
             
             return conflicts
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error checking conflicts: {str(e)}")
     
+    def _candidate_rooms(self, building: Optional[str] = None, room_type: Optional[str] = None,
+                         min_capacity: Optional[int] = None, equipment: Optional[List[str]] = None) -> List[Tuple[str, Optional[str]]]:
+        """Rooms from the room directory matching the filters, smallest first.
+        
+        Until the directory has any rooms, every room known from schedules (unfiltered).
+        """
+        if len(room_directory) or room_type or min_capacity or equipment:
+            return room_pairs(room_directory.find(building, room_type, min_capacity, equipment or ()))
+        return schedule_index.rooms(building)
+    
+    def _suggest_solutions(self, conflict_check: ScheduleConflictCheck, room: Optional[Dict[str, Any]],
+                           change_time: bool = True) -> List[Dict[str, Any]]:
+        """Free rooms of the same type that seat the class (same building first) and the room's nearest free slot"""
+        start, end = conflict_check.start_time, conflict_check.end_time
+        rooms = self._candidate_rooms(
+            room_type=room['type'] if room else None,
+            min_capacity=conflict_check.capacity or (room.get('capacity') if room else None)
+        )
+        if conflict_check.building:
+            rooms.sort(key=lambda pair: pair[1] != conflict_check.building)
+        rooms = [pair for pair in rooms if pair[0] != conflict_check.room]
+        
+        solutions = []
+        for room_name, building in schedule_index.free_rooms(conflict_check.day, start, end, rooms=rooms, exclude_id=conflict_check.exclude_id)[:settings.schedule_suggestion_count]:
+            solutions.append({
+                "id": str(uuid.uuid4()),
+                "type": "change_room",
+                "description": f"Move to {room_name}" + (f" ({building})" if building else ""),
+                "new_room": room_name,
+                "new_start_time": start.isoformat(),
+                "new_end_time": end.isoformat(),
+                "impact": "low"
+            })
+        
+        if not change_time:
+            return solutions
+        
+        slot = schedule_index.nearest_free(
+            conflict_check.room, conflict_check.day, to_seconds(end) - to_seconds(start), start,
+            settings.schedule_day_start, settings.schedule_day_end,
+            building=conflict_check.building, exclude_id=conflict_check.exclude_id
+        )
+        if slot is not None:
+            new_start, new_end = from_seconds(slot[0]), from_seconds(slot[1])
+            solutions.append({
+                "id": str(uuid.uuid4()),
+                "type": "change_time",
+                "description": f"Move to {new_start.strftime('%H:%M')}-{new_end.strftime('%H:%M')} in {conflict_check.room}",
+                "new_room": conflict_check.room,
+                "new_start_time": new_start.isoformat(),
+                "new_end_time": new_end.isoformat(),
+                "impact": "medium"
+            })
+        return solutions
+    
     async def check_room_availability(self, room: str, building: Optional[str], day: str, start_time: str, end_time: str) -> RoomAvailability:
         """Check if a room is available for a specific time slot"""
         try:
-            query = self.db.supabase.table('course_schedules').select('*').eq('room', room).eq('day', day)
-            
-            if building:
-                query = query.eq('building', building)
-            
-            result = query.execute()
-            
-            conflicting_schedules = []
-            start_dt = datetime.strptime(start_time, '%H:%M').time()
-            end_dt = datetime.strptime(end_time, '%H:%M').time()
-            
-            for schedule in result.data:
-                existing_start = datetime.strptime(schedule['start_time'], '%H:%M:%S').time()
-                existing_end = datetime.strptime(schedule['end_time'], '%H:%M:%S').time()
-                
-                if start_dt < existing_end and end_dt > existing_start:
-                    conflicting_schedules.append(schedule)
+            await schedule_index.ensure_loaded(self.db.supabase)
+            await room_directory.ensure_loaded(self.db.supabase)
+            conflicting_schedules = schedule_index.overlapping(room, day, start_time, end_time, building=building or None)
+            details = room_directory.lookup(room, building or None) or {}
             
             return RoomAvailability(
                 room=room,
                 building=building or "",
                 is_available=len(conflicting_schedules) == 0,
-                conflicting_schedules=conflicting_schedules
+                conflicting_schedules=conflicting_schedules,
+                type=details.get('type'),
+                capacity=details.get('capacity')
             )
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error checking room availability: {str(e)}")
     
-    async def get_available_rooms(self, day: str, start_time: str, end_time: str, building: Optional[str] = None) -> List[str]:
-        """Get list of available rooms for a time slot"""
+    async def get_available_rooms(self, day: str, start_time: str, end_time: str, building: Optional[str] = None,
+                                  room_type: Optional[str] = None, min_capacity: Optional[int] = None,
+                                  equipment: Optional[List[str]] = None) -> List[str]:
+        """Get list of available rooms for a time slot, smallest fitting room first"""
         try:
-            # This would check against a rooms table and existing schedules
-            all_rooms = ['Amphitheater A', 'Amphitheater B', 'Lab A-205', 'Lab B-205', 'Room C-301']
-            available_rooms = []
+            # Rooms filtered in memory by the directory, checked against their occupancy bitsets
+            await schedule_index.ensure_loaded(self.db.supabase)
+            await room_directory.ensure_loaded(self.db.supabase)
+            rooms = self._candidate_rooms(building, room_type, min_capacity, equipment)
+            free = schedule_index.free_rooms(day, start_time, end_time, rooms=rooms)
+            return list(dict.fromkeys(room for room, _ in free))
             
-            for room in all_rooms:
-                availability = await self.check_room_availability(room, building, day, start_time, end_time)
-                if availability.is_available:
-                    available_rooms.append(room)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting available rooms: {str(e)}")
+    
+    async def find_free_slot(self, room: str, building: Optional[str], day: str, duration_minutes: int,
+                             near: Optional[str] = None) -> Dict[str, Any]:
+        """Free slot of the given length in the room closest to ``near`` (default: start of day)"""
+        try:
+            await schedule_index.ensure_loaded(self.db.supabase)
+            slot = schedule_index.nearest_free(
+                room, day, duration_minutes * 60, near or settings.schedule_day_start,
+                settings.schedule_day_start, settings.schedule_day_end, building=building or None
+            )
+            if slot is None:
+                raise HTTPException(status_code=404, detail="No free slot of that length on this day")
             
-            return available_rooms
+            return {
+                "room": room,
+                "building": building,
+                "day": day,
+                "start_time": from_seconds(slot[0]).isoformat(),
+                "end_time": from_seconds(slot[1]).isoformat()
+            }
             
+        except HTTPException:
+            raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error getting available rooms: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error finding free slot: {str(e)}")
     
     async def get_schedule_stats(self, date_from: Optional[str] = None, date_to: Optional[str] = None) -> ScheduleStats:
         """Get schedule statistics"""
         try:
             # Get total schedules
-            total_result = self.db.supabase.table('course_schedules').select('id', count='exact').execute()
+            total_result = await self.db.supabase.table('course_schedules').select('id', count='exact').execute()
             total_schedules = total_result.count or 0
             
             # Get this week's schedules (simplified)
@@ -384,77 +543,192 @@ class CourseScheduleService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error getting schedule stats: {str(e)}")
     
-    async def bulk_create_schedules(self, schedules: List[CourseScheduleCreate], created_by: str) -> List[CourseScheduleResponse]:
-        """Create multiple schedules at once"""
+    async def validate_batch(self, schedules: List[CourseScheduleCreate]) -> Tuple[List[List[Dict[str, Any]]], List[List[int]]]:
+        """Room conflicts of every row in one pass: per row, the existing schedules and the other batch rows it overlaps.
+        
+        Rows are grouped by (room, day); each group is swept together with the
+        schedules already in that room and day, so the cost is O(n log n) for
+        the batch plus the rooms it touches, not a query per row. Rows in
+        different named buildings never conflict.
+        """
+        await schedule_index.ensure_loaded(self.db.supabase)
+        existing_conflicts: List[List[Dict[str, Any]]] = [[] for _ in schedules]
+        batch_conflicts: List[List[int]] = [[] for _ in schedules]
+        
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for i, schedule_data in enumerate(schedules):
+            groups.setdefault((schedule_data.room, schedule_data.day.value), []).append(i)
+        
+        for (room, day), indexes in groups.items():
+            intervals = [
+                (to_seconds(schedules[i].start_time), to_seconds(schedules[i].end_time), (i, schedules[i].building))
+                for i in indexes
+            ]
+            intervals += [
+                (to_seconds(row['start_time']), to_seconds(row['end_time']), (row, row.get('building')))
+                for row in schedule_index.room_day(room, day)
+            ]
+            for (a, a_building), (b, b_building) in overlapping_pairs(intervals):
+                if a_building and b_building and a_building != b_building:
+                    continue
+                if isinstance(a, int) and isinstance(b, int):
+                    batch_conflicts[a].append(b)
+                    batch_conflicts[b].append(a)
+                elif isinstance(a, int):
+                    existing_conflicts[a].append(b)
+                elif isinstance(b, int):
+                    existing_conflicts[b].append(a)
+        
+        return existing_conflicts, batch_conflicts
+    
+    async def bulk_create_schedules(self, schedules: List[CourseScheduleCreate], created_by: str,
+                                    mode: BulkScheduleMode = BulkScheduleMode.PARTIAL) -> BulkScheduleResult:
+        """Validate a batch of schedules together and insert the accepted rows in one statement"""
         try:
-            created_schedules = []
-            
-            for schedule_data in schedules:
-                schedule = await self.create_schedule(schedule_data, created_by)
-                created_schedules.append(schedule)
+            # Other workers' writes since the index's last load count too
+            await schedule_index.refresh(self.db.supabase, {(row.room, row.day) for row in schedules})
+            existing_conflicts, batch_conflicts = await self.validate_batch(schedules)
+            
+            # Earlier rows win: a row is rejected if it overlaps an existing
+            # schedule or an earlier row of the batch that was accepted
+            accepted: List[int] = []
+            taken = set()
+            results = []
+            for i in range(len(schedules)):
+                if existing_conflicts[i] or any(j in taken for j in batch_conflicts[i]):
+                    results.append(BulkScheduleRowResult(
+                        index=i,
+                        status=BulkRowStatus.CONFLICT,
+                        conflicts=existing_conflicts[i] + [{"batch_index": j} for j in sorted(batch_conflicts[i])]
+                    ))
+                else:
+                    accepted.append(i)
+                    taken.add(i)
+                    results.append(BulkScheduleRowResult(index=i, status=BulkRowStatus.CREATED))
+            
+            conflict_count = len(schedules) - len(accepted)
+            if conflict_count and mode == BulkScheduleMode.ALL_OR_NOTHING:
+                for i in accepted:
+                    results[i].status = BulkRowStatus.SKIPPED
+                accepted = []
+            
+            if accepted:
+                rows = [self._schedule_row(schedules[i], created_by) for i in accepted]
+                result = await returning(
+                    self.db.supabase.table('course_schedules').insert(rows), SCHEDULE_SELECT
+                ).execute()
+                
+                await self._fill_course_embeds(result.data)
+                created = {row['id']: row for row in result.data}
+                for i, row in zip(accepted, rows):
+                    results[i].schedule = self._indexed_response(created[row['id']])
+                
+                await course_cache.invalidate()
             
-            return created_schedules
+            return BulkScheduleResult(
+                mode=mode,
+                created_count=len(accepted),
+                conflict_count=conflict_count,
+                results=results
+            )
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error bulk creating schedules: {str(e)}")
     
-    async def export_schedules(self, filters: Dict[str, Any], format: str) -> bytes:
-        """Export schedules in various formats"""
-        try:
-            # This would implement actual export logic
-            # For now, return mock CSV data
-            csv_data = "Course,Day,Start Time,End Time,Room,Type\n"
-            csv_data += "CS301,Monday,08:00,10:00,Amphitheater A,Lecture\n"
-            csv_data += "CS205,Tuesday,14:00,16:00,Lab B-205,Practical\n"
-            
-            return csv_data.encode('utf-8')
-            
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error exporting schedules: {str(e)}")
+    def _export_values(self, row: Dict[str, Any]) -> List[Any]:
+        course = row.get('courses') or {}
+        return [
+            course.get('code'), course.get('name'), row.get('day'),
+            str(row.get('start_time'))[:5], str(row.get('end_time'))[:5],
+            row.get('room'), row.get('building'), row.get('type'), row.get('status'), row.get('notes')
+        ]
     
-    async def import_schedules(self, file: UploadFile, created_by: str) -> Dict[str, Any]:
-        """Import schedules from file"""
+    async def _export_pages(self, user: UserResponse, filters: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Every matching row, a keyset page at a time; the next page is fetched while the current one is written"""
+        page_size = settings.schedule_export_page_size
+        if user.role == "student":
+            await cohort_timetables.ensure_loaded(self.db.supabase)
+            filters = {**filters, 'course_ids': cohort_timetables.course_ids(user.specialty, user.level)}
+        
+        def fetch(cursor: Optional[str]):
+            page = {**filters, 'limit': page_size, 'offset': 0, 'cursor': cursor}
+            return asyncio.ensure_future(self._schedules_query(user, page, SCHEDULE_SELECT).execute())
+        
+        pending = fetch(None)
         try:
-            # Read file content
-            content = await file.read()
-            
-            # Parse CSV
-            csv_reader = csv.DictReader(io.StringIO(content.decode('utf-8')))
-            
-            created_count = 0
-            errors = []
-            
-            for row_num, row in enumerate(csv_reader, start=2):
-                try:
-                    # Create schedule from row data
-                    schedule_data = CourseScheduleCreate(
-                        course_id=row['course_id'],
-                        day=row['day'],
-                        start_time=datetime.strptime(row['start_time'], '%H:%M').time(),
-                        end_time=datetime.strptime(row['end_time'], '%H:%M').time(),
-                        room=row['room'],
-                        building=row.get('building'),
-                        type=row['type'],
-                        notes=row.get('notes')
-                    )
-                    
-                    await self.create_schedule(schedule_data, created_by)
-                    created_count += 1
-                    
-                except Exception as e:
-                    errors.append({
-                        "row": row_num,
-                        "error": str(e)
-                    })
-            
-            return {
-                "success": True,
-                "created_count": created_count,
-                "error_count": len(errors),
-                "errors": errors
-            }
-            
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error importing schedules: {str(e)}")
+            while pending is not None:
+                rows = (await pending).data
+                cursor = next_cursor(rows, page_size, SCHEDULE_SORT)
+                pending = fetch(cursor) if cursor else None
+                if rows:
+                    yield rows
+        finally:
+            if pending is not None:
+                pending.cancel()
+    
+    async def _export_csv(self, pages: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        # BOM first so Excel opens the file as UTF-8
+        yield buffer.getvalue().encode('utf-8-sig')
+        async for rows in pages:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(self._export_values(row) for row in rows)
+            yield buffer.getvalue().encode('utf-8')
+    
+    async def _export_ics(self, pages: AsyncIterator[List[Dict[str, Any]]],
+                          date_from: Optional[date], date_to: Optional[date]) -> AsyncIterator[bytes]:
+        yield calendar_header("COUMANO timetable").encode('utf-8')
+        async for rows in pages:
+            yield ''.join(schedule_event(row, date_from or date.today(), date_to) for row in rows).encode('utf-8')
+        yield CALENDAR_FOOTER.encode('utf-8')
+    
+    async def _export_xlsx(self, pages: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+        from openpyxl import Workbook
+        
+        # Write-only sheets keep rows on disk; the zip can only be sent once it is closed
+        loop = asyncio.get_running_loop()
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Schedules")
+        sheet.append(EXPORT_COLUMNS)
+        async for rows in pages:
+            values = [self._export_values(row) for row in rows]
+            await loop.run_in_executor(None, _append_rows, sheet, values)
+        
+        with tempfile.TemporaryFile() as spool:
+            await loop.run_in_executor(None, workbook.save, spool)
+            spool.seek(0)
+            while True:
+                chunk = await loop.run_in_executor(None, spool.read, 65536)
+                if not chunk:
+                    break
+                yield chunk
+    
+    def export_schedules(self, user: UserResponse, filters: Dict[str, Any], format: str) -> AsyncIterator[bytes]:
+        """Stream the schedules matching the filters as CSV, XLSX or ICS.
+        
+        Schedules repeat weekly, so a date range shorter than a week keeps
+        only the weekdays it covers; in ICS it bounds the recurrence.
+        """
+        date_from, date_to = filters.get('date_from'), filters.get('date_to')
+        if date_from and date_to and (date_to - date_from).days < 6:
+            filters = {**filters, 'days': list(dict.fromkeys(
+                WEEKDAYS[(date_from + timedelta(days=n)).weekday()] for n in range((date_to - date_from).days + 1)
+            ))}
+        
+        pages = self._export_pages(user, filters)
+        if format == 'excel':
+            return self._export_xlsx(pages)
+        if format == 'ics':
+            return self._export_ics(pages, date_from, date_to)
+        return self._export_csv(pages)
+
+def _append_rows(sheet, rows: List[List[Any]]):
+    for row in rows:
+        sheet.append(row)
 
 course_schedule_service = CourseScheduleService()
\ No newline at end of file
@@ -1,19 +1,92 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
 from datetime import datetime, time
 from fastapi import HTTPException, status
-from app.database import get_database
+from app.config import settings
+from app.database import get_database, returning
+from app.dataloader import load_row, invalidate_row
+from app.fieldsets import COURSE_FIELDS, USER_SUMMARY, Selection
+from app.pagination import COURSE_SORT, apply_page
+from app.tracing import fan_out, traced
+from app.services.course_cache import course_cache
+from app.services.cohort_timetables import cohort_timetables
+from app.services.schedule_index import schedule_index
+from app.services.room_directory import room_directory
+from app.services.course_schedule_service import course_schedule_service
 from app.models.course import (
     CourseCreate, CourseUpdate, CourseResponse,
     CourseScheduleCreate, CourseScheduleUpdate, CourseScheduleResponse,
     ScheduleConflict
 )
+from app.models.course_schedule import ScheduleConflictCheck
 from app.models.user import UserResponse
+from pydantic import TypeAdapter
 import uuid
 
+# Expansions loaded by separate batched queries under the "batched" strategy
+CHILD_EMBEDS = ('schedule', 'materials')
+
+COURSE_ADAPTER = TypeAdapter(CourseResponse)
+COURSE_LIST_ADAPTER = TypeAdapter(List[CourseResponse])
+SPARSE_ADAPTER = TypeAdapter(Dict[str, Any])
+SPARSE_LIST_ADAPTER = TypeAdapter(List[Dict[str, Any]])
+
 class CourseService:
     def __init__(self):
         self.db = get_database()
     
+    @property
+    def embed_children(self) -> bool:
+        return settings.course_children_strategy == "embedded"
+    
+    def _course_select(self, selection: Selection) -> str:
+        return selection.select(skip=() if self.embed_children else CHILD_EMBEDS)
+    
+    def _children_queries(self, course_ids: List[str], expand=CHILD_EMBEDS) -> Dict[str, Any]:
+        queries = {}
+        for name in CHILD_EMBEDS:
+            if name in expand:
+                table = COURSE_FIELDS.embeds[name].row_key
+                queries[name] = self.db.supabase.table(table).select('*').in_('course_id', course_ids).execute()
+        return queries
+    
+    async def _attach_children(self, courses: List[Dict[str, Any]], expand=CHILD_EMBEDS,
+                               results: Optional[Dict[str, Any]] = None):
+        """Load schedules and materials for a page of courses with one concurrent query each"""
+        if not courses or not set(expand) & set(CHILD_EMBEDS):
+            return
+        
+        if results is None:
+            results = await fan_out(**self._children_queries([course['id'] for course in courses], expand))
+        
+        by_course = {course['id']: course for course in courses}
+        for name in CHILD_EMBEDS:
+            if name not in results:
+                continue
+            row_key = COURSE_FIELDS.embeds[name].row_key
+            for course in courses:
+                course[row_key] = []
+            for row in results[name].data:
+                by_course[row['course_id']][row_key].append(row)
+    
+    def _course_response(self, course_data: Dict[str, Any]) -> CourseResponse:
+        """Build a CourseResponse from a course row with its children attached"""
+        return CourseResponse(
+            id=course_data['id'],
+            name=course_data['name'],
+            code=course_data['code'],
+            credits=course_data['credits'],
+            description=course_data.get('description'),
+            is_shared=course_data['is_shared'],
+            target_level=course_data.get('target_level'),
+            lecturer_id=course_data['lecturer_id'],
+            lecturer=course_data.get('lecturers'),
+            specialties=course_data.get('specialties', []),
+            schedule=[CourseScheduleResponse(**schedule) for schedule in course_data.get('course_schedules') or []],
+            materials=course_data.get('course_materials') or [],
+            created_at=course_data['created_at'],
+            updated_at=course_data['updated_at']
+        )
+    
     async def create_course(self, course_data: CourseCreate, created_by: str) -> CourseResponse:
         """Create a new course"""
         try:
@@ -32,53 +105,39 @@ class CourseService:
                 'updated_at': datetime.utcnow().isoformat()
             }
             
-            result = self.db.supabase.table('courses').insert(course_dict).execute()
+            # A new course has no schedules or materials yet, only the lecturer to embed
+            result = await returning(
+                self.db.supabase.table('courses').insert(course_dict),
+                COURSE_FIELDS.parse(expand='lecturer').select()
+            ).execute()
             
             if not result.data:
                 raise HTTPException(status_code=500, detail="Failed to create course")
             
-            return await self.get_course(result.data[0]['id'])
+            course_data = result.data[0]
+            if not course_data.get('lecturers') and course_data.get('lecturer_id'):
+                course_data['lecturers'] = await load_row(self.db.supabase, 'users', course_data['lecturer_id'], USER_SUMMARY)
+            
+            cohort_timetables.course_changed(course_data)
+            await course_cache.invalidate()
+            return self._course_response(course_data)
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error creating course: {str(e)}")
     
-    async def get_course(self, course_id: str) -> CourseResponse:
+    def _course_output(self, course_data: Dict[str, Any], selection: Selection) -> Union[CourseResponse, Dict[str, Any]]:
+        if selection.sparse:
+            return selection.shape(course_data)
+        return self._course_response(course_data)
+    
+    async def get_course(self, course_id: str, selection: Optional[Selection] = None) -> Union[CourseResponse, Dict[str, Any]]:
         """Get course by ID with related data"""
         try:
-            # Get course with lecturer data
-            result = self.db.supabase.table('courses').select('''
-                *,
-                lecturers:lecturer_id(*)
-            ''').eq('id', course_id).execute()
-            
-            if not result.data:
-                raise HTTPException(status_code=404, detail="Course not found")
-            
-            course_data = result.data[0]
-            
-            # Get schedules
-            schedule_result = self.db.supabase.table('course_schedules').select('*').eq('course_id', course_id).execute()
-            schedules = [CourseScheduleResponse(**schedule) for schedule in schedule_result.data]
-            
-            # Get materials
-            materials_result = self.db.supabase.table('course_materials').select('*').eq('course_id', course_id).execute()
-            materials = materials_result.data
-            
-            return CourseResponse(
-                id=course_data['id'],
-                name=course_data['name'],
-                code=course_data['code'],
-                credits=course_data['credits'],
-                description=course_data.get('description'),
-                is_shared=course_data['is_shared'],
-                target_level=course_data.get('target_level'),
-                lecturer_id=course_data['lecturer_id'],
-                lecturer=course_data.get('lecturers'),
-                specialties=course_data.get('specialties', []),
-                schedule=schedules,
-                materials=materials,
-                created_at=course_data['created_at'],
-                updated_at=course_data['updated_at']
+            selection = selection or COURSE_FIELDS.default()
+            return await course_cache.get_or_load(
+                ('course', course_id) + selection.key,
+                lambda: self._load_course(course_id, selection),
+                SPARSE_ADAPTER if selection.sparse else COURSE_ADAPTER
             )
             
         except HTTPException:
@@ -86,78 +145,110 @@ class CourseService:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching course: {str(e)}")
     
+    async def _load_course(self, course_id: str, selection: Selection) -> Union[CourseResponse, Dict[str, Any]]:
+        select = self._course_select(selection)
+        if self.embed_children:
+            # Course, lecturer, schedules and materials in one round trip
+            result = await traced('course', self.db.supabase.table('courses').select(select).eq('id', course_id).execute())
+            children = None
+        else:
+            # The child queries only need the id, so run them alongside the course
+            results = await fan_out(
+                course=self.db.supabase.table('courses').select(select).eq('id', course_id).execute(),
+                **self._children_queries([course_id], selection.expand)
+            )
+            result = results['course']
+            children = results
+        
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Course not found")
+        
+        course_data = result.data[0]
+        if not self.embed_children:
+            await self._attach_children([course_data], selection.expand, children)
+        
+        return self._course_output(course_data, selection)
+    
     async def get_courses(self, 
                          user: UserResponse,
                          specialty: Optional[str] = None,
                          department: Optional[str] = None,
                          lecturer_id: Optional[str] = None,
                          limit: int = 50,
-                         offset: int = 0) -> List[CourseResponse]:
+                         offset: int = 0,
+                         cursor: Optional[str] = None,
+                         selection: Optional[Selection] = None,
+                         version: Optional[str] = None) -> List[Union[CourseResponse, Dict[str, Any]]]:
         """Get courses based on user role and filters"""
         try:
-            query = self.db.supabase.table('courses').select('''
-                *,
-                lecturers:lecturer_id(*)
-            ''')
-            
-            # Apply role-based filtering
-            if user.role == "student":
+            # Reduce role and filters to the effective query so users who see
+            # the same courses share a cache entry
+            specialties = set()
+            if user.role == "student" and user.specialty:
                 # Students see courses for their specialty
-                if user.specialty:
-                    query = query.contains('specialties', [user.specialty])
-            elif user.role == "lecturer":
-                # Lecturers see courses they teach or all if admin privileges
-                if not lecturer_id:
-                    query = query.eq('lecturer_id', user.id)
-            
-            # Apply additional filters
+                specialties.add(user.specialty)
             if specialty:
-                query = query.contains('specialties', [specialty])
-            if lecturer_id:
-                query = query.eq('lecturer_id', lecturer_id)
-            
-            # Apply pagination
-            query = query.range(offset, offset + limit - 1)
-            query = query.order('name')
-            
-            result = query.execute()
-            
-            courses = []
-            for course_data in result.data:
-                # Get schedules for each course
-                schedule_result = self.db.supabase.table('course_schedules').select('*').eq('course_id', course_data['id']).execute()
-                schedules = [CourseScheduleResponse(**schedule) for schedule in schedule_result.data]
-                
-                # Get materials for each course
-                materials_result = self.db.supabase.table('course_materials').select('*').eq('course_id', course_data['id']).execute()
-                materials = materials_result.data
-                
-                courses.append(CourseResponse(
-                    id=course_data['id'],
-                    name=course_data['name'],
-                    code=course_data['code'],
-                    credits=course_data['credits'],
-                    description=course_data.get('description'),
-                    is_shared=course_data['is_shared'],
-                    target_level=course_data.get('target_level'),
-                    lecturer_id=course_data['lecturer_id'],
-                    lecturer=course_data.get('lecturers'),
-                    specialties=course_data.get('specialties', []),
-                    schedule=schedules,
-                    materials=materials,
-                    created_at=course_data['created_at'],
-                    updated_at=course_data['updated_at']
-                ))
-            
-            return courses
+                specialties.add(specialty)
+            
+            # Lecturers see courses they teach unless they ask for a lecturer
+            lecturer = lecturer_id or (user.id if user.role == "lecturer" else None)
+            
+            selection = selection or COURSE_FIELDS.default()
+            key = ('courses', tuple(sorted(specialties)), lecturer, limit, offset, cursor) + selection.key
+            return await course_cache.get_or_load(
+                key,
+                lambda: self._load_courses(sorted(specialties), lecturer, limit, offset, cursor, selection),
+                SPARSE_LIST_ADAPTER if selection.sparse else COURSE_LIST_ADAPTER,
+                version
+            )
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching courses: {str(e)}")
     
+    async def course_page(self, 
+                          user: UserResponse,
+                          specialty: Optional[str] = None,
+                          department: Optional[str] = None,
+                          lecturer_id: Optional[str] = None,
+                          limit: int = 50,
+                          offset: int = 0,
+                          cursor: Optional[str] = None,
+                          selection: Optional[Selection] = None) -> Tuple[str, List[Union[CourseResponse, Dict[str, Any]]]]:
+        """A page of get_courses with the fingerprint of the catalog version it was read under"""
+        version = await course_cache.version()
+        courses = await self.get_courses(user, specialty, department, lecturer_id, limit, offset, cursor, selection, version)
+        return await course_cache.fingerprint(version), courses
+    
+    async def _load_courses(self, specialties: List[str], lecturer_id: Optional[str],
+                            limit: int, offset: int, cursor: Optional[str],
+                            selection: Selection) -> List[Union[CourseResponse, Dict[str, Any]]]:
+        query = self.db.supabase.table('courses').select(self._course_select(selection))
+        
+        for specialty in specialties:
+            query = query.contains('specialties', [specialty])
+        if lecturer_id:
+            query = query.eq('lecturer_id', lecturer_id)
+        
+        # Keyset pagination on (name, id) when a cursor is given, offset otherwise
+        query = apply_page(query, COURSE_SORT, limit, offset, cursor)
+        
+        result = await query.execute()
+        
+        # Schedules and materials come embedded or from one batched query
+        # each, so a page costs the same number of round trips at any size
+        if not self.embed_children:
+            await self._attach_children(result.data, selection.expand)
+        
+        return [self._course_output(course_data, selection) for course_data in result.data]
+    
     async def add_schedule(self, course_id: str, schedule_data: CourseScheduleCreate) -> CourseScheduleResponse:
         """Add schedule to a course"""
         try:
             # Check for conflicts
+            # Other workers' writes since the index's last load count too
+            await schedule_index.refresh(self.db.supabase, [(schedule_data.room, schedule_data.day)])
             conflicts = await self.check_schedule_conflicts(course_id, schedule_data)
             if conflicts:
                 raise HTTPException(
@@ -177,11 +268,14 @@ class CourseService:
                 'updated_at': datetime.utcnow().isoformat()
             }
             
-            result = self.db.supabase.table('course_schedules').insert(schedule_dict).execute()
+            result = await self.db.supabase.table('course_schedules').insert(schedule_dict).execute()
             
             if not result.data:
                 raise HTTPException(status_code=500, detail="Failed to create schedule")
             
+            schedule_index.add(result.data[0])
+            cohort_timetables.schedule_changed(result.data[0])
+            await course_cache.invalidate()
             return CourseScheduleResponse(**result.data[0])
             
         except HTTPException:
@@ -194,37 +288,34 @@ class CourseService:
         try:
             conflicts = []
             
-            # Check room conflicts
-            room_query = self.db.supabase.table('course_schedules').select('*').eq('day', schedule_data.day).eq('room', schedule_data.room)
-            
-            if exclude_id:
-                room_query = room_query.neq('id', exclude_id)
-            
-            room_result = room_query.execute()
+            # Check room conflicts against the in-memory occupancy index
+            await schedule_index.ensure_loaded(self.db.supabase)
+            overlapping = schedule_index.overlapping(
+                schedule_data.room, schedule_data.day, schedule_data.start_time, schedule_data.end_time,
+                exclude_id=exclude_id
+            )
             
-            for existing_schedule in room_result.data:
-                existing_start = datetime.strptime(existing_schedule['start_time'], '%H:%M:%S').time()
-                existing_end = datetime.strptime(existing_schedule['end_time'], '%H:%M:%S').time()
-                
-                # Check for time overlap
-                if (schedule_data.start_time < existing_end and schedule_data.end_time > existing_start):
-                    conflicts.append(ScheduleConflict(
-                        type="room",
-                        severity="high",
-                        conflicting_schedules=[existing_schedule],
-                        suggested_solutions=[
-                            {
-                                "type": "change_room",
-                                "description": f"Move to available room",
-                                "impact": "low"
-                            },
-                            {
-                                "type": "change_time",
-                                "description": f"Reschedule to avoid conflict",
-                                "impact": "medium"
-                            }
-                        ]
-                    ))
+            if not overlapping:
+                return conflicts
+            
+            # Same free-room and free-slot suggestions as the schedule API's conflict check
+            await room_directory.ensure_loaded(self.db.supabase)
+            conflict_check = ScheduleConflictCheck(
+                course_id=course_id,
+                day=schedule_data.day,
+                start_time=schedule_data.start_time,
+                end_time=schedule_data.end_time,
+                room=schedule_data.room,
+                exclude_id=exclude_id
+            )
+            solutions = course_schedule_service._suggest_solutions(conflict_check, room_directory.lookup(schedule_data.room))
+            for existing_schedule in overlapping:
+                conflicts.append(ScheduleConflict(
+                    type="room",
+                    severity="high",
+                    conflicting_schedules=[existing_schedule],
+                    suggested_solutions=solutions
+                ))
             
             return conflicts
             
@@ -234,14 +325,12 @@ class CourseService:
     async def update_schedule(self, schedule_id: str, schedule_data: CourseScheduleUpdate) -> CourseScheduleResponse:
         """Update a course schedule"""
         try:
-            # Get existing schedule
-            existing_result = self.db.supabase.table('course_schedules').select('*').eq('id', schedule_id).execute()
+            # Get existing schedule (usually already loaded by the route's permission check)
+            existing_schedule = await load_row(self.db.supabase, 'course_schedules', schedule_id)
             
-            if not existing_result.data:
+            if not existing_schedule:
                 raise HTTPException(status_code=404, detail="Schedule not found")
             
-            existing_schedule = existing_result.data[0]
-            
             # Prepare update data
             update_data = {
                 'updated_at': datetime.utcnow().isoformat()
@@ -269,6 +358,7 @@ class CourseService:
                     type=update_data.get('type', existing_schedule['type'])
                 )
                 
+                await schedule_index.refresh(self.db.supabase, [(temp_schedule.room, temp_schedule.day)])
                 conflicts = await self.check_schedule_conflicts(existing_schedule['course_id'], temp_schedule, schedule_id)
                 if conflicts:
                     raise HTTPException(
@@ -277,11 +367,15 @@ class CourseService:
                     )
             
             # Update schedule
-            result = self.db.supabase.table('course_schedules').update(update_data).eq('id', schedule_id).execute()
+            result = await self.db.supabase.table('course_schedules').update(update_data).eq('id', schedule_id).execute()
             
             if not result.data:
                 raise HTTPException(status_code=500, detail="Failed to update schedule")
             
+            invalidate_row('course_schedules', schedule_id)
+            schedule_index.add(result.data[0])
+            cohort_timetables.schedule_changed(result.data[0])
+            await course_cache.invalidate()
             return CourseScheduleResponse(**result.data[0])
             
         except HTTPException:
@@ -292,11 +386,15 @@ class CourseService:
     async def delete_schedule(self, schedule_id: str) -> Dict[str, str]:
         """Delete a course schedule"""
         try:
-            result = self.db.supabase.table('course_schedules').delete().eq('id', schedule_id).execute()
+            result = await self.db.supabase.table('course_schedules').delete().eq('id', schedule_id).execute()
             
             if not result.data:
                 raise HTTPException(status_code=404, detail="Schedule not found")
             
+            invalidate_row('course_schedules', schedule_id)
+            schedule_index.remove(schedule_id)
+            cohort_timetables.schedule_removed(schedule_id)
+            await course_cache.invalidate()
             return {"message": "Schedule deleted successfully"}
             
         except HTTPException:
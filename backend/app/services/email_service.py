@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import smtplib
+from email.message import EmailMessage
+from typing import Any, Dict, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class EmailService:
+    """Outbox for transactional email.
+
+    Messages are queued in memory and sent by a single background task so
+    request handlers (and bulk imports) never wait on SMTP.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def queue_welcome_email(self, to_email: str, name: str, matricule: str, password: Optional[str] = None):
+        """Queue the account welcome email for a newly created user"""
+        message = EmailMessage()
+        message['Subject'] = "Welcome to COUMANO"
+        message['From'] = f"{settings.from_name} <{settings.from_email}>"
+        message['To'] = to_email
+
+        body = [
+            f"Hello {name},",
+            "",
+            "Your COUMANO account has been created.",
+            f"Matricule: {matricule}",
+        ]
+        if password:
+            body.append(f"Temporary password: {password}")
+            body.append("You will be asked to change it when you first sign in.")
+        message.set_content("\n".join(body))
+
+        self._ensure_started()
+        self._queue.put_nowait(message)
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await self._queue.get()
+            try:
+                await loop.run_in_executor(None, self._send, message)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to send email to {message['To']}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _send(self, message: EmailMessage):
+        if not settings.smtp_user:
+            self.skipped += 1
+            logger.info(f"SMTP not configured, skipping email to {message['To']}")
+            return
+
+        with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=30) as smtp:
+            smtp.starttls()
+            smtp.login(settings.smtp_user, settings.smtp_password)
+            smtp.send_message(message)
+        self.sent += 1
+
+    async def stop(self):
+        """Stop the sender; unsent messages are dropped"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "skipped": self.skipped
+        }
+
+email_service = EmailService()
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LastLoginWriter:
+    """Write-behind queue for ``users.last_login``.
+
+    Logins only record the timestamp in memory; a background task flushes
+    pending users every ``flush_interval_ms`` (or sooner once ``max_batch`` is
+    reached) with a single ``UPDATE ... WHERE id IN (...)``. Every user in a
+    batch gets the batch's latest login time, so ``last_login`` is accurate to
+    within one flush interval.
+    """
+
+    def __init__(self, db, flush_interval_ms: int, max_batch: int):
+        self.db = db
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+
+    def record(self, user_id: str, login_time: Optional[datetime] = None):
+        """Queue a last_login update for user_id"""
+        self._pending[user_id] = login_time or datetime.utcnow()
+        self._ensure_started()
+        if len(self._pending) >= self.max_batch:
+            self._flush_now.set()
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._flush_now = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write all pending last_login timestamps in one statement"""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        login_time = max(batch.values()).isoformat()
+        try:
+            await self.db.supabase.table('users').update({
+                'last_login': login_time
+            }).in_('id', list(batch)).execute()
+            self.flushes += 1
+            self.rows_written += len(batch)
+        except Exception as e:
+            logger.error(f"Failed to flush last_login batch of {len(batch)}: {e}")
+            self.failures += 1
+            # Keep the newer timestamp if the user logged in again meanwhile
+            for user_id, when in batch.items():
+                self._pending.setdefault(user_id, when)
+
+    async def stop(self):
+        """Cancel the flush loop and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failures": self.failures
+        }
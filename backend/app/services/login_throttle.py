@@ -0,0 +1,218 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from fastapi import HTTPException, status
+
+logger = logging.getLogger(__name__)
+
+class LocalThrottleBackend:
+    """Process-local token buckets and failure backoff.
+
+    Used on a single worker and as the stand-in for the Redis backend in
+    tests. State is bounded to ``max_keys`` entries (least recently used keys
+    are dropped, which only ever makes the limiter more lenient).
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._failures: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, store: OrderedDict, key: str, value):
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_keys:
+            store.popitem(last=False)
+
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        """Consume one token; return 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(capacity), now))
+            tokens = min(float(capacity), tokens + (now - updated_at) * refill_per_second)
+            if tokens >= 1:
+                self._touch(self._buckets, key, (tokens - 1, now))
+                return 0.0
+            self._touch(self._buckets, key, (tokens, now))
+            return (1 - tokens) / refill_per_second
+
+    async def blocked_for(self, key: str) -> float:
+        """Seconds left on the key's failure backoff"""
+        with self._lock:
+            _, blocked_until = self._failures.get(key, (0, 0.0))
+        return max(0.0, blocked_until - time.monotonic())
+
+    async def record_failure(self, key: str, free_failures: int, base: float, maximum: float) -> int:
+        with self._lock:
+            failures, _ = self._failures.get(key, (0, 0.0))
+            failures += 1
+            delay = backoff_delay(failures, free_failures, base, maximum)
+            self._touch(self._failures, key, (failures, time.monotonic() + delay))
+            return failures
+
+    async def reset_failures(self, key: str):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    async def close(self):
+        pass
+
+class RedisThrottleBackend:
+    """Token buckets and backoff shared by all workers through Redis"""
+
+    # Atomic refill-and-take; returns the wait in seconds as a string
+    TAKE_SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local wait = 0
+    if tokens >= 1 then
+      tokens = tokens - 1
+    else
+      wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "coumano:login"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._client = redis.from_url(redis_url)
+        self._take = self._client.register_script(self.TAKE_SCRIPT)
+
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        wait = await self._take(
+            keys=[f"{self.prefix}:bucket:{key}"],
+            args=[capacity, refill_per_second, time.time()]
+        )
+        return float(wait)
+
+    async def blocked_for(self, key: str) -> float:
+        ttl_ms = await self._client.pttl(f"{self.prefix}:block:{key}")
+        return max(0.0, ttl_ms / 1000)
+
+    async def record_failure(self, key: str, free_failures: int, base: float, maximum: float) -> int:
+        fail_key = f"{self.prefix}:fail:{key}"
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.incr(fail_key)
+            pipe.expire(fail_key, int(maximum) * 2)
+            failures, _ = await pipe.execute()
+        delay = backoff_delay(failures, free_failures, base, maximum)
+        if delay > 0:
+            await self._client.set(f"{self.prefix}:block:{key}", 1, px=int(delay * 1000))
+        return failures
+
+    async def reset_failures(self, key: str):
+        await self._client.delete(f"{self.prefix}:fail:{key}", f"{self.prefix}:block:{key}")
+
+    async def close(self):
+        await self._client.close()
+
+def backoff_delay(failures: int, free_failures: int, base: float, maximum: float) -> float:
+    """Exponential backoff once a key has used up its free failures"""
+    if failures <= free_failures:
+        return 0.0
+    return min(maximum, base * 2 ** (failures - free_failures - 1))
+
+class LoginThrottle:
+    """Caps how many login attempts per matricule and per client IP reach bcrypt.
+
+    Each attempt takes a token from the client IP's bucket, then from the
+    matricule's, so attempts the IP limit rejects cannot drain a victim's
+    bucket. Repeated failures for a matricule additionally put it on an
+    exponential backoff. Rejected attempts never reach password verification.
+    """
+
+    def __init__(self, backend, user_capacity: int, user_refill_per_minute: float,
+                 ip_capacity: int, ip_refill_per_minute: float,
+                 backoff_free_failures: int, backoff_base_seconds: float,
+                 backoff_max_seconds: float):
+        self.backend = backend
+        self.user_capacity = user_capacity
+        self.user_refill = user_refill_per_minute / 60
+        self.ip_capacity = ip_capacity
+        self.ip_refill = ip_refill_per_minute / 60
+        self.backoff_free_failures = backoff_free_failures
+        self.backoff_base = backoff_base_seconds
+        self.backoff_max = backoff_max_seconds
+        self.rejected = 0
+        self.verified = 0
+        self.failed_open = 0
+        self.failed = 0
+        self.backend_errors = 0
+
+    def _reject(self, retry_after: float):
+        self.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    async def check(self, matricule: str, client_ip: Optional[str] = None):
+        """Raise 429 if this attempt should not reach password verification"""
+        user_key = f"user:{matricule}"
+        try:
+            blocked = await self.backend.blocked_for(user_key)
+            if blocked > 0:
+                self._reject(blocked)
+
+            wait = 0.0
+            if client_ip:
+                wait = await self.backend.take(f"ip:{client_ip}", self.ip_capacity, self.ip_refill)
+            if wait == 0:
+                wait = await self.backend.take(user_key, self.user_capacity, self.user_refill)
+            if wait > 0:
+                self._reject(wait)
+        except HTTPException:
+            raise
+        except Exception as e:
+            # Fail open: a throttle outage must not lock everyone out
+            self.backend_errors += 1
+            self.failed_open += 1
+            logger.error(f"Login throttle backend error: {e}")
+            return
+
+        self.verified += 1
+
+    async def record_failure(self, matricule: str):
+        self.failed += 1
+        try:
+            await self.backend.record_failure(
+                f"user:{matricule}", self.backoff_free_failures,
+                self.backoff_base, self.backoff_max
+            )
+        except Exception as e:
+            self.backend_errors += 1
+            logger.error(f"Login throttle backend error: {e}")
+
+    async def record_success(self, matricule: str):
+        try:
+            await self.backend.reset_failures(f"user:{matricule}")
+        except Exception as e:
+            self.backend_errors += 1
+            logger.error(f"Login throttle backend error: {e}")
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "rejected": self.rejected,
+            "verified": self.verified,
+            "failed_open": self.failed_open,
+            "failed": self.failed,
+            "backend_errors": self.backend_errors
+        }
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from app.config import settings
+from app.database import get_database
+
+class MatriculeAllocator:
+    """Hands out matricules from blocks reserved in the database.
+
+    ``reserve_matricule_block`` atomically advances the persisted high-water
+    mark for a prefix by ``block_size`` and returns it; numbers inside the
+    block are then issued from memory under a lock, so creating N users costs
+    N / block_size round trips instead of N. Numbers left in a block when the
+    process exits are skipped, never reused.
+    """
+
+    def __init__(self):
+        self.db = get_database()
+        self.block_size = settings.matricule_block_size
+        # (role, year) -> [prefix, next number, last number in block]
+        self._blocks: Dict[Tuple[str, int], list] = {}
+        self._lock = asyncio.Lock()
+        self.reservations = 0
+        self.allocated = 0
+
+    async def _reserve(self, role: str, department: Optional[str], size: int) -> list:
+        result = await self.db.supabase.rpc('reserve_matricule_block', {
+            'user_role': role,
+            'block_size': size,
+            'department': department
+        }).execute()
+        block = result.data
+        self.reservations += 1
+        high_water = int(block['high_water'])
+        return [block['prefix'], high_water - size + 1, high_water]
+
+    async def allocate(self, role: str, department: Optional[str] = None) -> str:
+        """Return the next unused matricule for a role"""
+        # Matricules encode role and year only, so departments share a sequence
+        key = (str(getattr(role, 'value', role)), datetime.utcnow().year)
+        async with self._lock:
+            block = self._blocks.get(key)
+            if block is None or block[1] > block[2]:
+                block = await self._reserve(key[0], department, self.block_size)
+                self._blocks[key] = block
+
+            prefix, number, _ = block
+            block[1] += 1
+            self.allocated += 1
+        return f"{prefix}{number:03d}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "block_size": self.block_size,
+            "reservations": self.reservations,
+            "allocated": self.allocated,
+            "remaining": {
+                f"{role}:{year}": block[2] - block[1] + 1
+                for (role, year), block in self._blocks.items()
+            }
+        }
+
+matricule_allocator = MatriculeAllocator()
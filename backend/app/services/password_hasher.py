@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    # Module-level so it can be pickled into a process pool
+    return pwd_context.verify(plain_password, hashed_password)
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification on a bounded worker pool.
+
+    bcrypt costs hundreds of milliseconds per call, so running it inline in an
+    ``async def`` stalls every other request on the event loop. ``max_workers``
+    caps how many hashes run at once; extra calls queue on the pool.
+    """
+
+    def __init__(self, max_workers: int, executor_type: str = "thread"):
+        if executor_type not in ("thread", "process"):
+            raise ValueError("executor_type must be 'thread' or 'process'")
+        self.max_workers = max_workers
+        self.executor_type = executor_type
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="bcrypt"
+                    )
+            return self._executor
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash off the event loop"""
+        return await self._run(_verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the event loop"""
+        return await self._run(_hash, password)
+
+    def shutdown(self):
+        """Release pool workers"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor_type,
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "completed": self.completed
+        }
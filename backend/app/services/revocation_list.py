@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RevocationList:
+    """In-memory deny set for self-contained (claims mode) tokens.
+
+    Maps ``user_id -> min_version``: a token is rejected when its ``ver`` claim
+    is lower than the user's entry. Entries are pushed locally when this worker
+    bumps a user's ``token_version`` and refreshed periodically from ``users``
+    so other workers' revocations are picked up. Only users updated within the
+    token lifetime are loaded; older bumps can only affect expired tokens.
+    """
+
+    def __init__(self, db, refresh_interval_seconds: int, token_lifetime_minutes: int):
+        self.db = db
+        self.refresh_interval = refresh_interval_seconds
+        self.token_lifetime = timedelta(minutes=token_lifetime_minutes)
+        # user_id -> (min_version, monotonic time recorded)
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.rejections = 0
+        self.last_refresh: Optional[datetime] = None
+
+    def push(self, user_id: str, min_version: int):
+        """Reject tokens for user_id older than min_version"""
+        current = self._entries.get(user_id)
+        if current is None or current[0] < min_version:
+            self._entries[user_id] = (min_version, time.monotonic())
+
+    def is_revoked(self, user_id: str, version: int) -> bool:
+        entry = self._entries.get(user_id)
+        if entry is not None and version < entry[0]:
+            self.rejections += 1
+            return True
+        return False
+
+    async def refresh(self):
+        """Reload recently bumped token versions from the users table"""
+        cutoff = datetime.utcnow() - self.token_lifetime
+        try:
+            result = await self.db.supabase.table('users').select('id, token_version').gt(
+                'token_version', 1
+            ).gte('updated_at', cutoff.isoformat()).execute()
+        except Exception as e:
+            logger.error(f"Revocation list refresh failed: {e}")
+            return
+
+        now = time.monotonic()
+        entries = {row['id']: (row['token_version'], now) for row in result.data}
+
+        # Keep local pushes the database has not caught up with yet; anything
+        # older than the token lifetime can no longer match a live token
+        horizon = now - self.token_lifetime.total_seconds()
+        for user_id, (min_version, recorded_at) in self._entries.items():
+            if recorded_at < horizon:
+                continue
+            if user_id not in entries or entries[user_id][0] < min_version:
+                entries[user_id] = (min_version, recorded_at)
+
+        self._entries = entries
+        self.refreshes += 1
+        self.last_refresh = datetime.utcnow()
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "refreshes": self.refreshes,
+            "rejections": self.rejections,
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None
+        }
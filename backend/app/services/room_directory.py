@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RoomKey = Tuple[str, Optional[str]]
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+class RoomDirectory:
+    """In-memory copy of the ``rooms`` table.
+
+    Loaded at startup, updated by the room service's write paths and
+    reloaded after ``ttl`` seconds to pick up other workers' writes. Active
+    rooms are kept sorted by capacity, so searches by building, type,
+    minimum capacity and equipment are a bisect and a filter, with no query.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._rooms: Dict[str, Dict[str, Any]] = {}
+        self._by_key: Dict[RoomKey, str] = {}
+        self._by_name: Dict[str, Set[str]] = {}
+        # (capacity, building, name, id) of active rooms; rebuilt on the next search after a write
+        self._sorted: Optional[List[Tuple[int, str, str, str]]] = None
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        # Writes recorded while a load is reading the table, replayed once it swaps in
+        self._pending: Optional[List[Tuple[str, Any]]] = None
+        self.loads = 0
+        self.searches = 0
+
+    @property
+    def fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    async def load(self, client, page_size: int = 1000):
+        """Rebuild the directory from the table, a page at a time"""
+        async with self._lock:
+            await self._load(client, page_size)
+
+    async def ensure_loaded(self, client):
+        if self.fresh:
+            return
+        async with self._lock:
+            if not self.fresh:
+                await self._load(client)
+
+    async def _load(self, client, page_size: int = 1000):
+        self._pending = []
+        try:
+            rows, offset = [], 0
+            while True:
+                result = await client.table('rooms').select('*').order('id').range(offset, offset + page_size - 1).execute()
+                rows.extend(result.data)
+                if len(result.data) < page_size:
+                    break
+                offset += page_size
+            self._rooms, self._by_key, self._by_name, self._sorted = {}, {}, {}, None
+            for row in rows:
+                self._put(row)
+            self._loaded_at = time.monotonic()
+            # A page read before one of these writes would otherwise undo it
+            pending, self._pending = self._pending, None
+            for op, arg in pending:
+                getattr(self, op)(arg)
+        finally:
+            self._pending = None
+        self.loads += 1
+        logger.info(f"Room directory loaded {len(self._rooms)} rooms")
+
+    def _put(self, row: Dict[str, Any]):
+        row = {key: _plain(value) for key, value in row.items()}
+        self._rooms[row['id']] = row
+        self._by_key[(row['name'], row.get('building'))] = row['id']
+        self._by_name.setdefault(row['name'], set()).add(row['id'])
+
+    def room_changed(self, row: Dict[str, Any]):
+        """Record a created or updated room row"""
+        if self._pending is not None:
+            self._pending.append(('room_changed', row))
+        if self._loaded_at is None:
+            return
+        self._discard(row['id'])
+        self._put(row)
+
+    def room_removed(self, room_id: str):
+        if self._pending is not None:
+            self._pending.append(('room_removed', room_id))
+        self._discard(room_id)
+
+    def _discard(self, room_id: str):
+        old = self._rooms.pop(room_id, None)
+        if old is not None:
+            self._by_key.pop((old['name'], old.get('building')), None)
+            self._by_name.get(old['name'], set()).discard(room_id)
+        self._sorted = None
+
+    def get(self, room_id: str) -> Optional[Dict[str, Any]]:
+        return self._rooms.get(room_id)
+
+    def get_exact(self, name: str, building: Optional[str]) -> Optional[Dict[str, Any]]:
+        room_id = self._by_key.get((name, building))
+        return self._rooms.get(room_id) if room_id else None
+
+    def lookup(self, name: str, building: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The room called ``name`` in ``building``; without a building, the only room of that name"""
+        room_id = self._by_key.get((name, building))
+        if room_id is None and building is None:
+            matches = self._by_name.get(name, set())
+            room_id = next(iter(matches)) if len(matches) == 1 else None
+        elif room_id is None:
+            # Rooms recorded without a building match a schedule that names one
+            room_id = self._by_key.get((name, None))
+        return self._rooms.get(room_id) if room_id else None
+
+    def _ordered(self) -> List[Tuple[int, str, str, str]]:
+        if self._sorted is None:
+            self._sorted = sorted(
+                (row.get('capacity') or 0, row.get('building') or "", row['name'], row['id'])
+                for row in self._rooms.values() if row.get('is_active', True)
+            )
+        return self._sorted
+
+    def find(self, building: Optional[str] = None, room_type: Optional[str] = None,
+             min_capacity: Optional[int] = None, equipment: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """Active rooms matching every given filter, smallest capacity first.
+
+        Rooms of unknown capacity only match when no ``min_capacity`` is given.
+        """
+        self.searches += 1
+        ordered = self._ordered()
+        lo = bisect_left(ordered, (min_capacity, "", "", "")) if min_capacity else 0
+        room_type, needed = _plain(room_type), set(equipment)
+        found = []
+        for _, _, _, room_id in ordered[lo:]:
+            row = self._rooms[room_id]
+            if building is not None and row.get('building') != building:
+                continue
+            if room_type is not None and row['type'] != room_type:
+                continue
+            if needed and not needed.issubset(row.get('equipment') or ()):
+                continue
+            found.append(row)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rooms": len(self._rooms),
+            "loads": self.loads,
+            "searches": self.searches,
+            "age_seconds": None if self._loaded_at is None else round(time.monotonic() - self._loaded_at, 1)
+        }
+
+def room_pairs(rows: Iterable[Dict[str, Any]]) -> List[RoomKey]:
+    """(name, building) keys of room rows, as the schedule index takes them"""
+    return [(row['name'], row.get('building')) for row in rows]
+
+room_directory = RoomDirectory(ttl=settings.room_directory_ttl_seconds)
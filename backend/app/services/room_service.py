@@ -0,0 +1,139 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+from fastapi import HTTPException
+from app.database import get_database, returning
+from app.services.room_directory import room_directory
+from app.models.room import RoomCreate, RoomUpdate, RoomResponse
+import uuid
+
+class RoomService:
+    def __init__(self):
+        self.db = get_database()
+
+    def _room_response(self, row: Dict[str, Any]) -> RoomResponse:
+        return RoomResponse(
+            id=row['id'],
+            name=row['name'],
+            building=row.get('building'),
+            type=row.get('type') or 'classroom',
+            capacity=row.get('capacity'),
+            equipment=row.get('equipment') or [],
+            is_active=row.get('is_active', True),
+            created_at=row['created_at'],
+            updated_at=row['updated_at']
+        )
+
+    def _check_unique(self, name: str, building: Optional[str], room_id: Optional[str] = None):
+        existing = room_directory.get_exact(name, building)
+        if existing is not None and existing['id'] != room_id:
+            raise HTTPException(status_code=400, detail="A room with this name already exists in the building")
+
+    async def create_room(self, room_data: RoomCreate) -> RoomResponse:
+        """Create a room"""
+        try:
+            await room_directory.ensure_loaded(self.db.supabase)
+            self._check_unique(room_data.name, room_data.building)
+
+            room_dict = {
+                'id': str(uuid.uuid4()),
+                'name': room_data.name,
+                'building': room_data.building,
+                'type': room_data.type,
+                'capacity': room_data.capacity,
+                'equipment': room_data.equipment,
+                'is_active': True,
+                'created_at': datetime.utcnow().isoformat(),
+                'updated_at': datetime.utcnow().isoformat()
+            }
+
+            result = await returning(self.db.supabase.table('rooms').insert(room_dict), '*').execute()
+            if not result.data:
+                raise HTTPException(status_code=500, detail="Failed to create room")
+
+            room_directory.room_changed(result.data[0])
+            return self._room_response(result.data[0])
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error creating room: {str(e)}")
+
+    async def get_rooms(self, building: Optional[str] = None, room_type: Optional[str] = None,
+                        min_capacity: Optional[int] = None, equipment: Optional[List[str]] = None) -> List[RoomResponse]:
+        """Active rooms matching the filters, served from the room directory"""
+        try:
+            await room_directory.ensure_loaded(self.db.supabase)
+            rows = room_directory.find(building, room_type, min_capacity, equipment or ())
+            return [self._room_response(row) for row in rows]
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting rooms: {str(e)}")
+
+    async def get_room(self, room_id: str) -> RoomResponse:
+        """Get a room by ID"""
+        try:
+            await room_directory.ensure_loaded(self.db.supabase)
+            row = room_directory.get(room_id)
+            if row is None:
+                raise HTTPException(status_code=404, detail="Room not found")
+            return self._room_response(row)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting room: {str(e)}")
+
+    async def update_room(self, room_id: str, room_data: RoomUpdate) -> RoomResponse:
+        """Update a room"""
+        try:
+            existing = await self.get_room(room_id)
+            update_data = {
+                'updated_at': datetime.utcnow().isoformat()
+            }
+
+            if room_data.name is not None:
+                update_data['name'] = room_data.name
+            if room_data.building is not None:
+                update_data['building'] = room_data.building
+            if room_data.type is not None:
+                update_data['type'] = room_data.type
+            if room_data.capacity is not None:
+                update_data['capacity'] = room_data.capacity
+            if room_data.equipment is not None:
+                update_data['equipment'] = room_data.equipment
+            if room_data.is_active is not None:
+                update_data['is_active'] = room_data.is_active
+
+            if 'name' in update_data or 'building' in update_data:
+                self._check_unique(update_data.get('name', existing.name), update_data.get('building', existing.building), room_id)
+
+            result = await returning(
+                self.db.supabase.table('rooms').update(update_data), '*'
+            ).eq('id', room_id).execute()
+            if not result.data:
+                raise HTTPException(status_code=404, detail="Room not found")
+
+            room_directory.room_changed(result.data[0])
+            return self._room_response(result.data[0])
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error updating room: {str(e)}")
+
+    async def delete_room(self, room_id: str) -> Dict[str, str]:
+        """Delete a room; schedules keep their room text"""
+        try:
+            result = await self.db.supabase.table('rooms').delete().eq('id', room_id).execute()
+            if not result.data:
+                raise HTTPException(status_code=404, detail="Room not found")
+
+            room_directory.room_removed(room_id)
+            return {"message": "Room deleted successfully"}
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error deleting room: {str(e)}")
+
+room_service = RoomService()
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import IO, Any, Dict, List, Set, Tuple
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+from app.config import settings
+from app.database import get_database
+from app.dataloader import request_loader
+from app.tracing import request_trace
+from app.models.course_schedule import (
+    BulkRowStatus, BulkScheduleRowResult, CourseScheduleCreate, ImportJobStatus, ScheduleImportJob
+)
+from app.services.course_schedule_service import course_schedule_service
+from app.services.spreadsheet_reader import iter_rows
+
+logger = logging.getLogger(__name__)
+
+def _parse_time(value: str) -> str:
+    """'8:00', '08:00:00' and XLSX datetimes ('1899-12-30 08:00:00') all become '08:00:00'"""
+    text = value.split(' ')[-1]
+    for fmt in ('%H:%M:%S', '%H:%M'):
+        try:
+            return datetime.strptime(text, fmt).time().isoformat()
+        except ValueError:
+            continue
+    # Left as is so validation reports it against the field
+    return value
+
+class ScheduleImportService:
+    """Streams CSV/XLSX timetables into ``course_schedules``.
+
+    Rows are parsed a chunk at a time off the event loop, checked against the
+    schedule index and each other by the bulk engine, and inserted with one
+    statement per chunk. Uploads over ``schedule_import_background_bytes``
+    are spooled to a temporary file and imported by a background task whose
+    progress is polled with ``get_job``. Jobs live in this worker's memory.
+    """
+
+    def __init__(self):
+        self.db = get_database()
+        self._jobs: Dict[str, ScheduleImportJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._finished: Dict[str, float] = {}
+
+    def _parse_row(self, raw: Dict[str, str]) -> CourseScheduleCreate:
+        """Validate one spreadsheet row into a CourseScheduleCreate"""
+        data: Dict[str, Any] = {key: value for key, value in raw.items() if value != ""}
+        for field in ('start_time', 'end_time'):
+            if field in data:
+                data[field] = _parse_time(data[field])
+        if 'day' in data:
+            data['day'] = data['day'].capitalize()
+        if 'type' in data:
+            data['type'] = data['type'].lower()
+        return CourseScheduleCreate(**data)
+
+    def _reject(self, job: ScheduleImportJob, row_num: int, field: str, message: str):
+        if len(job.errors) < settings.schedule_import_max_errors:
+            job.errors.append({"row": row_num, "field": field, "message": message})
+
+    def _conflict_message(self, result: BulkScheduleRowResult, chunk: List[Tuple[int, CourseScheduleCreate]]) -> str:
+        clashes = []
+        for conflict in result.conflicts:
+            if 'batch_index' in conflict:
+                clashes.append(f"row {chunk[conflict['batch_index']][0]}")
+            else:
+                clashes.append(f"schedule {conflict['id']} ({conflict['start_time']}-{conflict['end_time']})")
+        return f"Room already booked: overlaps {', '.join(clashes)}"
+
+    async def import_schedules(self, file: UploadFile, created_by: str) -> ScheduleImportJob:
+        """Import a CSV/XLSX upload, in the background when it is large"""
+        self._prune()
+        job = ScheduleImportJob(
+            job_id=str(uuid.uuid4()),
+            status=ImportJobStatus.QUEUED,
+            filename=file.filename,
+            created_by=created_by,
+            started_at=datetime.utcnow()
+        )
+        self._jobs[job.job_id] = job
+
+        if (file.size or 0) <= settings.schedule_import_background_bytes:
+            try:
+                await self._run(job, file.file)
+                return job
+            except Exception as e:
+                self._jobs.pop(job.job_id, None)
+                raise HTTPException(status_code=500, detail=f"Error importing schedules: {str(e)}")
+
+        # The upload is closed when the request ends, so the job reads its own copy
+        loop = asyncio.get_running_loop()
+        spool = tempfile.TemporaryFile()
+        await loop.run_in_executor(None, shutil.copyfileobj, file.file, spool)
+        spool.seek(0)
+        job.background = True
+        self._tasks[job.job_id] = loop.create_task(self._run_background(job, spool))
+        return job
+
+    def get_job(self, job_id: str) -> ScheduleImportJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Import job not found")
+        return job
+
+    async def _run_background(self, job: ScheduleImportJob, spool: IO[bytes]):
+        # The task inherits the request's context; it must not use its row cache or trace
+        request_loader.set(None)
+        request_trace.set(None)
+        try:
+            await self._run(job, spool)
+        except asyncio.CancelledError:
+            self._fail(job, "Import cancelled by a server shutdown; rows inserted so far were kept")
+            raise
+        except Exception as e:
+            self._fail(job, str(e))
+        finally:
+            spool.close()
+            self._tasks.pop(job.job_id, None)
+
+    def _fail(self, job: ScheduleImportJob, message: str):
+        job.status = ImportJobStatus.FAILED
+        job.finished_at = datetime.utcnow()
+        self._finished[job.job_id] = time.monotonic()
+        job.errors.append({"row": None, "field": "general", "message": message})
+        logger.error(f"Schedule import {job.job_id} failed: {message}")
+
+    async def _run(self, job: ScheduleImportJob, fileobj: IO[bytes]):
+        job.status = ImportJobStatus.RUNNING
+        loop = asyncio.get_running_loop()
+        rows = iter_rows(fileobj, job.filename)
+        known_courses: Set[str] = set()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(
+                    None, lambda: list(islice(rows, settings.schedule_import_batch_size))
+                )
+                if not chunk:
+                    break
+                job.rows_read += len(chunk)
+                await self._import_chunk(job, chunk, known_courses)
+                job.error_count = job.rows_read - job.created_count
+        finally:
+            rows.close()
+
+        job.status = ImportJobStatus.COMPLETED
+        job.finished_at = datetime.utcnow()
+        self._finished[job.job_id] = time.monotonic()
+
+    async def _import_chunk(self, job: ScheduleImportJob, chunk: List[Tuple[int, Dict[str, str]]], known_courses: Set[str]):
+        """Validate a chunk, look up its unknown courses in one query and bulk insert the rest"""
+        parsed: List[Tuple[int, CourseScheduleCreate]] = []
+        for row_num, raw in chunk:
+            try:
+                parsed.append((row_num, self._parse_row(raw)))
+            except ValidationError as e:
+                for error in e.errors():
+                    field = str(error['loc'][0]) if error['loc'] else "general"
+                    self._reject(job, row_num, field, error['msg'])
+
+        missing = {schedule.course_id for _, schedule in parsed} - known_courses
+        if missing:
+            result = await self.db.supabase.table('courses').select('id').in_('id', list(missing)).execute()
+            known_courses.update(row['id'] for row in result.data)
+
+        valid: List[Tuple[int, CourseScheduleCreate]] = []
+        for row_num, schedule in parsed:
+            if schedule.course_id in known_courses:
+                valid.append((row_num, schedule))
+            else:
+                self._reject(job, row_num, "course_id", f"Unknown course {schedule.course_id}")
+        if not valid:
+            return
+
+        result = await course_schedule_service.bulk_create_schedules([schedule for _, schedule in valid], job.created_by)
+        for (row_num, _), row in zip(valid, result.results):
+            if row.status == BulkRowStatus.CONFLICT:
+                job.conflict_count += 1
+                self._reject(job, row_num, "room", self._conflict_message(row, valid))
+        job.created_count += result.created_count
+
+    def _prune(self):
+        cutoff = time.monotonic() - settings.schedule_import_job_ttl_seconds
+        for job_id in [job_id for job_id, finished in self._finished.items() if finished < cutoff]:
+            self._finished.pop(job_id)
+            self._jobs.pop(job_id, None)
+
+    async def stop(self):
+        """Cancel running imports; their rows inserted so far stay"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+schedule_import_service = ScheduleImportService()
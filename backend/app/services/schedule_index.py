@@ -0,0 +1,357 @@
+import asyncio
+import heapq
+import logging
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import time as dt_time
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+BucketKey = Tuple[str, Optional[str], str]
+
+# Sorts after every schedule id, so (t, _MAX_ID) bounds all keys starting at t
+_MAX_ID = "\uffff"
+
+def _plain(value: Any) -> Any:
+    # Keys hold the stored text, whether the caller passes a DayOfWeek or a string
+    return value.value if isinstance(value, Enum) else value
+
+def from_seconds(value: int) -> dt_time:
+    return dt_time(value // 3600, value % 3600 // 60, value % 60)
+
+def to_seconds(value: Union[str, dt_time, int]) -> int:
+    """Seconds since midnight for ``HH:MM[:SS]`` strings and time objects"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, dt_time):
+        return value.hour * 3600 + value.minute * 60 + value.second
+    parts = value.split(':')
+    return int(parts[0]) * 3600 + int(parts[1]) * 60 + (int(float(parts[2])) if len(parts) > 2 else 0)
+
+def overlapping_pairs(intervals: List[Tuple[int, int, Any]]) -> Iterator[Tuple[Any, Any]]:
+    """Sweep-line over (start, end, ref) intervals, yielding every overlapping pair of refs.
+
+    Intervals are visited by start; those still running (end > start) are
+    exactly the ones the new interval overlaps. O(n log n + pairs).
+    """
+    active: List[Tuple[int, int, Any]] = []
+    for seq, (start, end, ref) in enumerate(sorted(intervals, key=lambda interval: interval[0])):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, _, other in active:
+            yield other, ref
+        heapq.heappush(active, (end, seq, ref))
+
+# Occupancy bitsets: bit i of an int covers [i * SLOT_SECONDS, (i + 1) * SLOT_SECONDS)
+SLOT_SECONDS = 300
+SLOTS_PER_DAY = 24 * 3600 // SLOT_SECONDS
+
+def _bits(first: int, last: int) -> int:
+    return ((1 << (last - first)) - 1) << first if last > first else 0
+
+def slot_mask(start: int, end: int) -> int:
+    """Bits of every slot that [start, end) touches, partially or fully"""
+    return _bits(start // SLOT_SECONDS, min(-(-end // SLOT_SECONDS), SLOTS_PER_DAY))
+
+def full_mask(start: int, end: int) -> int:
+    """Bits of the slots [start, end) covers entirely"""
+    return _bits(-(-start // SLOT_SECONDS), min(end // SLOT_SECONDS, SLOTS_PER_DAY))
+
+def runs_of(free: int, length: int) -> int:
+    """Bit i is set when slots i .. i + length - 1 are all set in ``free``"""
+    runs, covered = free, 1
+    # Doubling: after each step ``runs`` checks 2x as many slots, O(log length) shifts
+    while covered < length:
+        step = min(covered, length - covered)
+        runs &= runs >> step
+        covered += step
+    return runs
+
+def nearest_bit(bits: int, target: int) -> Optional[int]:
+    """Index of the set bit closest to ``target`` (earlier wins ties), or None"""
+    above = bits >> target
+    after = target + ((above & -above).bit_length() - 1) if above else None
+    below = bits & ((1 << target) - 1)
+    before = below.bit_length() - 1 if below else None
+    if after is None or (before is not None and target - before <= after - target):
+        return before
+    return after
+
+class _Bucket:
+    """Schedules of one (room, building, day), sorted by start time.
+
+    Every interval that overlaps [start, end) begins in (start - longest, end),
+    so a query bisects to that window and only checks the ends inside it.
+    ``mask`` has the slots any schedule touches and ``full`` those that one
+    covers entirely; they only differ for times off the 5-minute grid.
+    """
+
+    __slots__ = ("keys", "rows", "longest", "mask", "full")
+
+    def __init__(self):
+        self.keys: List[Tuple[int, str]] = []
+        self.rows: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+        self.longest = 0
+        self.mask = 0
+        self.full = 0
+
+    def add(self, schedule_id: str, start: int, end: int, row: Dict[str, Any]):
+        insort(self.keys, (start, schedule_id))
+        self.rows[schedule_id] = (start, end, row)
+        self.longest = max(self.longest, end - start)
+        self.mask |= slot_mask(start, end)
+        self.full |= full_mask(start, end)
+
+    def remove(self, schedule_id: str):
+        start, _, _ = self.rows.pop(schedule_id)
+        del self.keys[bisect_left(self.keys, (start, schedule_id))]
+        # Slots may be shared with other rows, so the masks are recomputed
+        self.mask, self.full = self.masks()
+
+    def masks(self, exclude_id: Optional[str] = None) -> Tuple[int, int]:
+        mask = full = 0
+        for schedule_id, (start, end, _) in self.rows.items():
+            if schedule_id != exclude_id:
+                mask |= slot_mask(start, end)
+                full |= full_mask(start, end)
+        return mask, full
+
+    def overlapping(self, start: int, end: int) -> List[Dict[str, Any]]:
+        lo = bisect_right(self.keys, (start - self.longest, _MAX_ID))
+        hi = bisect_left(self.keys, (end, ""))
+        found = []
+        for _, schedule_id in self.keys[lo:hi]:
+            _, row_end, row = self.rows[schedule_id]
+            if row_end > start:
+                found.append(row)
+        return found
+
+class ScheduleIntervalIndex:
+    """In-memory room occupancy index over ``course_schedules``.
+
+    Built from the table on first use (or at startup), kept in sync by the
+    services' write paths, and rebuilt after ``ttl`` seconds so writes made
+    by other workers are picked up. Overlap queries cost O(log n + k);
+    free-room and free-slot searches work on per-room, per-day bitsets of
+    5-minute slots.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._buckets: Dict[BucketKey, _Bucket] = {}
+        self._keys: Dict[str, BucketKey] = {}
+        self._buildings: Dict[Tuple[str, str], set] = {}
+        self._rooms: Dict[str, set] = {}
+        # day -> (room, building) -> combined bitsets, filled by free_rooms, dropped on writes to that day
+        self._day_masks: Dict[str, Dict[Tuple[str, Optional[str]], Tuple[int, int]]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        # Writes recorded while a load is reading the table, replayed once it swaps in
+        self._pending: Optional[List[Tuple[str, Any]]] = None
+        self.loads = 0
+        self.queries = 0
+
+    @property
+    def fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def load(self, client, page_size: int = 1000):
+        """Rebuild the index from the table, a page at a time"""
+        async with self._lock:
+            await self._load(client, page_size)
+
+    async def ensure_loaded(self, client):
+        if self.fresh:
+            return
+        async with self._lock:
+            if not self.fresh:
+                await self._load(client)
+
+    async def _load(self, client, page_size: int = 1000):
+        buckets, keys, buildings, rooms = {}, {}, {}, {}
+        self._pending = []
+        try:
+            offset = 0
+            while True:
+                result = await client.table('course_schedules').select('*').order('id').range(offset, offset + page_size - 1).execute()
+                for row in result.data:
+                    self._insert(buckets, keys, buildings, rooms, row)
+                if len(result.data) < page_size:
+                    break
+                offset += page_size
+            self._buckets, self._keys, self._buildings, self._rooms = buckets, keys, buildings, rooms
+            self._day_masks = {}
+            self._loaded_at = time.monotonic()
+            # A page read before one of these writes would otherwise undo it
+            pending, self._pending = self._pending, None
+            for op, arg in pending:
+                getattr(self, op)(arg)
+        finally:
+            self._pending = None
+        self.loads += 1
+        logger.info(f"Schedule index loaded {len(keys)} schedules in {len(buckets)} room-days")
+
+    async def refresh(self, client, pairs: Iterable[Tuple[str, Any]]):
+        """Re-read the schedules of these (room, day)s from the table.
+
+        Write paths call this right before their conflict check, so rows
+        other workers wrote since the last load count as conflicts.
+        """
+        await self.ensure_loaded(client)
+        pairs = {(room, _plain(day)) for room, day in pairs}
+        if not pairs:
+            return
+        result = await client.table('course_schedules').select('*') \
+            .in_('room', sorted({room for room, _ in pairs})) \
+            .in_('day', sorted({day for _, day in pairs})).execute()
+        for room, day in pairs:
+            for building in list(self._buildings.get((room, day), ())):
+                for schedule_id in list(self._buckets[(room, building, day)].rows):
+                    self.remove(schedule_id)
+        for row in result.data:
+            if (row['room'], _plain(row['day'])) in pairs:
+                self.add(row)
+
+    @staticmethod
+    def _insert(buckets, keys, buildings, rooms, row: Dict[str, Any]):
+        room, building, day = row['room'], row.get('building'), _plain(row['day'])
+        key = (room, building, day)
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = _Bucket()
+            buildings.setdefault((room, day), set()).add(building)
+            rooms.setdefault(room, set()).add(building)
+        bucket.add(row['id'], to_seconds(row['start_time']), to_seconds(row['end_time']), row)
+        keys[row['id']] = key
+
+    def add(self, row: Dict[str, Any]):
+        """Record a created or updated schedule row"""
+        if self._pending is not None:
+            self._pending.append(('add', row))
+        if self._loaded_at is None:
+            return
+        self._discard(row['id'])
+        self._insert(self._buckets, self._keys, self._buildings, self._rooms, row)
+        self._day_masks.pop(_plain(row['day']), None)
+
+    def remove(self, schedule_id: str):
+        if self._pending is not None:
+            self._pending.append(('remove', schedule_id))
+        self._discard(schedule_id)
+
+    def _discard(self, schedule_id: str):
+        key = self._keys.pop(schedule_id, None)
+        if key is not None:
+            self._buckets[key].remove(schedule_id)
+            self._day_masks.pop(key[2], None)
+
+    def overlapping(self, room: str, day: str, start: Union[str, dt_time], end: Union[str, dt_time],
+                    building: Optional[str] = None, exclude_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Schedules in the room on that day whose time overlaps [start, end).
+
+        Without a building every building's room of that name is checked; with
+        one, rows that have no building recorded are checked too.
+        """
+        self.queries += 1
+        day = _plain(day)
+        if building is None:
+            candidates = self._buildings.get((room, day), ())
+        else:
+            candidates = (building, None)
+        start, end = to_seconds(start), to_seconds(end)
+
+        found = []
+        for candidate in candidates:
+            bucket = self._buckets.get((room, candidate, day))
+            if bucket is not None:
+                found.extend(row for row in bucket.overlapping(start, end) if row['id'] != exclude_id)
+        return found
+
+    def room_day(self, room: str, day: str, building: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Every schedule in the room on that day"""
+        return self.overlapping(room, day, "00:00", "24:00", building=building)
+
+    def occupancy(self, room: str, day: str, building: Optional[str] = None,
+                  exclude_id: Optional[str] = None) -> int:
+        """Occupancy bitset of the room on that day, with the same building rules as ``overlapping``"""
+        return self._masks(room, _plain(day), building, exclude_id)[0]
+
+    def _masks(self, room: str, day: str, building: Optional[str], exclude_id: Optional[str]) -> Tuple[int, int]:
+        """(touched, fully covered) slot bitsets of the room on a plain-text day"""
+        candidates = self._buildings.get((room, day), ()) if building is None else (building, None)
+        mask = full = 0
+        for candidate in candidates:
+            bucket = self._buckets.get((room, candidate, day))
+            if bucket is None:
+                continue
+            if exclude_id in bucket.rows:
+                bucket_mask, bucket_full = bucket.masks(exclude_id)
+            else:
+                bucket_mask, bucket_full = bucket.mask, bucket.full
+            mask |= bucket_mask
+            full |= bucket_full
+        return mask, full
+
+    def rooms(self, building: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+        """Every (room, building) that has been scheduled; a name's unnamed building only if it has no other"""
+        found = []
+        for room, buildings in self._rooms.items():
+            named = buildings - {None}
+            for room_building in (named or {None}):
+                if building is None or room_building == building:
+                    found.append((room, room_building))
+        return sorted(found, key=lambda pair: (pair[1] or "", pair[0]))
+
+    def free_rooms(self, day: str, start: Union[str, dt_time], end: Union[str, dt_time],
+                   rooms: Optional[List[Tuple[str, Optional[str]]]] = None,
+                   exclude_id: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+        """Rooms with nothing overlapping [start, end) on that day.
+
+        A couple of ANDs of the window against each room's bitsets; only a
+        room whose sole collision is in a partly used slot (times off the
+        5-minute grid) gets an exact interval check.
+        """
+        day = _plain(day)
+        start, end = to_seconds(start), to_seconds(end)
+        window = slot_mask(start, end)
+        cached = self._day_masks.setdefault(day, {}) if exclude_id is None else {}
+        free = []
+        for pair in (self.rooms() if rooms is None else rooms):
+            room, building = pair
+            masks = cached.get(pair)
+            if masks is None:
+                masks = cached[pair] = self._masks(room, day, building, exclude_id)
+            mask, full = masks
+            if not mask & window:
+                free.append((room, building))
+            elif not full & window and not self.overlapping(room, day, start, end, building=building, exclude_id=exclude_id):
+                free.append((room, building))
+        return free
+
+    def nearest_free(self, room: str, day: str, duration: int, near: Union[str, dt_time],
+                     day_start: Union[str, dt_time], day_end: Union[str, dt_time],
+                     building: Optional[str] = None, exclude_id: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """Free [start, end) of ``duration`` seconds closest to ``near``, within the teaching day"""
+        hours = slot_mask(to_seconds(day_start), to_seconds(day_end))
+        free = ~self.occupancy(room, day, building, exclude_id) & hours
+        runs = runs_of(free, -(-duration // SLOT_SECONDS))
+        slot = nearest_bit(runs, to_seconds(near) // SLOT_SECONDS)
+        if slot is None:
+            return None
+        return slot * SLOT_SECONDS, slot * SLOT_SECONDS + duration
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "schedules": len(self._keys),
+            "room_days": len(self._buckets),
+            "rooms": len(self._rooms),
+            "loads": self.loads,
+            "queries": self.queries,
+            "age_seconds": None if self._loaded_at is None else round(time.monotonic() - self._loaded_at, 1)
+        }
+
+schedule_index = ScheduleIntervalIndex(ttl=settings.schedule_index_ttl_seconds)
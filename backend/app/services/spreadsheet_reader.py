@@ -0,0 +1,55 @@
+import csv
+import io
+import re
+from typing import IO, Any, Dict, Iterator, List, Tuple
+
+def normalize_header(header: Any) -> str:
+    """'First Name', 'firstName' and 'first_name' all become 'first_name'"""
+    text = str(header or "").strip()
+    text = re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', text)
+    return re.sub(r'[\s\-]+', '_', text).lower()
+
+def is_excel(filename: str) -> bool:
+    return (filename or "").lower().endswith(('.xlsx', '.xlsm'))
+
+def iter_rows(fileobj: IO[bytes], filename: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Stream (row_number, row) pairs from a CSV or XLSX upload.
+
+    Rows are read one at a time, so memory stays bounded regardless of file
+    size. Row numbers match what a user sees in a spreadsheet (header = 1).
+    Blank rows are skipped.
+    """
+    if is_excel(filename):
+        yield from _iter_xlsx(fileobj)
+    else:
+        yield from _iter_csv(fileobj)
+
+def _iter_csv(fileobj: IO[bytes]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text)
+        headers = [normalize_header(h) for h in next(reader, [])]
+        for row_num, values in enumerate(reader, start=2):
+            if not any(v.strip() for v in values):
+                continue
+            yield row_num, {h: v.strip() for h, v in zip(headers, values) if h}
+    finally:
+        # Leave the underlying upload open for the caller
+        text.detach()
+
+def _iter_xlsx(fileobj: IO[bytes]) -> Iterator[Tuple[int, Dict[str, str]]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers: List[str] = [normalize_header(h) for h in next(rows, ())]
+        for row_num, values in enumerate(rows, start=2):
+            if not any(v not in (None, "") for v in values):
+                continue
+            yield row_num, {
+                h: ("" if v is None else str(v).strip())
+                for h, v in zip(headers, values) if h
+            }
+    finally:
+        workbook.close()
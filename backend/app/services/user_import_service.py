@@ -0,0 +1,172 @@
+import asyncio
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, List, Tuple
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+from app.config import settings
+from app.database import get_database
+from app.models.user import UserCreate, BulkImportResult
+from app.services.auth_service import auth_service
+from app.services.email_service import email_service
+from app.services.matricule_allocator import matricule_allocator
+from app.services.password_hasher import PasswordHasher
+from app.services.spreadsheet_reader import iter_rows
+
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+class UserImportService:
+    def __init__(self):
+        self.db = get_database()
+        # bcrypt for a whole cohort is CPU bound: use processes, not threads
+        self.password_hasher = PasswordHasher(
+            max_workers=settings.user_import_hash_workers,
+            executor_type="process"
+        )
+
+    def _parse_row(self, raw: Dict[str, str]) -> UserCreate:
+        """Validate one spreadsheet row into a UserCreate"""
+        data: Dict[str, Any] = {key: value for key, value in raw.items() if value != ""}
+        data['generate_matricule'] = (
+            str(data.get('generate_matricule', '')).lower() in TRUE_VALUES
+            or not data.get('matricule')
+        )
+        if 'send_welcome_email' in data:
+            data['send_welcome_email'] = str(data['send_welcome_email']).lower() in TRUE_VALUES
+        if 'is_active' in data:
+            data['is_active'] = str(data['is_active']).lower() in TRUE_VALUES
+        if data['generate_matricule']:
+            # Assigned after validation so invalid rows don't consume numbers
+            data['matricule'] = "pending"
+        return UserCreate(**data)
+
+    async def import_users(self, file: UploadFile, created_by: str) -> BulkImportResult:
+        """Stream a CSV/XLSX upload into users with batched inserts"""
+        try:
+            seen_emails = set()
+            seen_matricules = set()
+            errors: List[dict] = []
+            created_users: List[dict] = []
+            batch: List[Tuple[int, UserCreate]] = []
+            total_rows = 0
+
+            loop = asyncio.get_running_loop()
+            rows = iter_rows(file.file, file.filename)
+            try:
+                while True:
+                    # Parse off the event loop, a batch of rows at a time
+                    chunk = await loop.run_in_executor(
+                        None, lambda: list(islice(rows, settings.user_import_batch_size))
+                    )
+                    if not chunk:
+                        break
+                    for row_num, raw in chunk:
+                        total_rows += 1
+                        try:
+                            user = self._parse_row(raw)
+                        except ValidationError as e:
+                            for error in e.errors():
+                                errors.append({
+                                    "row": row_num,
+                                    "field": str(error['loc'][0]) if error['loc'] else "general",
+                                    "message": error['msg']
+                                })
+                            continue
+
+                        if user.email.lower() in seen_emails:
+                            errors.append({"row": row_num, "field": "email", "message": "Duplicate email in file"})
+                            continue
+                        if user.generate_matricule:
+                            user.matricule = await matricule_allocator.allocate(user.role, user.department)
+                        elif user.matricule in seen_matricules:
+                            errors.append({"row": row_num, "field": "matricule", "message": "Duplicate matricule in file"})
+                            continue
+                        seen_emails.add(user.email.lower())
+                        seen_matricules.add(user.matricule)
+
+                        batch.append((row_num, user))
+                        if len(batch) >= settings.user_import_batch_size:
+                            await self._insert_batch(batch, created_users, errors)
+                            batch = []
+            finally:
+                rows.close()
+
+            if batch:
+                await self._insert_batch(batch, created_users, errors)
+
+            return BulkImportResult(
+                success=len(errors) == 0,
+                total_rows=total_rows,
+                success_count=len(created_users),
+                error_count=total_rows - len(created_users),
+                errors=errors,
+                created_users=created_users
+            )
+
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error importing users: {str(e)}")
+
+    async def _insert_batch(self, batch: List[Tuple[int, UserCreate]], created_users: List[dict], errors: List[dict]):
+        """Hash passwords in parallel and insert the batch in one statement"""
+        # Only generated passwords are sent back; admin-supplied ones are never echoed
+        generated = [user.password is None for _, user in batch]
+        passwords = [user.password or auth_service.generate_password() for _, user in batch]
+        hashes = await asyncio.gather(*(self.password_hasher.hash(p) for p in passwords))
+
+        now = datetime.utcnow().isoformat()
+        rows = [{
+            'id': str(uuid.uuid4()),
+            'matricule': user.matricule,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'email': user.email,
+            'phone': user.phone,
+            'password_hash': password_hash,
+            'role': user.role,
+            'department': user.department,
+            'specialty': user.specialty,
+            'level': user.level,
+            'is_active': user.is_active,
+            'status': user.status,
+            'is_first_login': True,
+            'created_at': now,
+            'updated_at': now
+        } for (_, user), password_hash in zip(batch, hashes)]
+
+        try:
+            await self.db.supabase.table('users').insert(rows).execute()
+            inserted = list(range(len(rows)))
+        except Exception:
+            # One bad row fails the whole statement; retry row by row to attribute errors
+            inserted = []
+            for index, row in enumerate(rows):
+                try:
+                    await self.db.supabase.table('users').insert(row).execute()
+                    inserted.append(index)
+                except Exception as e:
+                    errors.append({"row": batch[index][0], "field": "general", "message": str(e)})
+
+        for index in inserted:
+            _, user = batch[index]
+            temporary_password = passwords[index] if generated[index] else None
+            created_users.append({
+                "id": rows[index]['id'],
+                "matricule": user.matricule,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "role": user.role,
+                "password": temporary_password
+            })
+            if user.send_welcome_email:
+                email_service.queue_welcome_email(
+                    user.email,
+                    f"{user.first_name} {user.last_name}",
+                    user.matricule,
+                    temporary_password
+                )
+
+    def shutdown(self):
+        self.password_hasher.shutdown()
+
+user_import_service = UserImportService()
@@ -0,0 +1,57 @@
+from datetime import datetime
+from fastapi import HTTPException
+from app.database import get_database
+from app.models.user import UserResponse, UserStatus
+from app.services.auth_service import auth_service
+
+class UserService:
+    def __init__(self):
+        self.db = get_database()
+
+    async def update_user_status(self, user_id: str, new_status: UserStatus) -> UserResponse:
+        """Change a user's account status"""
+        try:
+            result = await self.db.supabase.table('users').update({
+                'status': new_status,
+                # Keep the flag login checks in step, so reactivating undoes deactivate_user
+                'is_active': new_status == UserStatus.ACTIVE,
+                'updated_at': datetime.utcnow().isoformat()
+            }).eq('id', user_id).execute()
+
+            if not result.data:
+                raise HTTPException(status_code=404, detail="User not found")
+
+            user = auth_service.user_from_row(result.data[0])
+            if new_status == UserStatus.ACTIVE:
+                auth_service.invalidate_user(matricule=user.matricule, user_id=user.id)
+            else:
+                await auth_service.revoke_tokens(user.id, user.matricule)
+            return user
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error updating user status: {str(e)}")
+
+    async def deactivate_user(self, user_id: str) -> UserResponse:
+        """Deactivate a user account"""
+        try:
+            result = await self.db.supabase.table('users').update({
+                'is_active': False,
+                'status': UserStatus.INACTIVE,
+                'updated_at': datetime.utcnow().isoformat()
+            }).eq('id', user_id).execute()
+
+            if not result.data:
+                raise HTTPException(status_code=404, detail="User not found")
+
+            user = auth_service.user_from_row(result.data[0])
+            await auth_service.revoke_tokens(user.id, user.matricule)
+            return user
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error deactivating user: {str(e)}")
+
+user_service = UserService()
@@ -1,7 +1,13 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
 from datetime import datetime
 from fastapi import HTTPException, status
-from app.database import get_database
+from app.database import get_database, returning
+from app.dataloader import load_row, invalidate_row
+from app.etag import row_versions
+from app.fieldsets import SESSION_FIELDS, USER_SUMMARY, Selection
+from app.pagination import SESSION_SORT, apply_page
+from app.tracing import traced
+from app.services.course_service import course_service
 from app.models.virtual_classroom import (
     VirtualClassroomCreate, VirtualClassroomUpdate, VirtualClassroomResponse,
     SessionStatus, AttendanceRecord, SessionRecordingRequest
@@ -10,6 +16,11 @@ from app.models.user import UserResponse
 import uuid
 import hashlib
 
+# Just enough of a page to tell whether it changed, for ETags; aliased so it
+# can be added to any sparse select without clashing with its embeds
+SESSION_VERSION_SELECT = 'id, updated_at, course_version:course_id(updated_at), instructor_version:instructor_id(updated_at)'
+SESSION_VERSION_EMBEDS = ('course_version', 'instructor_version')
+
 class VirtualClassroomService:
     def __init__(self):
         self.db = get_database()
@@ -27,15 +38,11 @@ class VirtualClassroomService:
     async def create_session(self, session_data: VirtualClassroomCreate, created_by: str) -> VirtualClassroomResponse:
         """Create a new virtual classroom session"""
         try:
-            # Get course information
-            course_result = self.db.supabase.table('courses').select('*').eq('id', session_data.course_id).execute()
-            if not course_result.data:
-                raise HTTPException(status_code=404, detail="Course not found")
-            
-            course = course_result.data[0]
+            # Get course information (served from the course cache when warm)
+            course = await course_service.get_course(session_data.course_id)
             
             # Generate unique room ID
-            room_id = self.generate_room_id(course['code'], session_data.title)
+            room_id = self.generate_room_id(course.code, session_data.title)
             
             # Create session in database
             session_dict = {
@@ -62,136 +69,161 @@ class VirtualClassroomService:
                 'updated_at': datetime.utcnow().isoformat()
             }
             
-            result = self.db.supabase.table('virtual_classrooms').insert(session_dict).execute()
+            result = await returning(
+                self.db.supabase.table('virtual_classrooms').insert(session_dict),
+                SESSION_FIELDS.default().select()
+            ).execute()
             
             if not result.data:
                 raise HTTPException(status_code=500, detail="Failed to create session")
             
-            return await self.get_session(result.data[0]['id'])
+            # Fill embeds the representation lacks from what is already loaded
+            created = result.data[0]
+            if not created.get('courses'):
+                created['courses'] = {'id': course.id, 'name': course.name, 'code': course.code}
+            if not created.get('instructors') and created.get('instructor_id'):
+                created['instructors'] = await load_row(self.db.supabase, 'users', created['instructor_id'], USER_SUMMARY)
+            
+            return self._session_response(created)
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error creating session: {str(e)}")
     
-    async def get_session(self, session_id: str) -> VirtualClassroomResponse:
+    def _session_response(self, session_data: Dict[str, Any]) -> VirtualClassroomResponse:
+        """Build a VirtualClassroomResponse from a session row with its embeds"""
+        return VirtualClassroomResponse(
+            id=session_data['id'],
+            title=session_data['title'],
+            course_id=session_data['course_id'],
+            instructor_id=session_data['instructor_id'],
+            description=session_data.get('description'),
+            scheduled_start=session_data['scheduled_start'],
+            scheduled_end=session_data['scheduled_end'],
+            max_participants=session_data['max_participants'],
+            target_specialties=session_data.get('target_specialties', []),
+            target_level=session_data.get('target_level'),
+            auto_attendance_enabled=session_data['auto_attendance_enabled'],
+            notifications_enabled=session_data['notifications_enabled'],
+            transcription_enabled=session_data['transcription_enabled'],
+            subtitles_enabled=session_data['subtitles_enabled'],
+            jitsi_room_id=session_data['jitsi_room_id'],
+            status=session_data['status'],
+            actual_start=session_data.get('actual_start'),
+            actual_end=session_data.get('actual_end'),
+            participants=session_data['participants'],
+            is_recording=session_data['is_recording'],
+            recording_id=session_data.get('recording_id'),
+            created_by=session_data['created_by'],
+            created_at=session_data['created_at'],
+            updated_at=session_data['updated_at'],
+            course=session_data.get('courses'),
+            instructor=session_data.get('instructors')
+        )
+    
+    def _session_output(self, session_data: Dict[str, Any], selection: Selection) -> Union[VirtualClassroomResponse, Dict[str, Any]]:
+        if selection.sparse:
+            return selection.shape(session_data)
+        return self._session_response(session_data)
+    
+    async def get_session(self, session_id: str, selection: Optional[Selection] = None) -> Union[VirtualClassroomResponse, Dict[str, Any]]:
         """Get session by ID with related data"""
         try:
-            # Get session with course and instructor data
-            result = self.db.supabase.table('virtual_classrooms').select('''
-                *,
-                courses:course_id(*),
-                instructors:instructor_id(*)
-            ''').eq('id', session_id).execute()
+            # Get session with course and instructor data; repeated loads within
+            # one request (route permission check, then the service) share a fetch
+            selection = selection or SESSION_FIELDS.default()
+            session_data = await traced('session', load_row(self.db.supabase, 'virtual_classrooms', session_id, selection.select()))
             
-            if not result.data:
+            if not session_data:
                 raise HTTPException(status_code=404, detail="Session not found")
             
-            session_data = result.data[0]
-            
-            return VirtualClassroomResponse(
-                id=session_data['id'],
-                title=session_data['title'],
-                course_id=session_data['course_id'],
-                instructor_id=session_data['instructor_id'],
-                description=session_data.get('description'),
-                scheduled_start=session_data['scheduled_start'],
-                scheduled_end=session_data['scheduled_end'],
-                max_participants=session_data['max_participants'],
-                target_specialties=session_data.get('target_specialties', []),
-                target_level=session_data.get('target_level'),
-                auto_attendance_enabled=session_data['auto_attendance_enabled'],
-                notifications_enabled=session_data['notifications_enabled'],
-                transcription_enabled=session_data['transcription_enabled'],
-                subtitles_enabled=session_data['subtitles_enabled'],
-                jitsi_room_id=session_data['jitsi_room_id'],
-                status=session_data['status'],
-                actual_start=session_data.get('actual_start'),
-                actual_end=session_data.get('actual_end'),
-                participants=session_data['participants'],
-                is_recording=session_data['is_recording'],
-                recording_id=session_data.get('recording_id'),
-                created_by=session_data['created_by'],
-                created_at=session_data['created_at'],
-                updated_at=session_data['updated_at'],
-                course=session_data.get('courses'),
-                instructor=session_data.get('instructors')
-            )
+            return self._session_output(session_data, selection)
             
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching session: {str(e)}")
     
+    def _sessions_query(self, user: UserResponse, select: str, status: Optional[str], course_id: Optional[str],
+                        limit: int, offset: int, cursor: Optional[str]):
+        """Filtered, paginated session query shared by get_sessions and its ETag probe"""
+        query = self.db.supabase.table('virtual_classrooms').select(select)
+        
+        # Apply role-based filtering
+        if user.role == "student":
+            # Students see sessions for their specialty and level
+            if user.specialty:
+                query = query.contains('target_specialties', [user.specialty])
+            if user.level:
+                query = query.eq('target_level', user.level)
+        elif user.role == "lecturer":
+            # Lecturers see all sessions but can only manage their own
+            pass  # No additional filtering for lecturers
+        # Admins see all sessions
+        
+        # Apply additional filters
+        if status:
+            query = query.eq('status', status)
+        if course_id:
+            query = query.eq('course_id', course_id)
+        
+        # Apply pagination, by (scheduled_start, id) keyset when a cursor is given
+        return apply_page(query, SESSION_SORT, limit, offset, cursor)
+    
+    async def session_versions(self, 
+                               user: UserResponse,
+                               status: Optional[str] = None,
+                               course_id: Optional[str] = None,
+                               limit: int = 50,
+                               offset: int = 0,
+                               cursor: Optional[str] = None) -> List[Any]:
+        """Fingerprint of the page get_sessions would return, from ids and timestamps only"""
+        try:
+            query = self._sessions_query(user, SESSION_VERSION_SELECT, status, course_id, limit, offset, cursor)
+            result = await query.execute()
+            return row_versions(result.data, SESSION_VERSION_EMBEDS)
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching sessions: {str(e)}")
+    
     async def get_sessions(self, 
                           user: UserResponse,
                           status: Optional[str] = None,
                           course_id: Optional[str] = None,
                           limit: int = 50,
-                          offset: int = 0) -> List[VirtualClassroomResponse]:
+                          offset: int = 0,
+                          cursor: Optional[str] = None,
+                          selection: Optional[Selection] = None) -> List[Union[VirtualClassroomResponse, Dict[str, Any]]]:
         """Get sessions based on user role and filters"""
+        _, sessions = await self.session_page(user, status, course_id, limit, offset, cursor, selection)
+        return sessions
+    
+    async def session_page(self, 
+                           user: UserResponse,
+                           status: Optional[str] = None,
+                           course_id: Optional[str] = None,
+                           limit: int = 50,
+                           offset: int = 0,
+                           cursor: Optional[str] = None,
+                           selection: Optional[Selection] = None) -> Tuple[List[Any], List[Union[VirtualClassroomResponse, Dict[str, Any]]]]:
+        """A page of get_sessions with the session_versions fingerprint of the same rows"""
         try:
-            query = self.db.supabase.table('virtual_classrooms').select('''
-                *,
-                courses:course_id(*),
-                instructors:instructor_id(*)
-            ''')
-            
-            # Apply role-based filtering
-            if user.role == "student":
-                # Students see sessions for their specialty and level
-                if user.specialty:
-                    query = query.contains('target_specialties', [user.specialty])
-                if user.level:
-                    query = query.eq('target_level', user.level)
-            elif user.role == "lecturer":
-                # Lecturers see all sessions but can only manage their own
-                pass  # No additional filtering for lecturers
-            # Admins see all sessions
-            
-            # Apply additional filters
-            if status:
-                query = query.eq('status', status)
-            if course_id:
-                query = query.eq('course_id', course_id)
-            
-            # Apply pagination
-            query = query.range(offset, offset + limit - 1)
-            query = query.order('scheduled_start', desc=True)
-            
-            result = query.execute()
+            selection = selection or SESSION_FIELDS.default()
+            select = f"{selection.select()}, {SESSION_VERSION_SELECT}"
+            query = self._sessions_query(user, select, status, course_id, limit, offset, cursor)
+            result = await query.execute()
             
             sessions = []
             for session_data in result.data:
-                sessions.append(VirtualClassroomResponse(
-                    id=session_data['id'],
-                    title=session_data['title'],
-                    course_id=session_data['course_id'],
-                    instructor_id=session_data['instructor_id'],
-                    description=session_data.get('description'),
-                    scheduled_start=session_data['scheduled_start'],
-                    scheduled_end=session_data['scheduled_end'],
-                    max_participants=session_data['max_participants'],
-                    target_specialties=session_data.get('target_specialties', []),
-                    target_level=session_data.get('target_level'),
-                    auto_attendance_enabled=session_data['auto_attendance_enabled'],
-                    notifications_enabled=session_data['notifications_enabled'],
-                    transcription_enabled=session_data['transcription_enabled'],
-                    subtitles_enabled=session_data['subtitles_enabled'],
-                    jitsi_room_id=session_data['jitsi_room_id'],
-                    status=session_data['status'],
-                    actual_start=session_data.get('actual_start'),
-                    actual_end=session_data.get('actual_end'),
-                    participants=session_data['participants'],
-                    is_recording=session_data['is_recording'],
-                    recording_id=session_data.get('recording_id'),
-                    created_by=session_data['created_by'],
-                    created_at=session_data['created_at'],
-                    updated_at=session_data['updated_at'],
-                    course=session_data.get('courses'),
-                    instructor=session_data.get('instructors')
-                ))
-            
-            return sessions
+                sessions.append(self._session_output(session_data, selection))
+            
+            return row_versions(result.data, SESSION_VERSION_EMBEDS), sessions
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error fetching sessions: {str(e)}")
     
@@ -203,7 +235,7 @@ class VirtualClassroomService:
             
             # Update session status if it's the first participant
             if session.participants == 0 and session.status == SessionStatus.SCHEDULED:
-                self.db.supabase.table('virtual_classrooms').update({
+                await self.db.supabase.table('virtual_classrooms').update({
                     'status': SessionStatus.LIVE,
                     'actual_start': datetime.utcnow().isoformat(),
                     'updated_at': datetime.utcnow().isoformat()
@@ -222,13 +254,14 @@ class VirtualClassroomService:
                 'created_at': datetime.utcnow().isoformat()
             }
             
-            self.db.supabase.table('attendance_records').insert(attendance_record).execute()
+            await self.db.supabase.table('attendance_records').insert(attendance_record).execute()
             
             # Update participant count
-            self.db.supabase.table('virtual_classrooms').update({
+            await self.db.supabase.table('virtual_classrooms').update({
                 'participants': session.participants + 1,
                 'updated_at': datetime.utcnow().isoformat()
             }).eq('id', session_id).execute()
+            invalidate_row('virtual_classrooms', session_id)
             
             return {
                 'session_id': session_id,
@@ -246,7 +279,7 @@ class VirtualClassroomService:
         """Handle user leaving a session"""
         try:
             # Update attendance record
-            self.db.supabase.table('attendance_records').update({
+            await self.db.supabase.table('attendance_records').update({
                 'disconnect_time': datetime.utcnow().isoformat(),
                 'updated_at': datetime.utcnow().isoformat()
             }).eq('session_id', session_id).eq('user_id', user_id).is_('disconnect_time', 'null').execute()
@@ -268,7 +301,8 @@ class VirtualClassroomService:
                     'actual_end': datetime.utcnow().isoformat()
                 })
             
-            self.db.supabase.table('virtual_classrooms').update(update_data).eq('id', session_id).execute()
+            await self.db.supabase.table('virtual_classrooms').update(update_data).eq('id', session_id).execute()
+            invalidate_row('virtual_classrooms', session_id)
             
             return {
                 'session_id': session_id,
@@ -287,11 +321,12 @@ class VirtualClassroomService:
             recording_id = str(uuid.uuid4())
             
             # Update session with recording info
-            self.db.supabase.table('virtual_classrooms').update({
+            await self.db.supabase.table('virtual_classrooms').update({
                 'is_recording': True,
                 'recording_id': recording_id,
                 'updated_at': datetime.utcnow().isoformat()
             }).eq('id', session_id).execute()
+            invalidate_row('virtual_classrooms', session_id)
             
             # Create recording record
             recording_record = {
@@ -305,7 +340,7 @@ class VirtualClassroomService:
                 'created_at': datetime.utcnow().isoformat()
             }
             
-            self.db.supabase.table('session_recordings').insert(recording_record).execute()
+            await self.db.supabase.table('session_recordings').insert(recording_record).execute()
             
             return {
                 'recording_id': recording_id,
@@ -320,7 +355,7 @@ class VirtualClassroomService:
         """Stop recording a session"""
         try:
             # Get current recording
-            recording_result = self.db.supabase.table('session_recordings').select('*').eq('session_id', session_id).eq('status', 'recording').execute()
+            recording_result = await self.db.supabase.table('session_recordings').select('*').eq('session_id', session_id).eq('status', 'recording').execute()
             
             if not recording_result.data:
                 raise HTTPException(status_code=404, detail="No active recording found")
@@ -328,17 +363,18 @@ class VirtualClassroomService:
             recording = recording_result.data[0]
             
             # Update recording status
-            self.db.supabase.table('session_recordings').update({
+            await self.db.supabase.table('session_recordings').update({
                 'status': 'completed',
                 'ended_at': datetime.utcnow().isoformat(),
                 'updated_at': datetime.utcnow().isoformat()
             }).eq('id', recording['id']).execute()
             
             # Update session
-            self.db.supabase.table('virtual_classrooms').update({
+            await self.db.supabase.table('virtual_classrooms').update({
                 'is_recording': False,
                 'updated_at': datetime.utcnow().isoformat()
             }).eq('id', session_id).execute()
+            invalidate_row('virtual_classrooms', session_id)
             
             return {
                 'recording_id': recording['id'],
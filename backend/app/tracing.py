@@ -0,0 +1,43 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+class RequestTrace:
+    """Timings of the sub-queries one request fans out to"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def record(self, name: str, started: float, ended: float):
+        self.spans.append((name, started - self.started, ended - started))
+
+    def server_timing(self) -> str:
+        """Render spans as a Server-Timing header; desc is the start offset"""
+        total = time.perf_counter() - self.started
+        entries = [
+            f'{name};desc="+{offset * 1000:.1f}ms";dur={duration * 1000:.1f}'
+            for name, offset, duration in self.spans
+        ]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+request_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+async def traced(name: str, awaitable: Awaitable[Any]) -> Any:
+    """Await and, inside a traced request, record how long it took"""
+    trace = request_trace.get()
+    if trace is None:
+        return await awaitable
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        trace.record(name, started, time.perf_counter())
+
+async def fan_out(**named: Awaitable[Any]) -> Dict[str, Any]:
+    """Run independent sub-queries concurrently and return results by name"""
+    names = list(named)
+    results = await asyncio.gather(*(traced(name, named[name]) for name in names))
+    return dict(zip(names, results))
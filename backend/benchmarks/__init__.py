@@ -0,0 +1 @@
+# Backend benchmarks (run from the backend directory, e.g. `python -m benchmarks.login_benchmark`)
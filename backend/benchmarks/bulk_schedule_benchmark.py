@@ -0,0 +1,103 @@
+"""Bulk schedule creation: a create per row vs one validated multi-row insert.
+
+``per-row`` replays the old ``bulk_create_schedules`` (a conflict query, an
+insert and a re-fetch for every row, the batch never checked against
+itself); ``batch`` is ``CourseScheduleService.bulk_create_schedules``. The
+batch run must reject every row that overlaps an existing schedule or an
+earlier accepted row of the same batch.
+
+    python -m benchmarks.bulk_schedule_benchmark --rows 300 --latency-ms 5
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import time as dt_time
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.conflict_check_benchmark import DAYS, make_schedules, query_and_scan
+from benchmarks.fake_db import FakeDatabase
+
+from app.models.course_schedule import BulkRowStatus, CourseScheduleCreate, ScheduleConflictCheck
+from app.services.course_schedule_service import CourseScheduleService
+from app.services.schedule_index import schedule_index
+
+def make_batch(rooms: int, count: int):
+    batch = []
+    for _ in range(count):
+        start = 7 * 60 + random.randrange(0, 12 * 60, 15)
+        batch.append(CourseScheduleCreate(
+            course_id="course-new", day=random.choice(DAYS), room=f"Room {random.randrange(rooms):03d}",
+            start_time=dt_time(start // 60, start % 60), end_time=dt_time(min(start // 60 + 1, 23), start % 60),
+            type="lecture"
+        ))
+    return batch
+
+def expected_statuses(existing, batch):
+    """Brute-force reference: earlier accepted rows and existing rows block a row"""
+    def overlaps(a_start, a_end, b_start, b_end):
+        return a_start < b_end and b_start < a_end
+
+    accepted, statuses = [], []
+    for row in batch:
+        start, end = row.start_time.isoformat(), row.end_time.isoformat()
+        clash = any(
+            s['room'] == row.room and s['day'] == row.day.value and overlaps(start, end, s['start_time'], s['end_time'])
+            for s in existing
+        ) or any(
+            a.room == row.room and a.day == row.day and overlaps(row.start_time, row.end_time, a.start_time, a.end_time)
+            for a in accepted
+        )
+        statuses.append(BulkRowStatus.CONFLICT if clash else BulkRowStatus.CREATED)
+        if not clash:
+            accepted.append(row)
+    return statuses
+
+async def per_row(db: FakeDatabase, batch):
+    for row in batch:
+        await query_and_scan(db, ScheduleConflictCheck(
+            course_id=row.course_id, day=row.day, start_time=row.start_time, end_time=row.end_time, room=row.room
+        ))
+        payload = {'id': f"p-{id(row)}", 'course_id': row.course_id, 'day': row.day.value, 'room': row.room,
+                   'start_time': row.start_time.isoformat(), 'end_time': row.end_time.isoformat()}
+        await db.table('course_schedules').insert(payload).execute()
+        await db.table('course_schedules').select('*').eq('id', payload['id']).execute()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--per-room-day", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated DB latency")
+    args = parser.parse_args()
+    random.seed(7)
+
+    existing = make_schedules(args.rooms, args.per_room_day)
+    batch = make_batch(args.rooms, args.rows)
+    print(f"{len(existing)} schedules, {args.rows}-row batch, {args.latency_ms:.1f} ms simulated latency")
+
+    db = FakeDatabase({'course_schedules': [dict(row) for row in existing]}, latency=args.latency_ms / 1000)
+    started = time.perf_counter()
+    await per_row(db, batch)
+    print(f"per-row  {(time.perf_counter() - started) * 1000:9.1f} ms  db calls {db.calls:5d}")
+
+    db = FakeDatabase({'courses': [{'id': "course-new", 'name': "New", 'code': "NEW"}],
+                       'course_schedules': [dict(row) for row in existing]}, latency=args.latency_ms / 1000)
+    service = CourseScheduleService()
+    service.db = db
+    await schedule_index.load(db.supabase)
+    calls_before = db.calls
+    started = time.perf_counter()
+    result = await service.bulk_create_schedules(batch, "admin")
+    print(
+        f"batch    {(time.perf_counter() - started) * 1000:9.1f} ms  db calls {db.calls - calls_before:5d}  "
+        f"created {result.created_count}, conflicts {result.conflict_count}"
+    )
+
+    if [row.status for row in result.results] != expected_statuses(existing, batch):
+        print("FAIL: batch statuses disagree with the brute-force reference")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""Schedule conflict checks: per-check query and scan vs the interval index.
+
+``query+scan`` replays the old ``check_conflicts`` (select every schedule of
+the day and room, ``strptime`` each row, test overlaps linearly); ``index``
+is ``CourseScheduleService.check_conflicts`` on the in-memory interval index,
+loaded once up front. Both must report the same conflicts.
+
+    python -m benchmarks.conflict_check_benchmark --rooms 40 --per-room-day 12 --checks 2000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, time as dt_time
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.fake_db import FakeDatabase
+
+from app.models.course_schedule import ScheduleConflictCheck
+from app.services.course_schedule_service import CourseScheduleService
+from app.services.schedule_index import schedule_index
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
+
+def make_schedules(rooms: int, per_room_day: int):
+    rows = []
+    for r in range(rooms):
+        for day in DAYS:
+            for i in range(per_room_day):
+                start = 7 * 60 + random.randrange(0, 12 * 60, 15)
+                end = min(start + random.choice((60, 90, 120, 180)), 22 * 60)
+                rows.append({
+                    'id': f"s-{r}-{day}-{i}", 'course_id': f"course-{i}", 'day': day,
+                    'start_time': f"{start // 60:02d}:{start % 60:02d}:00", 'end_time': f"{end // 60:02d}:{end % 60:02d}:00",
+                    'room': f"Room {r:03d}", 'building': None, 'type': "lecture"
+                })
+    return rows
+
+def make_checks(rooms: int, count: int):
+    checks = []
+    for _ in range(count):
+        start = 7 * 60 + random.randrange(0, 12 * 60, 15)
+        checks.append(ScheduleConflictCheck(
+            course_id="course-new", day=random.choice(DAYS), room=f"Room {random.randrange(rooms):03d}",
+            start_time=dt_time(start // 60, start % 60), end_time=dt_time(min(start // 60 + 2, 23), start % 60)
+        ))
+    return checks
+
+async def query_and_scan(db: FakeDatabase, check: ScheduleConflictCheck):
+    result = await db.table('course_schedules').select('*').eq('day', check.day).eq('room', check.room).execute()
+    conflicts = []
+    for existing in result.data:
+        existing_start = datetime.strptime(existing['start_time'], '%H:%M:%S').time()
+        existing_end = datetime.strptime(existing['end_time'], '%H:%M:%S').time()
+        if check.start_time < existing_end and check.end_time > existing_start:
+            conflicts.append(existing)
+    return conflicts
+
+async def measure(label: str, check_one, checks, db: FakeDatabase):
+    calls_before = db.calls
+    found = []
+    started = time.perf_counter()
+    for check in checks:
+        found.append(sorted(row['id'] for row in await check_one(check)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<11} {elapsed / len(checks) * 1e6:9.1f} us/check  "
+        f"db calls {db.calls - calls_before:5d}  {elapsed * 1000:8.1f} ms total"
+    )
+    return found
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--per-room-day", type=int, default=12)
+    parser.add_argument("--checks", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated DB latency")
+    args = parser.parse_args()
+    random.seed(7)
+
+    rows = make_schedules(args.rooms, args.per_room_day)
+    checks = make_checks(args.rooms, args.checks)
+    db = FakeDatabase({'course_schedules': rows}, latency=args.latency_ms / 1000)
+    print(f"{len(rows)} schedules, {args.checks} checks, {args.latency_ms:.1f} ms simulated latency")
+
+    baseline = await measure("query+scan", lambda check: query_and_scan(db, check), checks, db)
+
+    service = CourseScheduleService()
+    service.db = db
+    started = time.perf_counter()
+    await schedule_index.load(db.supabase)
+    print(f"index load  {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+    async def indexed(check):
+        return [row for conflict in await service.check_conflicts(check) for row in conflict['conflicting_schedules']]
+
+    found = await measure("index", indexed, checks, db)
+    if found != baseline:
+        print("FAIL: index and query+scan disagree")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
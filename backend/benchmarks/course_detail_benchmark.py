@@ -0,0 +1,59 @@
+"""Course detail latency: sequential sub-queries vs concurrent fan-out.
+
+``sequential`` replays the old ``get_course`` (course, then schedules, then
+materials); ``fan-out`` is ``CourseService.get_course`` with the batched
+strategy, which issues the three queries at once; ``embedded`` folds them
+into a single round trip. Fan-out latency should track the slowest query
+rather than the sum.
+
+    python -m benchmarks.course_detail_benchmark --latency-ms 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.course_page_benchmark import make_tables
+from benchmarks.fake_db import FakeDatabase
+
+from app.config import settings
+from app.services.course_cache import course_cache
+from app.services.course_service import CourseService
+
+async def sequential_get_course(service: CourseService, course_id: str):
+    course = await service.db.supabase.table('courses').select('*').eq('id', course_id).execute()
+    schedules = await service.db.supabase.table('course_schedules').select('*').eq('course_id', course_id).execute()
+    materials = await service.db.supabase.table('course_materials').select('*').eq('course_id', course_id).execute()
+    course_data = dict(course.data[0], course_schedules=schedules.data, course_materials=materials.data)
+    return service._course_response(course_data)
+
+async def measure(label: str, fetch, service: CourseService, iterations: int):
+    timings = []
+    for i in range(iterations):
+        # Measure the uncached path
+        await course_cache.invalidate()
+        started = time.perf_counter()
+        await fetch(f"course-{i % 10}")
+        timings.append(time.perf_counter() - started)
+    print(f"{label:<11} p50 {statistics.median(timings) * 1000:7.1f} ms  db calls {service.db.calls}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated DB latency")
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    for label, strategy in (("sequential", "batched"), ("fan-out", "batched"), ("embedded", "embedded")):
+        settings.course_children_strategy = strategy
+        service = CourseService()
+        service.db = FakeDatabase(make_tables(10), latency=latency)
+        if label == "sequential":
+            fetch = lambda course_id, s=service: sequential_get_course(s, course_id)
+        else:
+            fetch = service.get_course
+        await measure(label, fetch, service, args.iterations)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""DB round trips per ``CourseService.get_courses`` page.
+
+Guards against N+1 regressions: the number of queries for a page must not
+grow with the page size. Exits non-zero if it does.
+
+    python -m benchmarks.course_page_benchmark --sizes 10 50 100
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.fake_db import FakeDatabase
+
+from app.config import settings
+from app.models.user import UserResponse
+from app.services.course_cache import course_cache
+from app.services.course_service import CourseService
+
+def make_tables(courses: int):
+    now = datetime.utcnow().isoformat()
+    course_rows, schedule_rows, material_rows = [], [], []
+    for i in range(courses):
+        course_id = f"course-{i}"
+        course_rows.append({
+            'id': course_id, 'name': f"Course {i:04d}", 'code': f"CS{i:04d}", 'credits': 3,
+            'description': None, 'is_shared': False, 'target_level': 3, 'lecturer_id': "lecturer-1",
+            'specialties': ["Software Engineering"], 'created_at': now, 'updated_at': now
+        })
+        for day in ("Monday", "Wednesday"):
+            schedule_rows.append({
+                'id': f"{course_id}-{day}", 'course_id': course_id, 'day': day,
+                'start_time': "08:00:00", 'end_time': "10:00:00", 'room': "Room C-301", 'type': "lecture",
+                'created_at': now, 'updated_at': now
+            })
+        material_rows.append({
+            'id': f"{course_id}-m", 'course_id': course_id, 'title': "Syllabus", 'type': "pdf",
+            'url': "https://example.com/syllabus.pdf", 'uploaded_at': now
+        })
+    return {'courses': course_rows, 'course_schedules': schedule_rows, 'course_materials': material_rows}
+
+ADMIN = UserResponse(
+    id="admin-1", matricule="24ADM001", first_name="Bench", last_name="Admin", email="admin@university.cm",
+    role="admin", name="Bench Admin", is_first_login=False,
+    created_at=datetime.utcnow(), updated_at=datetime.utcnow()
+)
+
+async def measure(strategy: str, size: int, latency: float):
+    settings.course_children_strategy = strategy
+    service = CourseService()
+    service.db = FakeDatabase(make_tables(size), latency=latency)
+    # Measure the uncached path
+    await course_cache.invalidate()
+    started = time.perf_counter()
+    courses = await service.get_courses(ADMIN, limit=size)
+    elapsed = time.perf_counter() - started
+    assert len(courses) == size
+    return service.db.calls, elapsed
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated DB latency")
+    args = parser.parse_args()
+
+    failed = False
+    for strategy in ("batched", "embedded"):
+        calls_seen = set()
+        for size in args.sizes:
+            calls, elapsed = await measure(strategy, size, args.latency_ms / 1000)
+            calls_seen.add(calls)
+            print(
+                f"{strategy:<9} page {size:4d}  db calls {calls:3d} "
+                f"(per-course loading: {2 * size + 1:4d})  {elapsed * 1000:7.1f} ms"
+            )
+        if len(calls_seen) != 1:
+            print(f"FAIL: {strategy} query count grows with page size: {sorted(calls_seen)}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""Concurrent request throughput: blocking Supabase client vs async layer.
+
+Each simulated request runs the three lookups ``get_current_user`` plus a
+typical course read make. ``blocking`` replays them through a client whose
+``execute()`` sleeps on the event loop (the old synchronous supabase-py
+behaviour); ``async`` awaits them. ``--http`` runs the async case through the
+real ``AsyncPostgrestClient`` from ``app.database`` against an in-process
+httpx transport, so request building and response parsing are included.
+
+    python -m benchmarks.db_concurrency_benchmark --requests 500 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.fake_db import FakeDatabase
+
+QUERIES_PER_REQUEST = 3
+
+async def handle_request(client, i: int):
+    await client.table('users').select('*').eq('matricule', f"24STU{i:04d}").execute()
+    await client.table('courses').select('*').eq('id', f"course-{i % 50}").execute()
+    await client.table('course_schedules').select('*').eq('course_id', f"course-{i % 50}").execute()
+
+async def run(label: str, client, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await handle_request(client, i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<10} {requests / elapsed:8.1f} req/s  "
+        f"{requests * QUERIES_PER_REQUEST / elapsed:8.1f} queries/s  "
+        f"wall {elapsed:6.2f} s"
+    )
+
+def http_client(latency: float):
+    import httpx
+    from app.database import create_rest_client
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        return httpx.Response(200, content=json.dumps([]), headers={"Content-Type": "application/json"})
+
+    client = create_rest_client("bench")
+    client.session = httpx.AsyncClient(
+        base_url=client.session.base_url,
+        headers=client.session.headers,
+        transport=httpx.MockTransport(handler)
+    )
+    return client
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated PostgREST round trip")
+    parser.add_argument("--http", action="store_true", help="use AsyncPostgrestClient over a mock transport")
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    await run("blocking", FakeDatabase(latency=latency, blocking=True), args.requests, args.concurrency)
+    if args.http:
+        client = http_client(latency)
+        await run("async", client, args.requests, args.concurrency)
+        await client.aclose()
+    else:
+        await run("async", FakeDatabase(latency=latency), args.requests, args.concurrency)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""In-memory stand-in for the Supabase client used by the benchmarks.
+
+Only the query-builder calls the services actually make are supported.
+Every ``execute()`` waits ``latency`` seconds to model a PostgREST round
+trip and is counted in ``FakeDatabase.calls``. With ``blocking=True`` the
+wait is a ``time.sleep`` that stalls the event loop, which is how the old
+synchronous supabase-py client behaved inside ``async def`` handlers.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+class FakeResult:
+    def __init__(self, data: List[Dict[str, Any]], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+class FakeQuery:
+    def __init__(self, db: "FakeDatabase", table: str):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.payload = None
+        self.operation = "select"
+        self.window = (0, None)
+
+    def select(self, *columns, count=None):
+        self.operation = "select"
+        return self
+
+    def insert(self, payload):
+        self.operation = "insert"
+        self.payload = payload if isinstance(payload, list) else [payload]
+        return self
+
+    def update(self, payload):
+        self.operation = "update"
+        self.payload = payload
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def contains(self, column, values):
+        self.filters.append(lambda row: set(values) <= set(row.get(column) or []))
+        return self
+
+    def returning(self, columns):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end + 1)
+        return self
+
+    def limit(self, size):
+        self.window = (0, size)
+        return self
+
+    def _matches(self, row):
+        return all(f(row) for f in self.filters)
+
+    async def execute(self) -> FakeResult:
+        self.db.calls += 1
+        if self.db.latency:
+            if self.db.blocking:
+                time.sleep(self.db.latency)
+            else:
+                await asyncio.sleep(self.db.latency)
+
+        rows = self.db.tables.setdefault(self.table, [])
+        if self.operation == "insert":
+            rows.extend(dict(row) for row in self.payload)
+            return FakeResult([dict(row) for row in self.payload])
+
+        matched = [row for row in rows if self._matches(row)]
+        if self.operation == "update":
+            for row in matched:
+                row.update(self.payload)
+        elif self.operation == "delete":
+            self.db.tables[self.table] = [row for row in rows if not self._matches(row)]
+        else:
+            total = len(matched)
+            return FakeResult([dict(row) for row in matched[slice(*self.window)]], count=total)
+        return FakeResult([dict(row) for row in matched], count=len(matched))
+
+class FakeDatabase:
+    def __init__(self, tables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                 latency: float = 0.0, blocking: bool = False):
+        self.tables = tables or {}
+        self.latency = latency
+        self.blocking = blocking
+        self.calls = 0
+        self.supabase = self
+        self.admin_client = self
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
@@ -0,0 +1,71 @@
+"""Free-room and free-slot search: per-room checks vs occupancy bitsets.
+
+``per-room`` asks the interval index about each room in turn (what
+``get_available_rooms`` did, minus its query per room); ``bitset`` is
+``ScheduleIntervalIndex.free_rooms``, one AND per room. Both must return the
+same rooms. ``nearest`` times ``nearest_free`` for a slot of each length.
+
+    python -m benchmarks.free_room_benchmark --rooms 400 --per-room-day 6 --queries 2000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.conflict_check_benchmark import DAYS, make_schedules
+from benchmarks.fake_db import FakeDatabase
+
+from app.services.schedule_index import ScheduleIntervalIndex
+
+def make_windows(count: int):
+    windows = []
+    for _ in range(count):
+        start = 7 * 60 + random.randrange(0, 12 * 60, 15)
+        end = start + random.choice((60, 90, 120))
+        windows.append((random.choice(DAYS), f"{start // 60:02d}:{start % 60:02d}:00", f"{end // 60:02d}:{end % 60:02d}:00"))
+    return windows
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=400)
+    parser.add_argument("--per-room-day", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    random.seed(7)
+
+    rows = make_schedules(args.rooms, args.per_room_day)
+    db = FakeDatabase({'course_schedules': rows})
+    index = ScheduleIntervalIndex(ttl=3600)
+    await index.load(db.supabase)
+    rooms = index.rooms()
+    windows = make_windows(args.queries)
+    print(f"{len(rows)} schedules in {len(rooms)} rooms, {args.queries} windows")
+
+    started = time.perf_counter()
+    baseline = [
+        [pair for pair in rooms if not index.overlapping(pair[0], day, start, end, building=pair[1])]
+        for day, start, end in windows
+    ]
+    elapsed = time.perf_counter() - started
+    print(f"per-room  {elapsed / len(windows) * 1e6:9.1f} us/query")
+
+    started = time.perf_counter()
+    found = [index.free_rooms(day, start, end, rooms=rooms) for day, start, end in windows]
+    elapsed = time.perf_counter() - started
+    print(f"bitset    {elapsed / len(windows) * 1e6:9.1f} us/query")
+    if found != baseline:
+        print("FAIL: bitset and per-room searches disagree")
+        sys.exit(1)
+
+    for minutes in (60, 120, 180):
+        started = time.perf_counter()
+        for day, start, _ in windows:
+            room, building = random.choice(rooms)
+            index.nearest_free(room, day, minutes * 60, start, "07:00", "22:00", building=building)
+        elapsed = time.perf_counter() - started
+        print(f"nearest {minutes:3d}m {elapsed / len(windows) * 1e6:7.1f} us/query")
+
+if __name__ == "__main__":
+    asyncio.run(main())
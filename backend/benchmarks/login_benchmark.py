@@ -0,0 +1,115 @@
+"""Login throughput / latency benchmark against a fake users table.
+
+Compares the old inline path (bcrypt on the event loop, synchronous
+last_login update) with the pooled pipeline in ``AuthService``. Also reports
+the worst event-loop stall seen by a 10 ms ticker while logins run.
+
+    python -m benchmarks.login_benchmark --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.fake_db import FakeDatabase
+from passlib.hash import bcrypt
+
+from app.models.user import UserLogin
+from app.services.auth_service import AuthService
+from app.services.password_hasher import pwd_context
+
+PASSWORD = "password123"
+
+def make_users(count: int, rounds: int):
+    password_hash = bcrypt.using(rounds=rounds).hash(PASSWORD)
+    now = datetime.utcnow().isoformat()
+    return [{
+        'id': f"user-{i}",
+        'matricule': f"24STU{i:04d}",
+        'first_name': "Bench",
+        'last_name': f"User{i}",
+        'email': f"user{i}@student.university.cm",
+        'password_hash': password_hash,
+        'role': "student",
+        'is_active': True,
+        'status': "active",
+        'is_first_login': False,
+        'created_at': now,
+        'updated_at': now
+    } for i in range(count)]
+
+async def inline_login(service: AuthService, login_data: UserLogin):
+    """The pre-pipeline behaviour: everything runs on the event loop"""
+    result = await service.db.supabase.table('users').select('*').eq('matricule', login_data.matricule).execute()
+    user_data = result.data[0]
+    if not pwd_context.verify(login_data.password, user_data['password_hash']):
+        return None
+    await service.db.supabase.table('users').update({
+        'last_login': datetime.utcnow().isoformat()
+    }).eq('id', user_data['id']).execute()
+    return service.user_from_row(user_data)
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - started - 0.01)
+
+async def run(label: str, login, service: AuthService, users, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(user):
+        async with semaphore:
+            started = time.perf_counter()
+            assert await login(UserLogin(matricule=user['matricule'], password=PASSWORD))
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    lags = []
+    ticker = asyncio.create_task(measure_loop_lag(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(user) for user in users))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    await service.last_login_writer.flush()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{label:<10} {len(users) / elapsed:8.1f} logins/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+        f"p99 {p99 * 1000:7.1f} ms  "
+        f"max loop stall {max(lags, default=0) * 1000:7.1f} ms  "
+        f"db calls {service.db.calls}"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost factor")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated DB latency")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    users = make_users(args.logins, args.rounds)
+
+    for label in ("inline", "pipeline"):
+        service = AuthService()
+        service.db = FakeDatabase(
+            {'users': [dict(u) for u in users]},
+            latency=args.latency_ms / 1000,
+            blocking=label == "inline"
+        )
+        service.last_login_writer.db = service.db
+        service.password_hasher.max_workers = args.workers
+        login = (lambda data, s=service: inline_login(s, data)) if label == "inline" else service.authenticate_user
+        await run(label, login, service, users, args.concurrency)
+        await service.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
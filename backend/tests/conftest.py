@@ -0,0 +1,104 @@
+"""Shared test setup.
+
+Settings need the Supabase variables, so placeholders are set before any
+``app`` module is imported.
+
+Tests that need Postgres take the ``pg`` fixture. It reads
+``TEST_DATABASE_URL`` and skips when it is unset or unreachable. The
+``public`` and ``auth`` schemas of that database are dropped and rebuilt from
+``supabase/local/auth_shim.sql`` and ``supabase/migrations``, so point it at
+a throwaway database.
+"""
+import asyncio
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.test.test")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test.test.test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+SUPABASE_DIR = Path(__file__).resolve().parents[2] / "supabase"
+SCHEMA_FILES = [SUPABASE_DIR / "local" / "auth_shim.sql", *sorted((SUPABASE_DIR / "migrations").glob("*.sql"))]
+
+async def _connect(dsn: str):
+    import asyncpg
+
+    try:
+        return await asyncpg.connect(dsn, timeout=5)
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+        pytest.skip(f"Postgres at TEST_DATABASE_URL is not available: {e}")
+
+async def _migrate(dsn: str):
+    conn = await _connect(dsn)
+    try:
+        await conn.execute("DROP SCHEMA IF EXISTS public CASCADE; DROP SCHEMA IF EXISTS auth CASCADE; CREATE SCHEMA public;")
+        for path in SCHEMA_FILES:
+            await conn.execute(path.read_text())
+    finally:
+        await conn.close()
+
+@pytest.fixture(scope="session")
+def database_url():
+    """A database with every migration applied"""
+    dsn = os.environ.get("TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    asyncio.run(_migrate(dsn))
+    return dsn
+
+@pytest_asyncio.fixture
+async def pg(database_url):
+    """A direct Postgres backend over empty tables"""
+    from app.postgres_backend import PostgresDatabase
+
+    db = PostgresDatabase(dsn=database_url, min_size=1, max_size=2,
+                          statement_cache_size=100, command_timeout=30)
+    tables = await db.fetchval(
+        "SELECT string_agg(format('%I', tablename), ', ') FROM pg_tables WHERE schemaname = 'public'", []
+    )
+    await db.fetchval(f"TRUNCATE {tables} CASCADE", [])
+    yield db
+    await db.close()
+
+def user(role: str, matricule: str, **fields):
+    return {
+        'id': str(uuid.uuid4()),
+        'matricule': matricule,
+        'first_name': role.title(),
+        'last_name': matricule,
+        'email': f"{matricule.lower()}@university.cm",
+        'password_hash': "x",
+        'role': role,
+        **fields
+    }
+
+@pytest_asyncio.fixture
+async def seeded(pg):
+    """Two lecturers, three courses and four schedules"""
+    client = pg.supabase
+    ngono = user("lecturer", "25LEC0001")
+    fotso = user("lecturer", "25LEC0002")
+    await client.table('users').insert([ngono, fotso]).execute()
+
+    networks = {'id': str(uuid.uuid4()), 'name': "Networks", 'code': "CS301", 'credits': 4,
+                'lecturer_id': ngono['id'], 'specialties': ["Computer Science"], 'target_level': 3}
+    algebra = {'id': str(uuid.uuid4()), 'name': "Algebra", 'code': "MA101", 'credits': 3,
+               'lecturer_id': fotso['id'], 'specialties': ["Mathematics", "Computer Science"], 'target_level': None}
+    physics = {'id': str(uuid.uuid4()), 'name': "Physics", 'code': "PH201", 'credits': 3,
+               'lecturer_id': fotso['id'], 'specialties': ["Physics"], 'target_level': 2}
+    await client.table('courses').insert([networks, algebra, physics]).execute()
+
+    schedules = [
+        {'course_id': networks['id'], 'day': "Monday", 'start_time': "08:00", 'end_time': "10:00", 'room': "A101", 'type': "lecture"},
+        {'course_id': networks['id'], 'day': "Tuesday", 'start_time': "14:00", 'end_time': "16:00", 'room': "Lab 1", 'type': "practical"},
+        {'course_id': algebra['id'], 'day': "Monday", 'start_time': "10:00", 'end_time': "12:00", 'room': "A101", 'type': "lecture"},
+        {'course_id': physics['id'], 'day': "Friday", 'start_time': "09:00", 'end_time': "11:00", 'room': "B204", 'type': "tutorial"},
+    ]
+    await client.table('course_schedules').insert(schedules).execute()
+    return {'client': client, 'ngono': ngono, 'fotso': fotso,
+            'networks': networks, 'algebra': algebra, 'physics': physics}
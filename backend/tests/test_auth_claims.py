@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from passlib.hash import bcrypt
+
+from app.config import settings
+from app.models.user import UserLogin
+from app.services.auth_service import AuthService
+from benchmarks.fake_db import FakeDatabase
+
+PASSWORD = "password123"
+
+def user_row():
+    now = datetime.utcnow().isoformat()
+    return {
+        'id': "user-1",
+        'matricule': "25STU0001",
+        'first_name': "Awa",
+        'last_name': "Ngono",
+        'email': "awa.ngono@student.university.cm",
+        'password_hash': bcrypt.using(rounds=4).hash(PASSWORD),
+        'role': "student",
+        'specialty': "Computer Science",
+        'level': 3,
+        'is_active': True,
+        'status': "active",
+        'is_first_login': False,
+        'token_version': 1,
+        'created_at': now,
+        'updated_at': now
+    }
+
+@pytest.fixture
+def claims_mode(monkeypatch):
+    monkeypatch.setattr(settings, "auth_token_mode", "claims")
+
+@pytest_asyncio.fixture
+async def service():
+    service = AuthService()
+    service.db = FakeDatabase({'users': [user_row()]})
+    service.last_login_writer.db = service.db
+    service.revocation_list.db = service.db
+    yield service
+    await service.shutdown()
+
+@pytest.mark.asyncio
+async def test_claims_token_authenticates_without_a_users_lookup(claims_mode, service):
+    token = await service.login(UserLogin(matricule="25STU0001", password=PASSWORD))
+    calls = service.db.calls
+
+    user = await service.get_current_user(token.access_token)
+
+    assert service.db.calls == calls
+    assert user.id == "user-1"
+    assert user.matricule == "25STU0001"
+    assert user.name == "Awa Ngono"
+    assert user.role == "student"
+    assert user.level == 3
+    assert user == token.user.model_copy(update={'last_login': None})
+
+@pytest.mark.asyncio
+async def test_revoked_claims_token_is_rejected(claims_mode, service):
+    token = await service.login(UserLogin(matricule="25STU0001", password=PASSWORD))
+
+    await service.revoke_tokens("user-1", matricule="25STU0001")
+
+    with pytest.raises(Exception) as excinfo:
+        await service.get_current_user(token.access_token)
+    assert excinfo.value.status_code == 401
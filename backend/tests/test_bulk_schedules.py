@@ -0,0 +1,106 @@
+from datetime import time
+
+import pytest
+
+from app.models.course_schedule import BulkRowStatus, BulkScheduleMode, CourseScheduleCreate
+from app.models.course import CourseScheduleCreate as CourseSchedule
+from app.services.course_schedule_service import CourseScheduleService
+from app.services.course_service import CourseService
+from app.services.schedule_index import schedule_index
+from benchmarks.fake_db import FakeDatabase
+
+def schedule(course_id: str, room: str, hour: int) -> CourseScheduleCreate:
+    return CourseScheduleCreate(course_id=course_id, day="Monday", room=room,
+                                start_time=time(hour), end_time=time(hour + 2), type="lecture")
+
+@pytest.mark.asyncio
+async def test_bulk_create_loads_missing_course_embeds_in_one_query():
+    db = FakeDatabase({
+        'courses': [
+            {'id': "course-1", 'name': "Networks", 'code': "CS301", 'lecturer_id': "lecturer-1"},
+            {'id': "course-2", 'name': "Algebra", 'code': "MA101", 'lecturer_id': "lecturer-2"}
+        ],
+        'course_schedules': []
+    })
+    service = CourseScheduleService()
+    service.db = db
+    await schedule_index.load(db.supabase)
+    calls = db.calls
+
+    result = await service.bulk_create_schedules([
+        schedule("course-1", "A101", 8), schedule("course-2", "A101", 10), schedule("course-1", "B204", 8)
+    ], "admin-1")
+
+    # The room-day re-check, the insert and one query for the courses the insert did not embed
+    assert db.calls - calls == 3
+    assert [row.status for row in result.results] == [BulkRowStatus.CREATED] * 3
+    assert [row.schedule.course_code for row in result.results] == ["CS301", "MA101", "CS301"]
+
+async def service_over(*existing):
+    db = FakeDatabase({
+        'courses': [{'id': "course-1", 'name': "Networks", 'code': "CS301", 'lecturer_id': "lecturer-1"}],
+        'course_schedules': list(existing)
+    })
+    service = CourseScheduleService()
+    service.db = db
+    await schedule_index.load(db.supabase)
+    return db, service
+
+def existing_row(schedule_id: str, room: str, hour: int):
+    return {'id': schedule_id, 'course_id': "course-1", 'day': "Monday", 'room': room, 'building': None,
+            'start_time': f"{hour:02d}:00:00", 'end_time': f"{hour + 2:02d}:00:00", 'type': "lecture"}
+
+@pytest.mark.asyncio
+async def test_bulk_create_earlier_rows_win_within_the_batch():
+    _, service = await service_over()
+
+    result = await service.bulk_create_schedules([
+        schedule("course-1", "A101", 8), schedule("course-1", "A101", 9), schedule("course-1", "A101", 10)
+    ], "admin-1")
+
+    # Row 1 loses to row 0; row 2 only overlaps the rejected row 1, so it is kept
+    assert [row.status for row in result.results] == [BulkRowStatus.CREATED, BulkRowStatus.CONFLICT, BulkRowStatus.CREATED]
+    assert result.results[1].conflicts == [{"batch_index": 0}, {"batch_index": 2}]
+    assert (result.created_count, result.conflict_count) == (2, 1)
+
+@pytest.mark.asyncio
+async def test_bulk_create_rejects_rows_overlapping_other_workers_writes():
+    db, service = await service_over(existing_row("s-1", "A101", 8))
+    # Written by another worker after this one loaded its index
+    db.tables['course_schedules'].append(existing_row("s-2", "B204", 14))
+
+    result = await service.bulk_create_schedules([
+        schedule("course-1", "A101", 9), schedule("course-1", "B204", 15), schedule("course-1", "B204", 8)
+    ], "admin-1")
+
+    assert [row.status for row in result.results] == [BulkRowStatus.CONFLICT, BulkRowStatus.CONFLICT, BulkRowStatus.CREATED]
+    assert [conflict['id'] for conflict in result.results[0].conflicts] == ["s-1"]
+    assert [conflict['id'] for conflict in result.results[1].conflicts] == ["s-2"]
+
+@pytest.mark.asyncio
+async def test_bulk_create_all_or_nothing_inserts_nothing_on_a_conflict():
+    db, service = await service_over(existing_row("s-1", "A101", 8))
+
+    result = await service.bulk_create_schedules([
+        schedule("course-1", "B204", 8), schedule("course-1", "A101", 9)
+    ], "admin-1", BulkScheduleMode.ALL_OR_NOTHING)
+
+    assert [row.status for row in result.results] == [BulkRowStatus.SKIPPED, BulkRowStatus.CONFLICT]
+    assert (result.created_count, result.conflict_count) == (0, 1)
+    assert [row['id'] for row in db.tables['course_schedules']] == ["s-1"]
+
+@pytest.mark.asyncio
+async def test_course_service_conflicts_suggest_free_rooms_and_times():
+    db, _ = await service_over(existing_row("s-1", "A101", 8), existing_row("s-2", "B204", 10))
+    service = CourseService()
+    service.db = db
+
+    conflicts = await service.check_schedule_conflicts("course-1", CourseSchedule(
+        day="Monday", start_time=time(9), end_time=time(11), room="A101", type="lecture"
+    ))
+
+    assert [conflict.conflicting_schedules[0]['id'] for conflict in conflicts] == ["s-1"]
+    solutions = conflicts[0].suggested_solutions
+    assert [(s['type'], s['new_room'], s['new_start_time']) for s in solutions] == [
+        ("change_time", "A101", "10:00:00")
+    ]
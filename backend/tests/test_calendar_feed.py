@@ -0,0 +1,65 @@
+import re
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from app.services.calendar_feed_service import CalendarFeedService
+from app.services.cohort_timetables import cohort_timetables
+from tests.conftest import user
+
+def session(title: str, level, specialties=("Computer Science",)):
+    start = datetime.utcnow() + timedelta(days=1)
+    return {'id': str(uuid.uuid4()), 'title': title, 'jitsi_room_id': f"room-{uuid.uuid4()}",
+            'scheduled_start': start.isoformat(), 'scheduled_end': (start + timedelta(hours=1)).isoformat(),
+            'target_specialties': list(specialties), 'target_level': level}
+
+@pytest_asyncio.fixture
+async def feeds(seeded, pg):
+    sessions = [session("Level 3", 3), session("Any level", None), session("Level 2", 2),
+                session("Physics", 3, ["Physics"])]
+    await pg.supabase.table('virtual_classrooms').insert(sessions).execute()
+    await cohort_timetables.load(pg.supabase)
+    service = CalendarFeedService()
+    service.db = pg
+    return service
+
+async def add_student(pg, **fields):
+    student = user("student", f"25STU{uuid.uuid4().hex[:4]}", **fields)
+    await pg.supabase.table('users').insert(student).execute()
+    return student['id']
+
+async def events(service, user_id):
+    feed = await service.get_feed(user_id, await service.feed_token(user_id))
+    return re.findall(r"UID:(schedule|session)-", feed.body)
+
+@pytest.mark.asyncio
+async def test_student_feed_has_their_cohort_and_level(feeds, pg):
+    student_id = await add_student(pg, specialty="Computer Science", level=3)
+
+    found = await events(feeds, student_id)
+
+    # Networks (level 3) and Algebra (every level), but not Physics
+    assert found.count("schedule") == 3
+    assert found.count("session") == 2
+
+@pytest.mark.asyncio
+async def test_student_without_a_specialty_gets_an_empty_feed(feeds, pg):
+    student_id = await add_student(pg)
+
+    assert await events(feeds, student_id) == []
+
+@pytest.mark.asyncio
+async def test_rotated_token_replaces_the_old_one(feeds, pg):
+    student_id = await add_student(pg, specialty="Computer Science", level=3)
+    old = await feeds.feed_token(student_id)
+
+    new = await feeds.rotate_token(student_id)
+
+    assert new != old
+    assert (await feeds.get_feed(student_id, new)).body
+    with pytest.raises(HTTPException) as error:
+        await feeds.get_feed(student_id, old)
+    assert error.value.status_code == 404
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.services.cohort_timetables import ALL_LEVELS, CohortTimetableStore
+from benchmarks.fake_db import FakeDatabase
+
+CS, MATHS = "Computer Science", "Mathematics"
+
+def course(course_id: str, level, *specialties):
+    return {'id': course_id, 'name': course_id, 'code': course_id.upper(), 'lecturer_id': "lecturer-1",
+            'specialties': list(specialties), 'target_level': level}
+
+def schedule(schedule_id: str, course_id: str, day: str = "Monday", start: str = "08:00:00"):
+    return {'id': schedule_id, 'course_id': course_id, 'day': day, 'start_time': start, 'end_time': "10:00:00",
+            'room': "A101"}
+
+async def store_over(courses, schedules):
+    db = FakeDatabase({'courses': courses, 'course_schedules': schedules})
+    store = CohortTimetableStore(ttl=60)
+    await store.load(db.supabase)
+    return db, store
+
+@pytest.fixture
+def catalogue():
+    return [course("networks", 3, CS), course("algebra", None, CS, MATHS), course("databases", 2, CS)]
+
+@pytest.mark.asyncio
+async def test_cohorts_of_a_leveled_course(catalogue):
+    _, store = await store_over(catalogue, [])
+
+    assert store._cohorts_of(catalogue[0]) == {(CS, 3), (CS, ALL_LEVELS)}
+
+@pytest.mark.asyncio
+async def test_cohorts_of_a_course_without_a_level(catalogue):
+    _, store = await store_over(catalogue, [])
+
+    # Open to every level: each stored level of each specialty, the no-level cohort and ALL_LEVELS
+    assert store._cohorts_of(catalogue[1]) == {
+        (CS, 3), (CS, 2), (CS, None), (CS, ALL_LEVELS), (MATHS, None), (MATHS, ALL_LEVELS)
+    }
+
+@pytest.mark.asyncio
+async def test_cohort_for_levels(catalogue):
+    _, store = await store_over(catalogue, [])
+
+    assert store._cohort_for(CS, None) == (CS, ALL_LEVELS)
+    assert store._cohort_for(CS, 3) == (CS, 3)
+    # No course targets level 5 yet, so it only sees the courses open to every level
+    assert store._cohort_for(CS, 5) == (CS, None)
+    assert store.course_ids(CS, 3) == ["algebra", "networks"]
+    assert store.course_ids(CS, 5) == ["algebra"]
+    assert store.course_ids(CS, None) == ["algebra", "databases", "networks"]
+    assert store.course_ids(MATHS, 1) == ["algebra"]
+    assert store.course_ids(None, 3) == []
+
+@pytest.mark.asyncio
+async def test_writes_during_a_reload_survive_the_swap(catalogue):
+    db, store = await store_over(catalogue, [schedule("s-1", "networks"), schedule("s-2", "algebra")])
+    db.latency = 0.05
+
+    reload = asyncio.create_task(store.load(db.supabase))
+    await asyncio.sleep(0.01)
+    # The reload has already read the tables when these writes land
+    store.schedule_changed(schedule("s-3", "networks", day="Tuesday"))
+    store.schedule_removed("s-2")
+    store.course_changed(course("algebra", 2, CS))
+    await reload
+
+    assert [row['id'] for row in store.timetable(CS, 3)] == ["s-1", "s-3"]
+    assert store.course_ids(CS, 2) == ["algebra", "databases"]
+    assert store.loads == 2
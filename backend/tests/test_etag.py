@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+from fastapi import Request, Response
+
+from app.etag import conditional
+from app.models.user import UserResponse
+from app.services.course_schedule_service import CourseScheduleService
+
+def request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/schedules", "query_string": b"limit=50", "headers": headers})
+
+def admin():
+    now = datetime.utcnow()
+    return UserResponse(id="admin-1", matricule="25ADM0001", first_name="Admin", last_name="One",
+                        email="admin@university.cm", role="admin", is_first_login=False,
+                        created_at=now, updated_at=now)
+
+class Reads:
+    def __init__(self, version):
+        self.version = version
+        self.probes = 0
+        self.fetches = 0
+
+    async def probe(self):
+        self.probes += 1
+        return self.version
+
+    async def fetch(self):
+        self.fetches += 1
+        return self.version, ["row"]
+
+@pytest.mark.asyncio
+async def test_etag_comes_from_the_fetch_without_a_probe():
+    reads, response = Reads("v1"), Response()
+
+    body = await conditional(request(), response, reads.probe, reads.fetch)
+
+    assert body == ["row"]
+    assert (reads.probes, reads.fetches) == (0, 1)
+    assert response.headers["ETag"]
+
+@pytest.mark.asyncio
+async def test_matching_if_none_match_skips_the_fetch():
+    reads, first = Reads("v1"), Response()
+    await conditional(request(), first, reads.probe, reads.fetch)
+
+    result = await conditional(request(first.headers["ETag"]), Response(), reads.probe, reads.fetch)
+
+    assert result.status_code == 304
+    assert (reads.probes, reads.fetches) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_stale_if_none_match_gets_the_new_body_and_etag():
+    reads, first = Reads("v1"), Response()
+    await conditional(request(), first, reads.probe, reads.fetch)
+    reads.version = "v2"
+    second = Response()
+
+    body = await conditional(request(first.headers["ETag"]), second, reads.probe, reads.fetch)
+
+    assert body == ["row"]
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+@pytest.mark.asyncio
+async def test_schedule_probe_and_page_fingerprint_the_same_rows(seeded, pg):
+    service = CourseScheduleService()
+    service.db = pg
+    filters = {"limit": 50, "offset": 0}
+
+    version, schedules = await service.schedule_page(admin(), filters)
+
+    assert len(schedules) == 4
+    assert await service.schedule_versions(admin(), filters) == version
+
+    await pg.supabase.table('courses').update({'updated_at': datetime.utcnow().isoformat()}) \
+        .eq('id', seeded['physics']['id']).execute()
+    changed, _ = await service.schedule_page(admin(), filters)
+
+    assert changed != version
+    assert await service.schedule_versions(admin(), filters) == changed
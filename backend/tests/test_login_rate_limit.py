@@ -0,0 +1,30 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.auth_service import auth_service
+from app.services.login_throttle import LocalThrottleBackend, LoginThrottle
+from benchmarks.fake_db import FakeDatabase
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(auth_service, "db", FakeDatabase({'users': []}))
+    monkeypatch.setattr(auth_service, "login_throttle", LoginThrottle(
+        LocalThrottleBackend(), user_capacity=2, user_refill_per_minute=1,
+        ip_capacity=100, ip_refill_per_minute=100,
+        backoff_free_failures=100, backoff_base_seconds=1, backoff_max_seconds=1
+    ))
+    return TestClient(app)
+
+def test_throttled_login_carries_retry_after(client):
+    credentials = {"matricule": "25STU0001", "password": "wrong-password"}
+    statuses = [client.post("/api/auth/login", json=credentials) for _ in range(3)]
+
+    assert [response.status_code for response in statuses] == [401, 401, 429]
+    assert int(statuses[2].headers["retry-after"]) >= 1
+
+def test_rejected_token_carries_www_authenticate(client):
+    response = client.get("/api/auth/me", headers={"Authorization": "Bearer not-a-token"})
+
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
@@ -0,0 +1,43 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.login_throttle import LocalThrottleBackend, LoginThrottle
+
+def make_throttle(backend=None, ip_capacity=1):
+    return LoginThrottle(
+        backend or LocalThrottleBackend(),
+        user_capacity=2, user_refill_per_minute=0.001,
+        ip_capacity=ip_capacity, ip_refill_per_minute=0.001,
+        backoff_free_failures=3, backoff_base_seconds=1, backoff_max_seconds=60
+    )
+
+@pytest.mark.asyncio
+async def test_ip_rejection_leaves_the_user_bucket_alone():
+    throttle = make_throttle()
+    await throttle.check("25STU0001", "10.0.0.1")
+
+    # The attacker's IP is spent; its attempts must not use the victim's tokens
+    for _ in range(5):
+        with pytest.raises(HTTPException) as excinfo:
+            await throttle.check("25STU0002", "10.0.0.1")
+        assert excinfo.value.status_code == 429
+
+    await throttle.check("25STU0002", "10.0.0.2")
+    await throttle.check("25STU0002", "10.0.0.3")
+    assert throttle.stats()["verified"] == 3
+    assert throttle.stats()["rejected"] == 5
+
+class BrokenBackend(LocalThrottleBackend):
+    async def take(self, key, capacity, refill_per_second):
+        raise ConnectionError("redis down")
+
+@pytest.mark.asyncio
+async def test_fail_open_attempts_are_not_counted_as_verified():
+    throttle = make_throttle(BrokenBackend())
+
+    await throttle.check("25STU0001", "10.0.0.1")
+
+    stats = throttle.stats()
+    assert stats["failed_open"] == 1
+    assert stats["verified"] == 0
+    assert stats["backend_errors"] == 1
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from app.database import returning
+
+SCHEDULE_SELECT = '*, courses:course_id(name, code, lecturer_id)'
+
+@pytest.mark.asyncio
+async def test_or_filter_with_is_null(seeded):
+    result = await seeded['client'].table('courses').select('code') \
+        .or_('target_level.eq.3,target_level.is.null').order('code').execute()
+
+    assert [row['code'] for row in result.data] == ["CS301", "MA101"]
+
+@pytest.mark.asyncio
+async def test_or_filter_with_nested_and(seeded):
+    result = await seeded['client'].table('courses').select('code') \
+        .or_('code.eq.PH201,and(credits.eq.4,target_level.gte.3)').order('code').execute()
+
+    assert [row['code'] for row in result.data] == ["CS301", "PH201"]
+
+@pytest.mark.asyncio
+async def test_contains_on_a_text_array(seeded):
+    result = await seeded['client'].table('courses').select('code') \
+        .contains('specialties', ["Computer Science"]).order('code').execute()
+
+    assert [row['code'] for row in result.data] == ["CS301", "MA101"]
+
+@pytest.mark.asyncio
+async def test_forward_embed_is_an_object(seeded):
+    result = await seeded['client'].table('course_schedules').select(SCHEDULE_SELECT) \
+        .eq('room', "Lab 1").execute()
+
+    assert len(result.data) == 1
+    row = result.data[0]
+    assert row['start_time'] == "14:00:00"
+    assert row['courses'] == {'name': "Networks", 'code': "CS301", 'lecturer_id': seeded['ngono']['id']}
+
+@pytest.mark.asyncio
+async def test_backward_embed_is_an_array(seeded):
+    result = await seeded['client'].table('courses').select('code, course_schedules(day)') \
+        .eq('code', "CS301").execute()
+
+    assert sorted(row['day'] for row in result.data[0]['course_schedules']) == ["Monday", "Tuesday"]
+
+@pytest.mark.asyncio
+async def test_filter_on_a_plain_embed_only_nulls_the_embed(seeded):
+    result = await seeded['client'].table('course_schedules').select(SCHEDULE_SELECT) \
+        .eq('courses.lecturer_id', seeded['ngono']['id']).execute()
+
+    assert len(result.data) == 4
+    assert sum(row['courses'] is None for row in result.data) == 2
+
+@pytest.mark.asyncio
+async def test_filter_on_an_inner_embed_filters_the_parent(seeded):
+    result = await seeded['client'].table('course_schedules') \
+        .select('*, courses:course_id!inner(name, code, lecturer_id)') \
+        .eq('courses.lecturer_id', seeded['ngono']['id']).execute()
+
+    assert sorted(row['room'] for row in result.data) == ["A101", "Lab 1"]
+    assert {row['courses']['code'] for row in result.data} == {"CS301"}
+
+@pytest.mark.asyncio
+async def test_range_order_and_count(seeded):
+    result = await seeded['client'].table('course_schedules').select('room, start_time', count='exact') \
+        .order('start_time', desc=True).range(1, 2).execute()
+
+    assert result.count == 4
+    assert [row['start_time'] for row in result.data] == ["10:00:00", "09:00:00"]
+
+@pytest.mark.asyncio
+async def test_insert_returns_the_requested_representation(seeded):
+    row = {'course_id': seeded['physics']['id'], 'day': "Thursday", 'start_time': "13:00",
+           'end_time': "15:00", 'room': "B204", 'type': "lecture"}
+
+    result = await returning(seeded['client'].table('course_schedules').insert(row), SCHEDULE_SELECT).execute()
+
+    assert len(result.data) == 1
+    created = result.data[0]
+    assert uuid.UUID(created['id'])
+    assert created['created_at']
+    assert created['end_time'] == "15:00:00"
+    assert created['courses']['code'] == "PH201"
+
+@pytest.mark.asyncio
+async def test_update_returns_the_updated_rows(seeded):
+    result = await seeded['client'].table('course_schedules').update({'room': "C310"}) \
+        .eq('room', "A101").execute()
+
+    assert sorted(row['day'] for row in result.data) == ["Monday", "Monday"]
+    assert {row['room'] for row in result.data} == {"C310"}
+
+PARITY_QUERIES = [
+    lambda client: client.table('courses').select('code, target_level')
+        .or_('target_level.eq.3,target_level.is.null').order('code'),
+    lambda client: client.table('courses').select('code').contains('specialties', ["Computer Science"]).order('code'),
+    lambda client: client.table('course_schedules').select('day, room, start_time, courses:course_id(name, code)')
+        .order('day').order('start_time'),
+    lambda client: client.table('course_schedules').select('room, courses:course_id!inner(code)')
+        .eq('courses.code', "CS301").order('room'),
+    lambda client: client.table('courses').select('code, course_schedules(room)')
+        .in_('code', ["MA101", "PH201"]).order('code').range(0, 1),
+]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query", PARITY_QUERIES)
+async def test_matches_postgrest(seeded, query):
+    """Runs against a PostgREST serving the same database when TEST_POSTGREST_URL is set"""
+    url = os.environ.get("TEST_POSTGREST_URL")
+    if not url:
+        pytest.skip("TEST_POSTGREST_URL is not set")
+    from postgrest import AsyncPostgrestClient
+
+    async with AsyncPostgrestClient(url) as postgrest:
+        expected = await query(postgrest).execute()
+    actual = await query(seeded['client']).execute()
+
+    assert actual.data == expected.data
+
+@pytest.mark.asyncio
+async def test_concurrent_first_queries_share_one_pool(database_url, monkeypatch):
+    import asyncpg
+    from app.postgres_backend import PostgresDatabase
+
+    created = []
+    create_pool = asyncpg.create_pool
+
+    def counting_create_pool(*args, **kwargs):
+        created.append(args)
+        return create_pool(*args, **kwargs)
+
+    monkeypatch.setattr(asyncpg, "create_pool", counting_create_pool)
+    db = PostgresDatabase(dsn=database_url, min_size=1, max_size=2, statement_cache_size=100, command_timeout=30)
+    try:
+        await asyncio.gather(*(db.supabase.table('courses').select('id').execute() for _ in range(5)))
+    finally:
+        await db.close()
+
+    assert len(created) == 1
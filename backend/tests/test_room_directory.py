@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.services.room_directory import RoomDirectory
+from benchmarks.fake_db import FakeDatabase
+
+def room(room_id: str, name: str, building=None, capacity=None, type="classroom", equipment=(), is_active=True):
+    return {'id': room_id, 'name': name, 'building': building, 'capacity': capacity, 'type': type,
+            'equipment': list(equipment), 'is_active': is_active}
+
+ROOMS = [
+    room("r-1", "A101", "North", 40, equipment=["projector"]),
+    room("r-2", "A102", "North", 60, "lab", ["projector", "computers"]),
+    room("r-3", "Amphi 1", "South", 300, "amphitheater", ["projector", "microphone"]),
+    room("r-4", "B204", "South", 60),
+    room("r-5", "Annex", None, None),
+    room("r-6", "Old hall", "North", 500, is_active=False),
+    room("r-7", "A101", "South", 30),
+]
+
+async def directory_over(rows):
+    db = FakeDatabase({'rooms': list(rows)})
+    directory = RoomDirectory(ttl=60)
+    await directory.load(db.supabase)
+    return db, directory
+
+def ids(rows):
+    return [row['id'] for row in rows]
+
+@pytest.mark.asyncio
+async def test_find_bisects_on_capacity_smallest_first():
+    _, directory = await directory_over(ROOMS)
+
+    # Inactive rooms are never offered; unknown capacities only without a minimum
+    assert ids(directory.find()) == ["r-5", "r-7", "r-1", "r-2", "r-4", "r-3"]
+    assert ids(directory.find(min_capacity=60)) == ["r-2", "r-4", "r-3"]
+    assert ids(directory.find(min_capacity=61)) == ["r-3"]
+    assert ids(directory.find(min_capacity=1000)) == []
+
+@pytest.mark.asyncio
+async def test_find_filters_by_building_type_and_equipment():
+    _, directory = await directory_over(ROOMS)
+
+    assert ids(directory.find(building="South")) == ["r-7", "r-4", "r-3"]
+    assert ids(directory.find(room_type="lab")) == ["r-2"]
+    assert ids(directory.find(equipment=["projector"])) == ["r-1", "r-2", "r-3"]
+    assert ids(directory.find(equipment=["projector", "microphone"], min_capacity=50)) == ["r-3"]
+    assert ids(directory.find(building="North", room_type="classroom", min_capacity=50)) == []
+
+@pytest.mark.asyncio
+async def test_lookup_building_rules():
+    _, directory = await directory_over(ROOMS)
+
+    assert directory.lookup("A101", "South")['id'] == "r-7"
+    # Ambiguous without a building, unique names resolve
+    assert directory.lookup("A101") is None
+    assert directory.lookup("B204")['id'] == "r-4"
+    # A room recorded without a building matches a schedule that names one
+    assert directory.lookup("Annex", "North")['id'] == "r-5"
+    assert directory.lookup("B204", "North") is None
+    assert directory.lookup("Z999") is None
+
+@pytest.mark.asyncio
+async def test_writes_during_a_reload_survive_the_swap():
+    db, directory = await directory_over(ROOMS)
+    db.latency = 0.05
+
+    reload = asyncio.create_task(directory.load(db.supabase))
+    await asyncio.sleep(0.01)
+    # The reload has already read the table when these writes land
+    directory.room_changed(room("r-8", "C301", "East", 80))
+    directory.room_changed(room("r-4", "B204", "South", 120))
+    directory.room_removed("r-1")
+    await reload
+
+    assert ids(directory.find(min_capacity=60)) == ["r-2", "r-8", "r-4", "r-3"]
+    assert directory.lookup("A101", "North") is None
+    assert directory.loads == 2
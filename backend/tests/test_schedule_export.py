@@ -0,0 +1,47 @@
+import csv
+import io
+from datetime import datetime
+
+import pytest
+
+from app.models.user import UserResponse
+from app.services.course_schedule_service import CourseScheduleService
+
+def principal(row):
+    now = datetime.utcnow()
+    return UserResponse(**row, is_first_login=False, created_at=now, updated_at=now)
+
+async def export_codes(service, user, filters):
+    chunks = [chunk async for chunk in service.export_schedules(user, filters, 'csv')]
+    rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8-sig'))))
+    return sorted(row[0] for row in rows[1:])
+
+@pytest.fixture
+def service(pg):
+    service = CourseScheduleService()
+    service.db = pg
+    return service
+
+@pytest.mark.asyncio
+async def test_lecturer_export_contains_only_their_schedules(seeded, service):
+    codes = await export_codes(service, principal(seeded['ngono']), {})
+
+    assert codes == ["CS301", "CS301"]
+
+@pytest.mark.asyncio
+async def test_lecturer_id_filter_narrows_an_admin_export(seeded, service):
+    admin = principal({**seeded['ngono'], 'id': "admin-1", 'role': "admin"})
+
+    codes = await export_codes(service, admin, {'lecturer_id': seeded['fotso']['id']})
+
+    assert codes == ["MA101", "PH201"]
+
+@pytest.mark.asyncio
+async def test_lecturer_schedule_page_and_probe_skip_other_courses(seeded, service):
+    lecturer = principal(seeded['fotso'])
+    filters = {'limit': 50, 'offset': 0}
+
+    version, schedules = await service.schedule_page(lecturer, filters)
+
+    assert sorted(schedule.course_code for schedule in schedules) == ["MA101", "PH201"]
+    assert await service.schedule_versions(lecturer, filters) == version
@@ -0,0 +1,34 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.config import settings
+from app.models.course_schedule import ImportJobStatus
+from app.services.schedule_import_service import ScheduleImportService
+from benchmarks.fake_db import FakeDatabase
+
+@pytest.mark.asyncio
+async def test_stop_marks_running_background_imports_failed(monkeypatch):
+    service = ScheduleImportService()
+    service.db = FakeDatabase({'courses': [], 'course_schedules': []})
+    started = asyncio.Event()
+
+    async def run_forever(job, fileobj):
+        job.status = ImportJobStatus.RUNNING
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(service, "_run", run_forever)
+    upload = UploadFile(file=io.BytesIO(b"course_id,day\n"), filename="schedules.csv",
+                        size=settings.schedule_import_background_bytes + 1)
+    job = await service.import_schedules(upload, created_by="admin-1")
+    await started.wait()
+
+    await service.stop()
+
+    assert job.status == ImportJobStatus.FAILED
+    assert job.finished_at is not None
+    assert "cancelled" in job.errors[-1]['message']
+    assert service._tasks == {}
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from app.services.schedule_index import ScheduleIntervalIndex, slot_mask
+from benchmarks.fake_db import FakeDatabase
+
+def row(schedule_id: str, room: str, start: str, end: str, day: str = "Monday", building=None):
+    return {'id': schedule_id, 'room': room, 'building': building, 'day': day,
+            'start_time': start, 'end_time': end}
+
+def ids(rows):
+    return sorted(found['id'] for found in rows)
+
+async def loaded(*rows):
+    db = FakeDatabase({'course_schedules': list(rows)})
+    index = ScheduleIntervalIndex(ttl=60)
+    await index.load(db.supabase)
+    return db, index
+
+@pytest.mark.asyncio
+async def test_overlapping_treats_intervals_as_half_open():
+    _, index = await loaded(row("a", "A101", "08:00:00", "10:00:00"), row("b", "A101", "10:00:00", "12:00:00"),
+                            row("c", "A101", "07:00:00", "13:00:00", day="Tuesday"))
+
+    assert ids(index.overlapping("A101", "Monday", "09:59", "10:01")) == ["a", "b"]
+    # Touching ends do not overlap
+    assert ids(index.overlapping("A101", "Monday", "10:00", "10:00")) == []
+    assert ids(index.overlapping("A101", "Monday", "12:00", "13:00")) == []
+    assert ids(index.overlapping("A101", "Monday", "07:00", "08:00")) == []
+    assert ids(index.overlapping("A101", "Monday", "07:00", "13:00", exclude_id="a")) == ["b"]
+    assert ids(index.overlapping("B204", "Monday", "07:00", "13:00")) == []
+
+@pytest.mark.asyncio
+async def test_overlapping_building_rules():
+    _, index = await loaded(row("a", "A101", "08:00", "10:00", building="North"),
+                            row("b", "A101", "08:00", "10:00", building="South"),
+                            row("c", "A101", "08:00", "10:00"))
+
+    assert ids(index.overlapping("A101", "Monday", "09:00", "09:30")) == ["a", "b", "c"]
+    # A named building also matches rows with no building recorded
+    assert ids(index.overlapping("A101", "Monday", "09:00", "09:30", building="North")) == ["a", "c"]
+
+@pytest.mark.asyncio
+async def test_remove_and_re_add_move_a_schedule():
+    _, index = await loaded(row("a", "A101", "08:00", "10:00"), row("b", "A101", "10:00", "12:00"))
+
+    index.remove("a")
+    assert ids(index.room_day("A101", "Monday")) == ["b"]
+    assert index.occupancy("A101", "Monday") == slot_mask(10 * 3600, 12 * 3600)
+    index.add(row("b", "B204", "14:00", "16:00"))
+    assert ids(index.room_day("A101", "Monday")) == []
+    assert ids(index.room_day("B204", "Monday")) == ["b"]
+    # Removing an unknown id is a no-op
+    index.remove("missing")
+
+@pytest.mark.asyncio
+async def test_writes_during_a_reload_survive_the_swap():
+    db, index = await loaded(row("a", "A101", "08:00", "10:00"), row("b", "A101", "10:00", "12:00"))
+    db.latency = 0.05
+
+    reload = asyncio.create_task(index.load(db.supabase))
+    await asyncio.sleep(0.01)
+    # The reload has already read the table when these writes land
+    index.add(row("c", "A101", "14:00", "16:00"))
+    index.remove("a")
+    await reload
+
+    assert ids(index.room_day("A101", "Monday")) == ["b", "c"]
+    assert index.loads == 2
+
+@pytest.mark.asyncio
+async def test_adds_before_the_first_load_are_replayed():
+    db = FakeDatabase({'course_schedules': [row("a", "A101", "08:00", "10:00")]}, latency=0.05)
+    index = ScheduleIntervalIndex(ttl=60)
+
+    first = asyncio.create_task(index.ensure_loaded(db.supabase))
+    await asyncio.sleep(0.01)
+    index.add(row("b", "A101", "10:00", "12:00"))
+    await first
+
+    assert ids(index.room_day("A101", "Monday")) == ["a", "b"]
+
+@pytest.mark.asyncio
+async def test_refresh_picks_up_other_workers_writes():
+    db, index = await loaded(row("a", "A101", "08:00", "10:00"), row("b", "B204", "08:00", "10:00"))
+    # Another worker moves "a" and books A101 after this index was loaded
+    db.tables['course_schedules'] = [row("a", "A101", "08:00", "10:00", day="Tuesday"),
+                                     row("b", "B204", "08:00", "10:00"), row("c", "A101", "09:00", "11:00")]
+    assert ids(index.overlapping("A101", "Monday", "09:00", "10:00")) == ["a"]
+
+    await index.refresh(db.supabase, [("A101", "Monday")])
+
+    assert ids(index.overlapping("A101", "Monday", "09:00", "10:00")) == ["c"]
+    assert ids(index.room_day("B204", "Monday")) == ["b"]
+
+@pytest.mark.asyncio
+async def test_free_rooms_at_slot_boundaries():
+    _, index = await loaded(row("a", "A101", "08:00", "10:00"), row("b", "B204", "08:00", "09:02"))
+    rooms = [("A101", None), ("B204", None)]
+
+    # Touching the end of a booking is free, overlapping its last minute is not
+    assert index.free_rooms("Monday", "10:00", "12:00", rooms=rooms) == rooms
+    assert index.free_rooms("Monday", "09:55", "10:00", rooms=rooms) == [("B204", None)]
+    # 09:02 is off the 5-minute grid, so the shared 09:00 slot falls back to an exact check
+    assert index.free_rooms("Monday", "09:02", "10:00", rooms=rooms) == [("B204", None)]
+    assert index.free_rooms("Monday", "09:01", "10:00", rooms=rooms) == []
+    assert index.free_rooms("Monday", "09:00", "09:30", rooms=rooms, exclude_id="a") == [("A101", None)]
+
+@pytest.mark.asyncio
+async def test_nearest_free_at_slot_boundaries():
+    _, index = await loaded(row("a", "A101", "08:00", "10:00"), row("b", "A101", "11:00", "17:00"))
+
+    # Exactly the one-hour gap between two bookings
+    assert index.nearest_free("A101", "Monday", 3600, "08:00", "08:00", "18:00") == (10 * 3600, 11 * 3600)
+    assert index.nearest_free("A101", "Monday", 3600, "16:00", "08:00", "18:00") == (17 * 3600, 18 * 3600)
+    assert index.nearest_free("A101", "Monday", 2 * 3600, "08:00", "08:00", "18:00") is None
+    assert index.nearest_free("A101", "Monday", 2 * 3600, "08:00", "08:00", "18:00", exclude_id="a") == (8 * 3600, 10 * 3600)
+    # The last slot of the day is usable
+    assert index.nearest_free("A101", "Monday", 3600, "23:30", "00:00", "24:00") == (23 * 3600, 24 * 3600)
@@ -0,0 +1,33 @@
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.services.password_hasher import PasswordHasher
+from app.services.user_import_service import UserImportService
+from benchmarks.fake_db import FakeDatabase
+
+CSV = (
+    "matricule,first_name,last_name,email,role,password,send_welcome_email\n"
+    "25STU0001,Awa,Ngono,awa.ngono@student.university.cm,student,Chosen#2025,no\n"
+    "25STU0002,Jean,Mbarga,jean.mbarga@student.university.cm,student,,no\n"
+    "25STU0002,Duplicate,Row,duplicate@student.university.cm,student,,no\n"
+)
+
+@pytest.mark.asyncio
+async def test_import_only_returns_generated_passwords():
+    service = UserImportService()
+    service.db = FakeDatabase({'users': []})
+    service.password_hasher = PasswordHasher(max_workers=2)
+    upload = UploadFile(file=io.BytesIO(CSV.encode()), filename="users.csv")
+    try:
+        result = await service.import_users(upload, created_by="admin-1")
+    finally:
+        service.shutdown()
+
+    assert result.total_rows == 3
+    assert result.errors == [{"row": 4, "field": "matricule", "message": "Duplicate matricule in file"}]
+    passwords = {user['matricule']: user['password'] for user in result.created_users}
+    assert passwords['25STU0001'] is None
+    assert passwords['25STU0002']
+    assert len(service.db.tables['users']) == 2
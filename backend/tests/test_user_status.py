@@ -0,0 +1,31 @@
+import pytest
+
+from app.models.user import UserStatus
+from app.services.auth_service import auth_service
+from app.services.user_service import UserService
+from benchmarks.fake_db import FakeDatabase
+from tests.test_auth_claims import user_row
+
+@pytest.fixture
+def service(monkeypatch):
+    db = FakeDatabase({'users': [user_row()]})
+    monkeypatch.setattr(auth_service, "db", db)
+    service = UserService()
+    service.db = db
+    return service
+
+@pytest.mark.asyncio
+async def test_reactivating_a_deactivated_user_sets_is_active(service):
+    await service.deactivate_user("user-1")
+
+    user = await service.update_user_status("user-1", UserStatus.ACTIVE)
+
+    assert user.status == UserStatus.ACTIVE
+    assert user.is_active is True
+    assert service.db.tables['users'][0]['is_active'] is True
+
+@pytest.mark.asyncio
+async def test_suspending_a_user_clears_is_active(service):
+    user = await service.update_user_status("user-1", UserStatus.SUSPENDED)
+
+    assert user.is_active is False
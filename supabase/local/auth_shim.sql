@@ -0,0 +1,16 @@
+/*
+  # Supabase stand-ins for a plain local Postgres
+
+  The migrations reference `auth.uid()` in row level security policies. Load
+  this file before the files in `supabase/migrations` when running the
+  backend with DATABASE_BACKEND=postgres against a database that is not a
+  Supabase project. Do not run it on Supabase, which already provides the
+  `auth` schema.
+*/
+
+CREATE SCHEMA IF NOT EXISTS auth;
+
+CREATE OR REPLACE FUNCTION auth.uid()
+RETURNS UUID AS $$
+  SELECT NULLIF(current_setting('request.jwt.claim.sub', true), '')::UUID
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,21 @@
+/*
+  # Token versioning for self-contained JWTs
+
+  1. Changes
+    - `users.token_version` - bumped whenever a user's password or status
+      changes; claims-mode tokens carrying an older version are rejected
+
+  2. Indexes
+    - `idx_users_token_version_updated` - lets workers load the recently
+      bumped versions that make up the revocation list
+
+  Rollback:
+    DROP INDEX IF EXISTS idx_users_token_version_updated;
+    ALTER TABLE users DROP COLUMN IF EXISTS token_version;
+*/
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 1;
+
+CREATE INDEX IF NOT EXISTS idx_users_token_version_updated
+  ON users(updated_at)
+  WHERE token_version > 1;
@@ -0,0 +1,78 @@
+/*
+  # Block reservation for matricule numbers
+
+  1. New Tables
+    - `matricule_sequences` - persisted high-water mark per matricule prefix
+      (year suffix + role code, e.g. `25STU`)
+
+  2. Functions
+    - `reserve_matricule_block(user_role, block_size, department)` - atomically
+      reserves `block_size` consecutive numbers and returns the prefix and the
+      new high-water mark; the backend hands the block out from memory
+    - `generate_matricule` now reserves a block of one from the same sequence,
+      so single creations never reuse a number held by a reserved block
+
+  Matricules do not encode the department, so sequences are shared by all
+  departments of a role; `department` is accepted for API compatibility.
+
+  Rollback:
+    DROP FUNCTION IF EXISTS reserve_matricule_block(TEXT, INTEGER, TEXT);
+    DROP TABLE IF EXISTS matricule_sequences;
+    -- and re-run generate_matricule from 20250721171928_shrill_math.sql
+*/
+
+CREATE TABLE IF NOT EXISTS matricule_sequences (
+  prefix TEXT PRIMARY KEY,
+  high_water INTEGER NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+ALTER TABLE matricule_sequences ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION reserve_matricule_block(user_role TEXT, block_size INTEGER DEFAULT 100, department TEXT DEFAULT NULL)
+RETURNS JSON AS $$
+DECLARE
+  seq_prefix TEXT;
+  existing_max INTEGER;
+  new_high INTEGER;
+BEGIN
+  seq_prefix := RIGHT(EXTRACT(YEAR FROM NOW())::TEXT, 2) ||
+    CASE user_role
+      WHEN 'admin' THEN 'ADM'
+      WHEN 'lecturer' THEN 'LEC'
+      WHEN 'student' THEN 'STU'
+      ELSE 'USR'
+    END;
+
+  -- Seed the sequence from existing matricules the first time a prefix is used
+  IF NOT EXISTS (SELECT 1 FROM matricule_sequences WHERE prefix = seq_prefix) THEN
+    SELECT COALESCE(MAX(SUBSTRING(matricule FROM LENGTH(seq_prefix) + 1)::INTEGER), 0)
+    INTO existing_max
+    FROM users
+    WHERE matricule ~ ('^' || seq_prefix || '[0-9]+$');
+  ELSE
+    existing_max := 0;
+  END IF;
+
+  INSERT INTO matricule_sequences (prefix, high_water)
+  VALUES (seq_prefix, existing_max + block_size)
+  ON CONFLICT (prefix) DO UPDATE
+    SET high_water = matricule_sequences.high_water + block_size,
+        updated_at = now()
+  RETURNING high_water INTO new_high;
+
+  RETURN json_build_object('prefix', seq_prefix, 'high_water', new_high);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION generate_matricule(user_role TEXT, department TEXT DEFAULT NULL)
+RETURNS TEXT AS $$
+DECLARE
+  block JSON;
+BEGIN
+  block := reserve_matricule_block(user_role, 1, department);
+  -- LPAD truncates longer strings, so only pad numbers below 100
+  RETURN (block->>'prefix') ||
+    LPAD(block->>'high_water', GREATEST(3, LENGTH(block->>'high_water')), '0');
+END;
+$$ LANGUAGE plpgsql;
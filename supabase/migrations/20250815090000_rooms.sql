@@ -0,0 +1,49 @@
+/*
+  # Rooms reference table
+
+  1. New Tables
+    - `rooms` - teaching rooms with their building, type, seating capacity
+      and equipment; the backend keeps the whole table in memory to filter
+      free rooms by capacity and type
+
+  2. Changes
+    - `course_schedules.building` (nullable), which the backend already
+      reads and writes alongside `room`
+
+  3. Data
+    - Seeded with every (room, building) already used by `course_schedules`
+      (type `classroom`, capacity unknown) so existing rooms stay searchable
+
+  `course_schedules.room` stays free text and is matched against
+  `rooms.name` (and `building`) by the backend.
+
+  Rollback:
+    DROP TABLE IF EXISTS rooms;
+    ALTER TABLE course_schedules DROP COLUMN IF EXISTS building;
+*/
+
+CREATE TABLE IF NOT EXISTS rooms (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  name TEXT NOT NULL,
+  building TEXT,
+  type TEXT NOT NULL DEFAULT 'classroom' CHECK (type IN ('classroom', 'lab', 'amphitheater', 'seminar')),
+  capacity INTEGER CHECK (capacity > 0),
+  equipment TEXT[] NOT NULL DEFAULT '{}',
+  is_active BOOLEAN DEFAULT true,
+  created_at TIMESTAMPTZ DEFAULT now(),
+  updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- One room per name within a building; rooms without a building share the '' slot
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rooms_building_name
+  ON rooms(COALESCE(building, ''), name);
+
+ALTER TABLE rooms ENABLE ROW LEVEL SECURITY;
+
+CREATE TRIGGER update_rooms_updated_at BEFORE UPDATE ON rooms FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE course_schedules ADD COLUMN IF NOT EXISTS building TEXT;
+
+INSERT INTO rooms (name, building)
+SELECT DISTINCT room, building FROM course_schedules
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,13 @@
+/*
+  # Rotatable calendar feed tokens
+
+  1. Changes
+    - `users.calendar_feed_version` - part of the HMAC input of the user's
+      calendar feed token; bumping it replaces the feed URL and makes the
+      old one return 404
+
+  Rollback:
+    ALTER TABLE users DROP COLUMN IF EXISTS calendar_feed_version;
+*/
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS calendar_feed_version INTEGER NOT NULL DEFAULT 1;